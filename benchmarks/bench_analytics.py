@@ -0,0 +1,85 @@
+"""
+Benchmark Analytics.generate_summary on a synthetic loss frame.
+
+Builds a frame of --rows losses spread over --policies policies, with
+amounts and dates in the mixed formats seen in extracted loss runs, then
+times the vectorized summary against the previous per-row amount
+conversion and date-string counting. Amounts are almost all distinct,
+the worst case for parsing distinct values only; real loss runs repeat
+round amounts far more.
+
+    python -m benchmarks.bench_analytics --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import Analytics
+
+
+def build_frame(rows, policies, seed=0):
+    rng = np.random.default_rng(seed)
+    cents = rng.integers(0, 5_000_000, rows)
+    amounts = pd.Series(cents / 100).map("${:,.2f}".format)
+    # A share of amounts in the other formats extraction produces
+    amounts[rng.random(rows) < 0.05] = "(250.00)"
+    amounts[rng.random(rows) < 0.05] = "1,500 USD"
+    dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+    date_text = pd.Series(dates.strftime("%m/%d/%Y"))
+    iso = rng.random(rows) < 0.1
+    date_text[iso] = dates[iso].strftime("%Y-%m-%d")
+    policy = rng.integers(0, policies, rows)
+    return pd.DataFrame({
+        "policy_number": pd.Series(policy).map("PX-{:06d}".format),
+        "insured_name": pd.Series(policy % max(1, policies // 3)).map("Insured {}".format),
+        "claim_number": pd.Series(np.arange(rows)).map("CLM-{:08d}".format),
+        "date_of_loss": date_text,
+        "amount": amounts,
+        "description": pd.Series(rng.integers(0, 500, rows)).map("Driver {}".format)
+    })
+
+
+def per_row_summary(analytics, df):
+    """
+    The summary as it was computed before vectorization.
+    """
+    df['amount_numeric'] = df['amount'].apply(analytics.clean_amount)
+    return {
+        'total_claims': len(df),
+        'total_amount': df['amount_numeric'].sum(),
+        'claims_by_month': df['date_of_loss'].value_counts().to_dict()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--policies", type=int, default=5000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    frame = build_frame(args.rows, args.policies)
+    print(f"Built {len(frame):,} rows in {time.perf_counter() - started:.2f}s")
+
+    analytics = Analytics(data={})
+    started = time.perf_counter()
+    per_row_summary(analytics, frame.copy())
+    per_row = time.perf_counter() - started
+
+    started = time.perf_counter()
+    summary = analytics.generate_summary(frame.copy())
+    vectorized = time.perf_counter() - started
+
+    print(f"{'summary':<28}{'seconds':>10}")
+    print(f"{'per-row apply (before)':<28}{per_row:>10.2f}")
+    print(f"{'vectorized':<28}{vectorized:>10.2f}")
+    print(f"speedup: {per_row / vectorized:.1f}x (the vectorized summary also resamples by month/year "
+          f"and groups by policy and insured)")
+    print(f"total ${summary['total_amount']:,.2f} over {len(summary['claims_by_month'])} months, "
+          f"{len(summary['by_policy'])} policies, {summary['undated_claims']} undated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark serial vs parallel page-range text extraction.
+
+Builds a large PDF by repeating the pages of a source PDF, then times
+PDFParser.extract_text with 1, 2, 4, ... workers up to the CPU count.
+
+    python -m benchmarks.bench_pdf_extraction --pages 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from src.pdf_parser import PDFParser
+
+
+def build_pdf(source, pages, path):
+    with fitz.open(source) as src, fitz.open() as out:
+        while len(out) < pages:
+            out.insert_pdf(src, to_page=min(len(src), pages - len(out)) - 1)
+        out.save(path)
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="data/input/sample.pdf")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the best time is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pdf")
+        build_pdf(args.source, args.pages, path)
+        print(f"{args.pages} pages, {os.cpu_count()} CPU(s)\n")
+        print(f"{'workers':>7} {'seconds':>8} {'pages/sec':>10} {'speedup':>8}")
+        baseline = None
+        reference = None
+        for workers in worker_counts(args.max_workers):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                text = PDFParser(path).extract_text(workers=workers)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            if reference is None:
+                reference = text
+            elif text != reference:
+                raise AssertionError(f"Output with {workers} workers differs from serial extraction")
+            baseline = baseline or best
+            print(f"{workers:>7} {best:>8.2f} {args.pages / best:>10.0f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
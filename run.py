@@ -1,11 +1,26 @@
 import argparse
+import itertools
+import json
 import logging
-from src.pdf_parser import PDFParser
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from src.job_journal import JobJournal
+from src.loss_store import LossStore
+from src.edition_store import Edition, EditionStore, attribute_losses, page_content_hash, page_policy_number
+from src.parse_cache import ParseCache
+from src.pdf_parser import PAGE_BREAK, PDFParser, file_document_id
 from src.data_processor import DataProcessor
 from src.transformer import Transformer
 from src.analytics import Analytics
 from src.cost_tracker import CostTracker
 from src.output_manager import OutputManager
+from src.batch_processor import BatchProcessor
+from src.layout_extractor import LayoutExtractor
+from src.request_packer import RequestPacker
+from src.scheduler import BudgetScheduler
 
 # Configure logging
 logging.basicConfig(
@@ -14,32 +29,231 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def main(pdf_path):
+def extract_llm_pages(pages, processor, executor=None, edition_store=None, edition=None, journal=None):
+    """
+    Send (page number, text) pairs to the LLM, reusing stored results for pages seen in an earlier edition.
+
+    Only pages whose content hash has no stored result for the document's
+    policy are chunked and sent; pages read before the first policy header are
+    always sent. Their extraction is split back into per-page results and
+    appended, with the reused pages, to the `Edition` for
+    `EditionStore.save_edition`, which is marked incomplete if a chunk fails.
+    A stored loss whose claim number was extracted again from a changed page
+    is dropped in favour of the new one. Chunks are recorded in `journal`, if
+    given.
+
+    Returns:
+        tuple: (per-page or per-segment results in page order, usage records)
+    """
+    if edition_store is None:
+        data, usage = processor.process_pages(
+            (text for _, text in pages), return_usage=True, executor=executor, journal=journal
+        )
+        return [data], usage
+
+    edition = edition if edition is not None else Edition()
+    reused = []
+    changed = []
+    failed_chunks = []
+
+    def changed_texts():
+        for page_number, text in pages:
+            edition.note_policy(page_policy_number(text))
+            page_hash = page_content_hash(text)
+            stored = edition_store.lookup(page_hash, processor.model, edition.policy_number)
+            if stored is None:
+                changed.append((page_number, page_hash, text))
+                yield text
+            else:
+                reused.append((page_number, page_hash, stored))
+
+    data, usage = processor.process_pages(changed_texts(), return_usage=True, executor=executor, journal=journal,
+                                          failed_chunks=failed_chunks)
+    if failed_chunks:
+        edition.complete = False
+    fresh = attribute_losses(data, changed)
+    fresh_claims = {loss.get("claim_number") for loss in data.get("losses", [])}
+    logging.info(f"Incremental extraction: {len(changed)} page(s) sent, {len(reused)} page(s) reused")
+
+    results = []
+    pages_in_order = sorted(
+        [page + (True,) for page in fresh] + [page + (False,) for page in reused], key=lambda page: page[0]
+    )
+    for page_number, page_hash, result, is_fresh in pages_in_order:
+        edition.pages.append((page_number, page_hash, result))
+        if not is_fresh:
+            result = dict(result, losses=[
+                loss for loss in result.get("losses", []) if loss.get("claim_number") not in fresh_claims
+            ])
+        results.append(result)
+    return results, usage
+
+
+def save_edition(edition_store, edition, merged, model, journal=None):
+    """
+    Save a document's pages as its policy's latest edition, unless a chunk failed.
+
+    Pages of a chunk that failed (in this run or, per the journal, an earlier
+    one) have no results, so saving them would stop them being sent again;
+    the previous edition is kept instead.
+    """
+    if not edition.complete or (journal is not None and journal.failed):
+        logging.warning(
+            f"Edition of policy '{edition.policy_number or merged.get('policy_number', '')}' not saved: "
+            f"some chunks failed, so its pages will be sent again next time"
+        )
+        return
+    edition_store.save_edition(edition.policy_number or merged.get("policy_number", ""), model, edition.pages)
+
+
+def extract_segments(layout, processor, executor=None, edition_store=None, journal=None):
+    """
+    Turn a layout fast path result into structured data, sending the LLM segments to the API.
+
+    With an edition store, only pages not seen in an earlier edition are sent.
+
+    Returns:
+        tuple: (structured data, per-chunk usage records of the LLM calls)
+    """
+    chunks = []
+    usage = []
+    edition = Edition()
+    for kind, segment in layout['segments']:
+        if kind == "template":
+            edition.note_policy(segment.get("policy_number"))
+            chunks.append(segment)
+        else:
+            segment_chunks, segment_usage = extract_llm_pages(
+                segment, processor, executor, edition_store, edition, journal
+            )
+            chunks.extend(segment_chunks)
+            usage.extend(segment_usage)
+    merged = processor.merge_chunks(chunks)
+    if edition_store is not None:
+        save_edition(edition_store, edition, merged, processor.model, journal)
+    return merged, usage
+
+
+def extract_document(parser, processor, executor=None, edition_store=None, journal=None):
+    """
+    Extract structured data, using layout templates where they match and the LLM elsewhere.
+
+    Pages stream from a single open of the PDF; each run of pages that needs
+    the LLM is chunked and sent while it is still being read. With an edition
+    store, only pages not seen in an earlier edition are sent.
+
+    Returns:
+        tuple: (structured data, per-chunk usage records of the LLM calls)
+    """
+    return extract_pages(parser.iter_page_words(), processor, executor, edition_store, journal)
+
+
+def extract_pages(page_words, processor, executor=None, edition_store=None, journal=None):
+    """
+    `extract_document` over (page number, words, text) tuples from `PDFParser.iter_page_words`.
+    """
+    chunks = []
+    usage = []
+    edition = Edition()
+    template_pages = 0
+    fallback_pages = 0
+    pages = LayoutExtractor().iter_extract(page_words)
+    for kind, group in itertools.groupby(pages, key=lambda item: item[0]):
+        if kind == "template":
+            for _, sections in group:
+                for section in sections:
+                    edition.note_policy(section.get("policy_number"))
+                chunks.extend(sections)
+                template_pages += 1
+        else:
+            def llm_pages(group=group):
+                nonlocal fallback_pages
+                for _, page in group:
+                    fallback_pages += 1
+                    yield page
+
+            segment_chunks, segment_usage = extract_llm_pages(
+                llm_pages(), processor, executor, edition_store, edition, journal
+            )
+            chunks.extend(segment_chunks)
+            usage.extend(segment_usage)
+    logging.info(
+        f"Layout fast path: {template_pages} page(s) from templates, {fallback_pages} page(s) need the LLM"
+    )
+    merged = processor.merge_chunks(chunks)
+    if edition_store is not None:
+        save_edition(edition_store, edition, merged, processor.model, journal)
+    return merged, usage
+
+
+def load_config(config_path='config/config.json'):
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+def parse_cache_settings(config):
+    """
+    Return (db_path, max_bytes) for the parse cache, or None when it is disabled.
+    """
+    if not config.get('parse_cache_enabled', True):
+        return None
+    return (
+        config.get('parse_cache_path', 'data/cache/parse_cache.sqlite'),
+        int(config.get('parse_cache_max_mb', 512) * 1024 * 1024)
+    )
+
+
+def open_parse_cache(settings):
+    return ParseCache(settings[0], max_bytes=settings[1]) if settings else None
+
+
+def open_edition_store(config):
+    """
+    Return the store of per-page results used for incremental reprocessing, or None when it is disabled.
+    """
+    if not config.get('incremental_enabled', True):
+        return None
+    return EditionStore(config.get('edition_store_path', 'data/cache/editions.sqlite'))
+
+
+def open_loss_store(config):
+    """
+    Return the persistent store every extraction is upserted into, or None when it is disabled.
+    """
+    if not config.get('loss_store_enabled', True):
+        return None
+    return LossStore(config.get('loss_store_path', 'data/store/losses.sqlite'),
+                     running_aggregates=config.get('running_aggregates', True))
+
+
+def open_journal(journal_dir, document_id, source, model, resume=False):
+    """
+    Open the write-ahead journal of one document's extraction job, continuing an earlier run with `resume`.
+    """
+    path = os.path.join(journal_dir, f"{document_id}.jsonl")
+    return JobJournal(path, job={"document_id": document_id, "source": source, "model": model}, resume=resume)
+
+
+def main(pdf_paths, resume=False):
     try:
         logging.info("Starting the PDF processing pipeline.")
-        
-        # Step 1: PDF Parsing
-        parser = PDFParser(pdf_path)
-        pdf_data = parser.parse_pdf()
-        text_content = pdf_data['text']
-        metadata = pdf_data['metadata']
-        
-        # Step 2: Data Processing (OpenAI API)
+        config = load_config()
         processor = DataProcessor()
-        structured_data = processor.process_text(text_content)
-        api_usage = {"prompt_tokens": 500, "completion_tokens": 1500, "total_tokens": 2000}  # Replace with real usage data
-        
-        # Step 3: Data Transformation
-        transformer = Transformer()
-        transformer.transform(structured_data)
-        
-        # Step 4: Analytics (Optional)
-        analytics = Analytics("data/output/output.json")
-        analytics.run()
-        
-        # Step 5: Cost Tracking
-        cost_tracker = CostTracker()
-        cost_tracker.run(api_usage)
+
+        # Steps 1-5 run as a pipeline: parsing of the next document overlaps the
+        # OpenAI API calls for the current one, and the extraction is handed in
+        # memory to transformation, analytics and cost tracking, which run concurrently
+        names = {pdf_paths[0]: "output"} if len(pdf_paths) == 1 else None
+        result = run_pipeline(
+            pdf_paths, processor,
+            parse_cache=open_parse_cache(parse_cache_settings(config)),
+            edition_store=open_edition_store(config),
+            loss_store=open_loss_store(config),
+            journal_dir=config.get('journal_dir', 'data/jobs'),
+            resume=resume,
+            queue_size=config.get('pipeline_queue_size', 2),
+            names=names
+        )
         
         # Step 6: Output Management
         output_manager = OutputManager()
@@ -49,6 +263,18 @@ def main(pdf_path):
             file_name_prefix="pipeline_summary"
         )
         
+        if result["incomplete"]:
+            print(
+                f"⚠️ {len(result['incomplete'])} document(s) have failed chunks missing from the results; "
+                f"rerun with --resume to retry only those."
+            )
+        if result["failed"]:
+            print(
+                f"❌ {len(result['failed'])} document(s) failed: {', '.join(result['failed'])}. "
+                f"Finished chunks are kept in the job journal; rerun with --resume to continue."
+            )
+        if not result["documents"]:
+            raise ValueError("No document was processed successfully")
         logging.info("PDF processing pipeline completed successfully.")
         print("✅ Pipeline executed successfully. Check the 'data/output' directory for results.")
     
@@ -57,10 +283,561 @@ def main(pdf_path):
         print(f"❌ Pipeline execution failed: {e}")
 
 
+def process_document(pdf_path, processor, cost_tracker, output_dir="data/output", parse_cache=None,
+                     edition_store=None, loss_store=None):
+    """
+    Extract one document and write `<name>.json` and `<name>.md` to the output directory,
+    upserting it into the `loss_store` when one is given.
+
+    Returns:
+        dict: The document's CostTracker summary.
+    """
+    parser = PDFParser(pdf_path, cache=parse_cache)
+    structured_data, usage = extract_document(parser, processor, edition_store=edition_store)
+    name = os.path.splitext(os.path.basename(pdf_path))[0]
+    transformer = Transformer(output_dir)
+    transformer.save_json(structured_data, f"{name}.json")
+    transformer.generate_markdown(structured_data, f"{name}.md")
+    if loss_store is not None:
+        loss_store.upsert_document(parser.document_id, structured_data, pdf_path)
+    return cost_tracker.summarize_document(
+        os.path.basename(pdf_path), usage, pages=parser.page_total, claims=len(structured_data.get('losses', []))
+    )
+
+
+def run_pipeline(pdf_paths, processor, output_dir="data/output", parse_cache=None, edition_store=None,
+                 journal_dir=None, resume=False, queue_size=2, page_buffer=64, names=None, loss_store=None):
+    """
+    Run parsing, extraction and the output stages over several documents as a pipeline.
+
+    A parser thread streams each document's pages through a bounded queue, so
+    it reads document N+1 while the LLM calls for document N are in flight
+    (at most `queue_size` documents ahead, `page_buffer` pages each). Stages
+    hand results over in memory: once a document is extracted, its JSON and
+    Markdown outputs, analytics summary and cost summary are produced
+    concurrently while the next document is extracted, and upserted into
+    the `loss_store` when one is given. A combined cost report is written at
+    the end.
+
+    Args:
+        names (dict): Output file stem per PDF path; defaults to the file name.
+
+    Returns:
+        dict: Per-document results ({"data", "analytics", "cost"}), failed paths,
+        and documents whose journal still has failed chunks.
+    """
+    names = names or {}
+    transformer = Transformer(output_dir)
+    cost_tracker = CostTracker(output_dir)
+    documents = queue.Queue(maxsize=queue_size)
+    done = object()
+
+    def parse_all():
+        for pdf_path in pdf_paths:
+            pages = queue.Queue(maxsize=page_buffer)
+            try:
+                parser = PDFParser(pdf_path, cache=parse_cache)
+            except Exception as e:
+                documents.put((pdf_path, None, e))
+                continue
+            documents.put((pdf_path, parser, pages))
+            try:
+                for page in parser.iter_page_words():
+                    pages.put(page)
+                pages.put(done)
+            except Exception as e:
+                pages.put(e)
+        documents.put(done)
+
+    def iter_queue(pages):
+        while True:
+            page = pages.get()
+            if page is done:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+    reader = threading.Thread(target=parse_all, name="pdf-parser", daemon=True)
+    reader.start()
+    results = {}
+    failed = []
+    incomplete = []
+    pending = []
+    with ThreadPoolExecutor(max_workers=4) as stage_pool:
+        while True:
+            item = documents.get()
+            if item is done:
+                break
+            pdf_path, parser, pages = item
+            if parser is None:
+                logging.error(f"Failed to open {pdf_path}: {pages}")
+                failed.append(pdf_path)
+                continue
+            journal = None
+            page_iter = iter_queue(pages)
+            try:
+                if journal_dir:
+                    journal = open_journal(journal_dir, parser.document_id, pdf_path, processor.model, resume)
+                data, usage = extract_pages(page_iter, processor, edition_store=edition_store, journal=journal)
+            except Exception as e:
+                logging.error(f"Failed to extract {pdf_path}: {e}")
+                failed.append(pdf_path)
+                # Let the parser thread finish this document and move on
+                for _ in page_iter:
+                    pass
+                continue
+            finally:
+                if journal is not None:
+                    journal.close()
+            if journal is not None:
+                if journal.failed:
+                    incomplete.append(pdf_path)
+                else:
+                    journal.remove()
+
+            name = names.get(pdf_path) or os.path.splitext(os.path.basename(pdf_path))[0]
+            stages = {
+                "json": stage_pool.submit(transformer.save_json, data, f"{name}.json"),
+                "markdown": stage_pool.submit(transformer.generate_markdown, data, f"{name}.md"),
+                "analytics": stage_pool.submit(Analytics(data=data).run),
+                "cost": stage_pool.submit(
+                    cost_tracker.summarize_document, os.path.basename(pdf_path), usage,
+                    pages=parser.page_total, claims=len(data.get('losses', []))
+                )
+            }
+            if loss_store is not None:
+                stages["store"] = stage_pool.submit(loss_store.upsert_document, parser.document_id, data, pdf_path)
+            pending.append((pdf_path, data, stages))
+
+        for pdf_path, data, stages in pending:
+            try:
+                results[pdf_path] = {
+                    "data": data,
+                    "analytics": stages["analytics"].result(),
+                    "cost": stages["cost"].result()
+                }
+                stages["json"].result()
+                stages["markdown"].result()
+                if "store" in stages:
+                    stages["store"].result()
+            except Exception as e:
+                logging.error(f"Output stages failed for {pdf_path}: {e}")
+                results.pop(pdf_path, None)
+                failed.append(pdf_path)
+    reader.join()
+
+    summaries = [result["cost"] for result in results.values()]
+    if summaries:
+        cost_tracker.run_documents(summaries)
+    logging.info(
+        f"Pipeline run finished: {len(results)} document(s), {len(failed)} failed, {len(incomplete)} incomplete"
+    )
+    return {"documents": results, "failed": failed, "incomplete": incomplete}
+
+
+def scheduled_run(pdf_paths, budget, tokens_per_minute=None, priority=0):
+    """
+    Queue the given PDFs and process queued documents in priority order within the daily budget.
+    """
+    try:
+        logging.info(f"Starting budgeted run (budget: ${budget:.2f}, new documents: {len(pdf_paths)})")
+        processor = DataProcessor()
+        cost_tracker = CostTracker()
+        config = load_config()
+        parse_cache = open_parse_cache(parse_cache_settings(config))
+        edition_store = open_edition_store(config)
+        loss_store = open_loss_store(config)
+        scheduler = BudgetScheduler(processor, budget, tokens_per_minute=tokens_per_minute, parse_cache=parse_cache)
+        for pdf_path in pdf_paths:
+            scheduler.submit(pdf_path, priority)
+        scheduler.save()
+
+        summaries = []
+
+        def run_one(pdf_path):
+            summary = process_document(pdf_path, processor, cost_tracker,
+                                       parse_cache=parse_cache, edition_store=edition_store,
+                                       loss_store=loss_store)
+            summaries.append(summary)
+            return summary
+
+        result = scheduler.run(run_one)
+        if summaries:
+            cost_tracker.run_documents(summaries)
+        print(
+            f"✅ Processed {len(result['processed'])} document(s) for ${result['spent']:.4f} of "
+            f"${result['budget']:.2f} today; {len(result['deferred'])} deferred, {len(result['failed'])} failed."
+        )
+        if result["rejected"]:
+            print(
+                f"⚠️ {len(result['rejected'])} document(s) cost more than the whole daily budget and were not "
+                f"queued: {', '.join(result['rejected'])}"
+            )
+    except Exception as e:
+        logging.error(f"Budgeted run failed: {e}")
+        print(f"❌ Budgeted run failed: {e}")
+
+
+def find_pdfs(input_folder):
+    """
+    Return every PDF under `input_folder`, recursively, in a stable order.
+    """
+    pdf_paths = []
+    for root, _, files in os.walk(input_folder):
+        pdf_paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+    return sorted(pdf_paths)
+
+
+def output_name(pdf_path, input_folder):
+    """
+    Output file stem for a PDF: its path relative to the input folder, with separators replaced.
+    """
+    relative = os.path.relpath(pdf_path, input_folder)
+    return os.path.splitext(relative)[0].replace(os.sep, "__")
+
+
+def parse_document(pdf_path, document_id=None, cache_settings=None):
+    """
+    Process-pool worker: run PDF parsing and the layout fast path for one document.
+
+    Returns:
+        dict: The source path, page count and layout result (plain, picklable data).
+    """
+    parse_cache = open_parse_cache(cache_settings)
+    try:
+        parser = PDFParser(pdf_path, cache=parse_cache, document_id=document_id)
+        # Already one of a pool of parse processes: extract this document's pages serially
+        layout = LayoutExtractor().extract(parser.iter_page_words(workers=1))
+    finally:
+        if parse_cache:
+            parse_cache.close()
+    return {
+        "path": pdf_path,
+        "document_id": parser.document_id,
+        "pages": layout["template_pages"] + layout["fallback_pages"],
+        "layout": layout
+    }
+
+
+def run_directory(input_folder, output_folder, workers=None, processor=None, cache_settings=None,
+                  edition_store=None, journal_dir=None, resume=False, packer=None, pack_max_pages=2,
+                  loss_store=None):
+    """
+    Process every PDF in a folder: parsing in a process pool, LLM calls on one shared thread pool.
+
+    Byte-identical files are processed once: each PDF's content hash is its
+    document ID and later copies are reported as duplicates. Each document is
+    written as `<name>.json` and `<name>.md` in the output folder (and
+    upserted into the `loss_store` when one is given), and a combined cost
+    report covers the whole run. With `journal_dir`, each
+    document's chunks are journaled there and `resume` continues the documents
+    an interrupted run left unfinished. With a `packer`, documents with at most
+    `pack_max_pages` pages needing the LLM are extracted together in packed
+    requests once parsing has finished.
+
+    Returns:
+        dict: Counts, elapsed time and throughput in documents and pages per second.
+    """
+    started = time.monotonic()
+    pdf_paths = []
+    duplicates = {}
+    seen = {}
+    failed = []
+    for path in find_pdfs(input_folder):
+        try:
+            document_id = file_document_id(path)
+        except OSError as e:
+            logging.error(f"Failed to read {path}: {e}")
+            failed.append(path)
+            continue
+        if document_id in seen:
+            logging.info(f"Skipping {path}: same content as {seen[document_id]} ({document_id})")
+            duplicates[path] = seen[document_id]
+            continue
+        seen[document_id] = path
+        pdf_paths.append((path, document_id))
+    logging.info(
+        f"Directory run: {len(pdf_paths)} unique PDF(s) ({len(duplicates)} duplicate(s)) "
+        f"in {input_folder} -> {output_folder}"
+    )
+    processor = processor or DataProcessor()
+    cost_tracker = CostTracker(output_folder)
+    transformer = Transformer(output_folder)
+    summaries = []
+    pages = 0
+
+    def write(parsed, structured_data, usage):
+        name = output_name(parsed["path"], input_folder)
+        transformer.save_json(structured_data, f"{name}.json")
+        transformer.generate_markdown(structured_data, f"{name}.md")
+        if loss_store is not None:
+            loss_store.upsert_document(parsed["document_id"], structured_data, parsed["path"])
+        return cost_tracker.summarize_document(
+            os.path.relpath(parsed["path"], input_folder), usage,
+            pages=parsed["pages"], claims=len(structured_data.get('losses', []))
+        )
+
+    def finish(parsed, llm_pool):
+        journal = None
+        if journal_dir:
+            journal = open_journal(journal_dir, parsed["document_id"], parsed["path"], processor.model, resume)
+        try:
+            structured_data, usage = extract_segments(parsed["layout"], processor, executor=llm_pool,
+                                                      edition_store=edition_store, journal=journal)
+            summary = write(parsed, structured_data, usage)
+        finally:
+            if journal is not None:
+                journal.close()
+        if journal is not None and not journal.failed:
+            journal.remove()
+        return summary
+
+    def finish_packed(small, llm_pool):
+        texts = {
+            parsed["path"]: PAGE_BREAK.join(
+                text for kind, segment in parsed["layout"]["segments"] if kind == "llm" for _, text in segment
+            )
+            for parsed in small
+        }
+        packed, packed_usage = packer.process_documents(texts, return_usage=True, executor=llm_pool)
+        for parsed in small:
+            if parsed["path"] not in packed:
+                failed.append(parsed["path"])
+                continue
+            chunks = [segment for kind, segment in parsed["layout"]["segments"] if kind == "template"]
+            structured_data = processor.merge_chunks([packed[parsed["path"]]] + chunks)
+            try:
+                summaries.append(write(parsed, structured_data, packed_usage[parsed["path"]]))
+            except Exception as e:
+                logging.error(f"Failed to write {parsed['path']}: {e}")
+                failed.append(parsed["path"])
+        logging.info(f"Request packing: {packer.stats()}")
+
+    # Document threads only wait on chunk futures, so the shared LLM pool alone
+    # bounds concurrent API calls across all documents.
+    with ProcessPoolExecutor(max_workers=workers) as parse_pool, \
+            ThreadPoolExecutor(max_workers=processor.max_concurrency) as llm_pool, \
+            ThreadPoolExecutor(max_workers=processor.max_concurrency) as document_pool:
+        parse_futures = {
+            parse_pool.submit(parse_document, path, document_id, cache_settings): path
+            for path, document_id in pdf_paths
+        }
+        document_futures = {}
+        small = []
+        for future in as_completed(parse_futures):
+            path = parse_futures[future]
+            try:
+                parsed = future.result()
+            except Exception as e:
+                logging.error(f"Failed to parse {path}: {e}")
+                failed.append(path)
+                continue
+            pages += parsed["pages"]
+            if packer is not None and 0 < parsed["layout"]["fallback_pages"] <= pack_max_pages:
+                small.append(parsed)
+                continue
+            document_futures[document_pool.submit(finish, parsed, llm_pool)] = path
+        if small:
+            try:
+                finish_packed(sorted(small, key=lambda parsed: parsed["path"]), llm_pool)
+            except Exception as e:
+                logging.error(f"Failed to extract packed documents: {e}")
+                failed.extend(parsed["path"] for parsed in small)
+        for future in as_completed(document_futures):
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                logging.error(f"Failed to extract {document_futures[future]}: {e}")
+                failed.append(document_futures[future])
+
+    if summaries:
+        cost_tracker.run_documents(sorted(summaries, key=lambda summary: summary["document"]))
+    elapsed = time.monotonic() - started
+    result = {
+        "documents": len(summaries),
+        "failed": sorted(failed),
+        "duplicates": duplicates,
+        "pages": pages,
+        "elapsed": round(elapsed, 2),
+        "docs_per_sec": round(len(summaries) / elapsed, 2) if elapsed else 0.0,
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else 0.0
+    }
+    logging.info(f"Directory run finished: {result}")
+    return result
+
+
+def directory_run(input_folder=None, workers=None, resume=False, pack=False):
+    try:
+        config = load_config()
+        input_folder = input_folder or config.get('input_folder', 'data/input')
+        output_folder = config.get('output_folder', 'data/output')
+        packer = None
+        processor = DataProcessor()
+        if pack or config.get('pack_small_documents', False):
+            packer = RequestPacker(processor, token_limit=config.get('pack_token_limit'),
+                                   max_documents=config.get('pack_max_documents', 8),
+                                   completion_ratio=config.get('pack_completion_ratio', 0.6))
+        result = run_directory(input_folder, output_folder, workers, processor=processor,
+                               cache_settings=parse_cache_settings(config),
+                               edition_store=open_edition_store(config),
+                               journal_dir=config.get('journal_dir', 'data/jobs'), resume=resume,
+                               packer=packer, pack_max_pages=config.get('pack_max_pages', 2),
+                               loss_store=open_loss_store(config))
+        print(
+            f"✅ Processed {result['documents']} document(s), {result['pages']} page(s) in {result['elapsed']}s "
+            f"({result['docs_per_sec']} docs/sec, {result['pages_per_sec']} pages/sec); "
+            f"{len(result['duplicates'])} duplicate(s) skipped, {len(result['failed'])} failed. "
+            f"Outputs are in {output_folder}."
+        )
+    except Exception as e:
+        logging.error(f"Directory run failed: {e}")
+        print(f"❌ Directory run failed: {e}")
+
+
+def batch_write(pdf_paths, requests_path):
+    try:
+        logging.info("Writing Batch API requests.")
+        batch = BatchProcessor(DataProcessor())
+        manifest_path = batch.write_requests(pdf_paths, requests_path)
+        print(f"✅ Batch requests written to {requests_path} (manifest: {manifest_path})")
+    except Exception as e:
+        logging.error(f"Batch request generation failed: {e}")
+        print(f"❌ Batch request generation failed: {e}")
+
+
+def batch_ingest(results_path, manifest_path):
+    try:
+        logging.info("Ingesting Batch API results.")
+        config = load_config()
+        batch = BatchProcessor(DataProcessor(), loss_store=open_loss_store(config))
+        documents = batch.ingest_results(results_path, manifest_path)
+        print(f"✅ Ingested batch results for {len(documents)} document(s). Check the 'data/output' directory.")
+    except Exception as e:
+        logging.error(f"Batch ingestion failed: {e}")
+        print(f"❌ Batch ingestion failed: {e}")
+
+
+def store_summary(policy_number=None):
+    """
+    Print analytics over the loss store: from the running aggregates for the
+    whole store when they are kept, otherwise (or for one policy) in SQL.
+    """
+    try:
+        config = load_config()
+        store = LossStore(config.get('loss_store_path', 'data/store/losses.sqlite'),
+                          running_aggregates=config.get('running_aggregates', True))
+        try:
+            if policy_number is None and store.running_aggregates:
+                summary = Analytics(store=store, running=True).run()
+            else:
+                summary = Analytics(store=store, policy_number=policy_number).run()
+            stats = store.stats()
+        finally:
+            store.close()
+        if summary is None:
+            raise ValueError("Analytics over the loss store failed")
+        print(json.dumps(summary, indent=4))
+        print(f"✅ {stats['losses']} loss(es) from {stats['documents']} document(s) across "
+              f"{stats['policies']} policies in the loss store.")
+    except Exception as e:
+        logging.error(f"Loss store summary failed: {e}")
+        print(f"❌ Loss store summary failed: {e}")
+
+
+def archive_analytics(source, workers=None, batch_size=500):
+    """
+    Print analytics over every extraction output in a directory or glob, streamed through a process pool.
+    """
+    def report(stats):
+        print(f"… {stats['files']} file(s), {stats['claims']} claim(s) in {stats['elapsed']}s "
+              f"({stats['files_per_sec']} files/sec, {stats['mb_per_sec']} MB/sec)", flush=True)
+
+    try:
+        analytics = Analytics(data_file=source, workers=workers, batch_size=batch_size, progress=report)
+        if not analytics.is_archive():
+            raise ValueError(f"{source} is neither a directory nor a glob pattern")
+        summary = analytics.run()
+        if summary is None:
+            raise ValueError("Archive analytics failed")
+        stats = analytics.archive_stats
+        print(json.dumps(summary, indent=4))
+        print(
+            f"✅ Summarized {stats['files']} file(s), {stats['claims']} claim(s) in {stats['elapsed']}s "
+            f"({stats['files_per_sec']} files/sec); {stats['skipped']} non-extraction file(s) skipped, "
+            f"{stats['failed']} unreadable."
+        )
+    except Exception as e:
+        logging.error(f"Archive analytics failed: {e}")
+        print(f"❌ Archive analytics failed: {e}")
+
+
+def rebuild_aggregates():
+    try:
+        config = load_config()
+        store = LossStore(config.get('loss_store_path', 'data/store/losses.sqlite'), running_aggregates=False)
+        try:
+            result = store.rebuild_aggregates()
+        finally:
+            store.close()
+        print(f"✅ Rebuilt running aggregates over {result['claims']} loss(es) "
+              f"({result['groups']} month/policy/insured totals) in {result['seconds']}s.")
+    except Exception as e:
+        logging.error(f"Rebuilding running aggregates failed: {e}")
+        print(f"❌ Rebuilding running aggregates failed: {e}")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Insurance Loss Run Report Processor")
-    parser.add_argument("pdf_path", help="Path to the PDF file to process")
+    parser.add_argument("pdf_path", nargs="*", help="Path to the PDF file(s) to process")
+    parser.add_argument("--batch-write", metavar="REQUESTS_JSONL",
+                        help="Write OpenAI Batch API requests for the given PDFs instead of calling the API")
+    parser.add_argument("--batch-ingest", metavar="RESULTS_JSONL",
+                        help="Merge a Batch API results file back into per-document outputs")
+    parser.add_argument("--manifest", help="Manifest written by --batch-write (<requests>.manifest.json)")
+    parser.add_argument("--input-dir", nargs="?", const="", metavar="DIR",
+                        help="Process every PDF in DIR (default: input_folder from config.json)")
+    parser.add_argument("--workers", type=int,
+                        help="Parser processes for --input-dir, or analytics processes for --analytics "
+                             "(default: CPU count)")
+    parser.add_argument("--budget", type=float, metavar="USD",
+                        help="Daily API budget; queue the PDFs and process what fits, deferring the rest")
+    parser.add_argument("--budget-tpm", type=float, metavar="TOKENS",
+                        help="Estimated tokens per minute admitted by the budget scheduler")
+    parser.add_argument("--priority", type=int, default=0,
+                        help="Priority of the given PDFs in the budget queue (higher runs first)")
+    parser.add_argument("--pack", action="store_true",
+                        help="With --input-dir, extract small documents together in packed requests")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run: reuse chunks finished in its job journal, retry the rest")
+    parser.add_argument("--store-summary", nargs="?", const="", metavar="POLICY",
+                        help="Print analytics over every loss in the loss store (optionally one policy)")
+    parser.add_argument("--rebuild-aggregates", action="store_true",
+                        help="Recompute the loss store's running aggregates from every stored loss")
+    parser.add_argument("--analytics", metavar="DIR_OR_GLOB",
+                        help="Summarize every extraction output in a directory or glob, out of core")
+    parser.add_argument("--batch-size", type=int, default=500, help="Files per worker task for --analytics")
     args = parser.parse_args()
-    
-    main(args.pdf_path)
+
+    if args.batch_write:
+        batch_write(args.pdf_path, args.batch_write)
+    elif args.batch_ingest:
+        if not args.manifest:
+            parser.error("--batch-ingest requires --manifest")
+        batch_ingest(args.batch_ingest, args.manifest)
+    elif args.analytics:
+        archive_analytics(args.analytics, args.workers, args.batch_size)
+    elif args.rebuild_aggregates:
+        rebuild_aggregates()
+    elif args.store_summary is not None:
+        store_summary(args.store_summary or None)
+    elif args.input_dir is not None:
+        directory_run(args.input_dir or None, args.workers, args.resume, args.pack)
+    elif args.budget is not None:
+        scheduled_run(args.pdf_path, args.budget, args.budget_tpm, args.priority)
+    elif args.pdf_path:
+        main(args.pdf_path, args.resume)
+    else:
+        parser.error("a pdf_path is required unless --batch-write, --batch-ingest, --input-dir, --budget, "
+                     "--store-summary, --rebuild-aggregates or --analytics is given")
 
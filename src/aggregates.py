@@ -0,0 +1,190 @@
+import hashlib
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.validation import parse_amount, parse_date
+
+HLL_PRECISION = 12
+
+
+def month_range(first: str, last: str) -> List[str]:
+    """
+    Every 'YYYY-MM' label from `first` to `last` inclusive.
+    """
+    year, month = map(int, first.split("-"))
+    end = tuple(map(int, last.split("-")))
+    labels = []
+    while (year, month) <= end:
+        labels.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return labels
+
+
+def period_totals(by_month: Dict[str, Iterable[float]]) -> Dict[str, Dict]:
+    """
+    Turn {YYYY-MM: (claims, total)} into the summary's monthly and yearly totals.
+
+    Months and years without claims between the first and last one are
+    included with zero totals, as when resampling.
+    """
+    months = sorted(month for month, (count, _) in by_month.items() if count)
+    labels = month_range(months[0], months[-1]) if months else []
+    claims_by_year: Dict[str, Dict[str, Any]] = {}
+    if labels:
+        for year in range(int(labels[0][:4]), int(labels[-1][:4]) + 1):
+            claims_by_year[str(year)] = {"claims": 0, "total_amount": 0.0}
+    for month in months:
+        count, total = by_month[month]
+        claims_by_year[month[:4]]["claims"] += int(count)
+        claims_by_year[month[:4]]["total_amount"] += total
+    for year in claims_by_year.values():
+        year["total_amount"] = round(year["total_amount"], 2)
+    return {
+        "claims_by_month": {label: int(by_month[label][0]) if label in by_month else 0 for label in labels},
+        "amount_by_month": {label: round(by_month[label][1], 2) if label in by_month else 0.0 for label in labels},
+        "claims_by_year": claims_by_year
+    }
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[bytes] = None):
+        """
+        Distinct-count sketch of 2**precision one-byte registers (about 1.6% error at the default precision).
+
+        Sketches of the same precision merge by taking the register-wise maximum,
+        so distinct counts can be combined across documents and workers.
+        """
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add(self, value: Any):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.precision} and {other.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -rank for rank in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * self.size and empty:
+            # Small-range correction (linear counting)
+            estimate = self.size * math.log(self.size / empty)
+        return int(round(estimate))
+
+
+class LossAggregate:
+    def __init__(self):
+        """
+        Mergeable running totals over losses, matching the `Analytics.generate_summary` figures.
+
+        Counts, sums, the zero-amount and undated counts and the per-month,
+        per-policy and per-insured totals are exact and can also be taken back
+        out (`sign=-1`) when a stored claim is revised. Min/max cannot, so they
+        stay at the extremes ever seen until a rebuild; distinct drivers and
+        claims are HyperLogLog estimates.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.zero = 0
+        self.undated = 0
+        self.months: Dict[str, List[float]] = {}
+        self.by_policy: Dict[str, List[float]] = {}
+        self.by_insured: Dict[str, List[float]] = {}
+        self.drivers = HyperLogLog()
+        self.claims = HyperLogLog()
+
+    @staticmethod
+    def _bump(groups: Dict[str, List[float]], key: str, sign: int, amount: float):
+        totals = groups.setdefault(key, [0, 0.0])
+        totals[0] += sign
+        totals[1] += sign * amount
+
+    def add(self, policy_number: str, insured_name: str, claim_number: str, loss_date: Optional[str],
+            amount: Optional[float], description: Optional[str], sign: int = 1):
+        """
+        Count one loss (already parsed: `loss_date` as 'YYYY-MM-DD' or None), or take it back out with `sign=-1`.
+        """
+        amount = amount or 0.0
+        self.count += sign
+        self.total += sign * amount
+        if amount == 0:
+            self.zero += sign
+        if loss_date is None:
+            self.undated += sign
+        else:
+            self._bump(self.months, loss_date[:7], sign, amount)
+        self._bump(self.by_policy, policy_number, sign, amount)
+        self._bump(self.by_insured, insured_name, sign, amount)
+        if sign > 0:
+            self.min = amount if self.min is None else min(self.min, amount)
+            self.max = amount if self.max is None else max(self.max, amount)
+            self.drivers.add(description)
+            self.claims.add(f"{policy_number}\x1f{claim_number}")
+
+    def add_document(self, data: Dict[str, Any]):
+        """
+        Count every loss of one extracted document, parsing its amounts and dates.
+        """
+        policy_number = data.get("policy_number") or ""
+        insured_name = data.get("insured_name") or ""
+        for loss in data.get("losses", []):
+            loss_date = parse_date(loss.get("date_of_loss"))
+            self.add(loss.get("policy_number") or policy_number, insured_name, str(loss.get("claim_number")),
+                     loss_date.date().isoformat() if loss_date else None,
+                     parse_amount(loss.get("amount")), loss.get("description"))
+
+    def merge(self, other: "LossAggregate") -> "LossAggregate":
+        self.count += other.count
+        self.total += other.total
+        for bound, pick in (("min", min), ("max", max)):
+            values = [value for value in (getattr(self, bound), getattr(other, bound)) if value is not None]
+            setattr(self, bound, pick(values) if values else None)
+        self.zero += other.zero
+        self.undated += other.undated
+        for groups, others in ((self.months, other.months), (self.by_policy, other.by_policy),
+                               (self.by_insured, other.by_insured)):
+            for key, (count, total) in others.items():
+                totals = groups.setdefault(key, [0, 0.0])
+                totals[0] += count
+                totals[1] += total
+        self.drivers.merge(other.drivers)
+        self.claims.merge(other.claims)
+        return self
+
+    @staticmethod
+    def _group_summary(groups: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"claims": int(count), "total_amount": round(total, 2), "average_amount": round(total / count, 2)}
+            for key, (count, total) in sorted(groups.items()) if count
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Return the totals in the shape of `Analytics.generate_summary`, plus `unique_claims`.
+        """
+        summary = {
+            "total_claims": self.count,
+            "total_amount": self.total,
+            "average_amount": self.total / self.count if self.count else float("nan"),
+            "max_amount": self.max if self.max is not None else float("nan"),
+            "min_amount": self.min if self.min is not None else float("nan"),
+            "zero_amount_claims": self.zero,
+            "unique_drivers": self.drivers.count(),
+            "unique_claims": self.claims.count(),
+            "undated_claims": self.undated
+        }
+        summary.update(period_totals(self.months))
+        summary["by_policy"] = self._group_summary(self.by_policy)
+        summary["by_insured"] = self._group_summary(self.by_insured)
+        return summary
@@ -1,32 +1,244 @@
 import pandas as pd
 import logging
 import json
-from typing import Dict, Any, Optional
+import glob
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Any, Iterator, List, Optional
 import os
 
+import numpy as np
+
+from src.aggregates import LossAggregate
+from src.validation import DATE_FORMATS
+
+_AMOUNT_NOISE = r'[()$,\s]|US\$|USD'
+
+
+def _parse_unique(values: pd.Series, parse, missing) -> pd.Series:
+    """
+    Apply a vectorized parser to the distinct values of a column only and map the results back.
+
+    Loss runs repeat the same dates and round amounts many times, so this
+    keeps the string work proportional to the number of distinct values.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object).astype(str)).to_numpy()
+    return pd.Series(np.append(parsed, missing)[codes], index=values.index)
+
+
+def _parse_amount_text(text: pd.Series) -> pd.Series:
+    # Common case first: '$1,500.00' or '1500'; the rest goes through the full clean-up
+    values = pd.to_numeric(
+        text.str.replace('$', '', regex=False).str.replace(',', '', regex=False), errors='coerce'
+    ).astype(float)
+    odd = values.isna()
+    if odd.any():
+        rest = text[odd].str.strip()
+        negative = rest.str.startswith("(") & rest.str.endswith(")")
+        cleaned = pd.to_numeric(rest.str.replace(_AMOUNT_NOISE, "", regex=True), errors='coerce').astype(float)
+        values[odd] = cleaned.where(~negative, -cleaned)
+    return values
+
+
+def _parse_date_text(text: pd.Series) -> pd.Series:
+    text = text.str.strip()
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def parse_amounts(amounts: pd.Series) -> pd.Series:
+    """
+    Vectorized `validation.parse_amount`: '$1,500.00', '(250.00)', '1,500 USD' or numbers to floats, NaN otherwise.
+    """
+    if pd.api.types.is_numeric_dtype(amounts):
+        return amounts.astype(float)
+    return _parse_unique(amounts, _parse_amount_text, np.nan).astype(float)
+
+
+def parse_dates(dates: pd.Series) -> pd.Series:
+    """
+    Vectorized `validation.parse_date`: each value is parsed with the first of DATE_FORMATS that matches, NaT otherwise.
+    """
+    return _parse_unique(dates, _parse_date_text, np.datetime64('NaT', 'ns')).astype("datetime64[ns]")
+
+
+def _group_totals(df: pd.DataFrame, column: str) -> Dict[str, Dict[str, Any]]:
+    grouped = df.groupby(column, sort=True)['amount_numeric'].agg(
+        claims='count', total_amount='sum', average_amount='mean'
+    ).round(2)
+    grouped.index = grouped.index.astype(str)
+    return grouped.to_dict('index')
+
+
+def _period_totals(daily: pd.DataFrame, rule: str, label: str) -> Dict[str, Dict[str, Any]]:
+    resampled = daily.resample(rule).sum().round(2)
+    resampled.index = resampled.index.strftime(label)
+    return resampled.to_dict('index')
+
+def iter_output_files(source: str) -> Iterator[str]:
+    """
+    Lazily list the JSON outputs under a directory (recursively), or matching a glob pattern.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+    else:
+        yield from glob.iglob(source, recursive=True)
+
+
+def aggregate_files(paths: List[str]) -> Dict[str, Any]:
+    """
+    Process-pool worker: fold a batch of extraction outputs into one partial aggregate.
+
+    Files are read one at a time, so memory is bounded by the largest file.
+    JSON files that are not extractions (e.g. cost reports) are skipped.
+    """
+    aggregate = LossAggregate()
+    result = {"files": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            result["bytes"] += os.path.getsize(path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to read {path}: {e}")
+            result["failed"] += 1
+            continue
+        if not isinstance(data, dict) or not isinstance(data.get("losses"), list):
+            result["skipped"] += 1
+            continue
+        aggregate.add_document(data)
+        result["files"] += 1
+    result["aggregate"] = aggregate
+    return result
+
+
+def archive_summary(source: str, workers: Optional[int] = None, batch_size: int = 500,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Summarize every extraction output in a directory or glob without loading them together.
+
+    Paths are listed lazily and sent to a process pool in batches of
+    `batch_size` files, at most two batches per worker in flight. Each batch
+    comes back as a partial `LossAggregate` and is merged straight away, so
+    peak memory does not grow with the archive. Claims repeated across
+    editions are counted once per file; `unique_claims` estimates the
+    distinct ones.
+
+    Args:
+        source (str): Directory (searched recursively for *.json) or glob pattern.
+        workers (int): Worker processes (default: CPU count).
+        batch_size (int): Files per worker task.
+        progress (callable): Called with the running stats after each batch.
+
+    Returns:
+        dict: {"summary": LossAggregate summary, "stats": file, claim and throughput counts}.
+    """
+    started = time.monotonic()
+    aggregate = LossAggregate()
+    stats = {"files": 0, "skipped": 0, "failed": 0, "bytes": 0, "batches": 0,
+             "claims": 0, "elapsed": 0.0, "files_per_sec": 0.0, "mb_per_sec": 0.0}
+
+    def record(result):
+        aggregate.merge(result.pop("aggregate"))
+        for key, value in result.items():
+            stats[key] += value
+        stats["batches"] += 1
+        elapsed = time.monotonic() - started
+        stats.update(
+            claims=aggregate.count,
+            elapsed=round(elapsed, 2),
+            files_per_sec=round(stats["files"] / elapsed, 1) if elapsed else 0.0,
+            mb_per_sec=round(stats["bytes"] / 1048576 / elapsed, 2) if elapsed else 0.0
+        )
+        if progress is not None:
+            progress(dict(stats))
+
+    paths = iter_output_files(source)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        limit = 2 * (workers or os.cpu_count() or 1)
+        while True:
+            batch = [path for _, path in zip(range(batch_size), paths)]
+            if batch:
+                in_flight.add(pool.submit(aggregate_files, batch))
+            if in_flight and (len(in_flight) >= limit or not batch):
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+            if not batch and not in_flight:
+                break
+
+    logging.info(f"Archive analytics over {source}: {stats}")
+    return {"summary": aggregate.summary(), "stats": stats}
+
+
 class Analytics:
-    def __init__(self, data_file: str):
-        """Initialize Analytics with data file path."""
+    def __init__(self, data_file: Optional[str] = None, data: Optional[Dict[str, Any]] = None,
+                 store=None, running: bool = False, workers: Optional[int] = None, batch_size: int = 500,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None, **filters):
+        """
+        Initialize Analytics with a data file path, with extracted data already in memory,
+        or with a `LossStore` to summarize across documents.
+
+        With a store, `filters` (policy_number, date_from, date_to) narrow the
+        losses and `run` computes the summary in SQL rather than in pandas.
+        With `running`, `run` reads the store's running aggregates instead,
+        without touching the losses (distinct counts are estimates).
+
+        A `data_file` that is a directory or glob pattern is summarized out of
+        core with `archive_summary` (`workers`, `batch_size`, `progress`); its
+        file and throughput counts are left in `archive_stats`.
+        """
+        if running and (store is None or filters):
+            raise ValueError("Running aggregates need a loss store and cover every stored loss (no filters)")
         self.data_file = data_file
-        logging.info(f"Analytics initialized with data file: {data_file}")
+        self.data = data
+        self.store = store
+        self.running = running
+        self.filters = filters
+        self.workers = workers
+        self.batch_size = batch_size
+        self.progress = progress
+        self.archive_stats: Optional[Dict[str, Any]] = None
+        source = 'loss store' if store is not None else data_file if data is None else '(in memory)'
+        logging.info(f"Analytics initialized with data file: {source}")
+
+    def is_archive(self) -> bool:
+        """Whether `data_file` names a directory or glob of outputs rather than one file."""
+        return bool(self.data_file) and self.data is None and self.store is None and (
+            os.path.isdir(self.data_file) or any(char in self.data_file for char in "*?[")
+        )
 
     def load_data(self) -> pd.DataFrame:
-        """Load and preprocess data from JSON file."""
+        """Load and preprocess data from memory, the loss store or the JSON file."""
         try:
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
+            if self.store is not None:
+                df = self.store.frame(**self.filters)
+                logging.info("Loaded data from loss store into Pandas DataFrame.")
+                return df
+            if self.data is not None:
+                data = self.data
+            else:
+                with open(self.data_file, 'r') as f:
+                    data = json.load(f)
             
             # Flatten the JSON structure
-            flattened_data = []
-            for loss in data.get('losses', []):
-                loss_data = {
-                    'policy_number': data.get('policy_number', ''),
-                    'insured_name': data.get('insured_name', ''),
-                    **loss
-                }
-                flattened_data.append(loss_data)
-            
-            df = pd.DataFrame(flattened_data)
+            df = pd.DataFrame(data.get('losses', []))
+            df.insert(0, 'insured_name', data.get('insured_name', ''))
+            # Losses of a second policy in the same document carry their own policy number
+            policies = df.pop('policy_number').replace('', None) if 'policy_number' in df else None
+            df.insert(0, 'policy_number', data.get('policy_number', '') if policies is None
+                      else policies.fillna(data.get('policy_number', '')))
             logging.info("Loaded data into Pandas DataFrame.")
             return df
             
@@ -47,20 +259,37 @@ class Analytics:
             return 0.0
 
     def generate_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Generate analytics summary with proper data type handling."""
+        """
+        Generate analytics summary with proper data type handling.
+
+        Amounts and dates of loss are parsed column-wise (unparseable amounts
+        count as 0.0; unparseable dates are left out of the period totals).
+        Claims are totalled per calendar month and year, and per policy and
+        insured.
+        """
         try:
-            # Convert amount column to numeric values
-            df['amount_numeric'] = df['amount'].apply(self.clean_amount)
+            # Convert amount and date columns to numeric and datetime values
+            df['amount_numeric'] = parse_amounts(df['amount']).fillna(0.0)
+            df['loss_date'] = parse_dates(df['date_of_loss'])
+            dated = df['loss_date'].notna()
+            # Totals per day first, so resampling works on days rather than claims
+            daily = df.loc[dated].groupby('loss_date')['amount_numeric'].agg(claims='count', total_amount='sum')
+            monthly = _period_totals(daily, 'MS', '%Y-%m')
             
             summary = {
                 'total_claims': len(df),
-                'total_amount': df['amount_numeric'].sum(),
-                'average_amount': df['amount_numeric'].mean(),
-                'max_amount': df['amount_numeric'].max(),
-                'min_amount': df['amount_numeric'].min(),
-                'zero_amount_claims': len(df[df['amount_numeric'] == 0]),
-                'unique_drivers': len(df['description'].unique()),
-                'claims_by_month': df['date_of_loss'].value_counts().to_dict()
+                'total_amount': float(df['amount_numeric'].sum()),
+                'average_amount': float(df['amount_numeric'].mean()),
+                'max_amount': float(df['amount_numeric'].max()),
+                'min_amount': float(df['amount_numeric'].min()),
+                'zero_amount_claims': int((df['amount_numeric'] == 0).sum()),
+                'unique_drivers': int(df['description'].nunique(dropna=False)),
+                'undated_claims': int((~dated).sum()),
+                'claims_by_month': {month: totals['claims'] for month, totals in monthly.items()},
+                'amount_by_month': {month: totals['total_amount'] for month, totals in monthly.items()},
+                'claims_by_year': _period_totals(daily, 'YS', '%Y'),
+                'by_policy': _group_totals(df, 'policy_number'),
+                'by_insured': _group_totals(df, 'insured_name')
             }
             
             logging.info("Generated analytics summary successfully")
@@ -93,8 +322,15 @@ class Analytics:
     def run(self) -> Optional[Dict[str, Any]]:
         """Run the analytics pipeline with error handling."""
         try:
-            df = self.load_data()
-            summary = self.generate_summary(df)
+            if self.is_archive():
+                result = archive_summary(self.data_file, self.workers, self.batch_size, self.progress)
+                summary, self.archive_stats = result["summary"], result["stats"]
+            elif self.running:
+                summary = self.store.running_aggregate().summary()
+            elif self.store is not None:
+                summary = self.store.summary(**self.filters)
+            else:
+                summary = self.generate_summary(self.load_data())
             logging.info("Analytics pipeline completed successfully")
             return summary
             
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from src.pdf_parser import PDFParser, file_document_id
+from src.transformer import Transformer
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/batch_processor.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+def make_custom_id(document_id: str, chunk_index: int) -> str:
+    return f"{document_id}-{chunk_index:05d}"
+
+
+def split_custom_id(custom_id: str):
+    document_id, chunk_index = custom_id.rsplit("-", 1)
+    return document_id, int(chunk_index)
+
+
+class BatchProcessor:
+    def __init__(self, processor, output_dir="data/output", loss_store=None):
+        """
+        Initialize BatchProcessor for offline OpenAI Batch API runs.
+
+        Args:
+            processor (DataProcessor): Supplies chunking, prompts, JSON repair and merging.
+            output_dir (str): Directory for per-document outputs produced on ingest.
+            loss_store (LossStore): Store ingested documents are upserted into, if any.
+        """
+        self.processor = processor
+        self.output_dir = output_dir
+        self.loss_store = loss_store
+        logging.info(f"BatchProcessor initialized with output directory: {self.output_dir}")
+
+    @staticmethod
+    def manifest_path_for(requests_path: str) -> str:
+        return os.path.splitext(requests_path)[0] + ".manifest.json"
+
+    def write_requests(self, pdf_paths: List[str], requests_path: str) -> str:
+        """
+        Write one Batch API request line per chunk of every PDF.
+
+        A manifest mapping document IDs to source files is written next to the
+        requests file so results can be routed back to their documents.
+
+        Returns:
+            str: Path of the manifest file.
+        """
+        try:
+            os.makedirs(os.path.dirname(requests_path) or ".", exist_ok=True)
+            manifest = {}
+            request_count = 0
+            with open(requests_path, 'w') as f:
+                for pdf_path in pdf_paths:
+                    document_id = file_document_id(pdf_path)
+                    if document_id in manifest:
+                        logging.info(f"Skipping duplicate document {pdf_path} ({document_id})")
+                        continue
+                    text = PDFParser(pdf_path).extract_text()
+                    chunks, selected = self.processor.prepare_chunks(text)
+                    for idx, chunk in selected:
+                        line = {
+                            "custom_id": make_custom_id(document_id, idx),
+                            "method": "POST",
+                            "url": BATCH_ENDPOINT,
+                            "body": self.processor.build_request_body(chunk)
+                        }
+                        f.write(json.dumps(line) + "\n")
+                    manifest[document_id] = {"source": pdf_path, "chunks": [idx for idx, _ in selected]}
+                    request_count += len(selected)
+
+            manifest_path = self.manifest_path_for(requests_path)
+            with open(manifest_path, 'w') as f:
+                json.dump(manifest, f, indent=4)
+            logging.info(
+                f"Wrote {request_count} batch requests for {len(manifest)} document(s) to {requests_path}"
+            )
+            return manifest_path
+        except Exception as e:
+            logging.error(f"Failed to write batch requests: {e}")
+            raise e
+
+    def _read_results(self, results_path: str) -> Dict[str, Dict[int, Optional[Dict]]]:
+        """
+        Parse a Batch API results file into {document_id: {chunk_index: chunk_data}}.
+        """
+        results = defaultdict(dict)
+        with open(results_path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    document_id, chunk_index = split_custom_id(record["custom_id"])
+                except (ValueError, KeyError, TypeError) as e:
+                    # Without a custom ID the chunk stays missing and is reported on ingest
+                    logging.error(f"Skipping unreadable batch result on line {line_number}: {e}")
+                    continue
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code", 200) != 200:
+                    logging.error(f"Batch request {record['custom_id']} failed: {record.get('error') or response}")
+                    results[document_id][chunk_index] = None
+                    continue
+                try:
+                    raw_result = response["body"]["choices"][0]["message"]["content"]
+                except (KeyError, IndexError, TypeError) as e:
+                    logging.error(f"Batch request {record['custom_id']} has a malformed response body "
+                                  f"(line {line_number}): {e!r}")
+                    results[document_id][chunk_index] = None
+                    continue
+                chunk_data = self.processor.parse_completion(raw_result, chunk_index)
+                if chunk_data is None:
+                    logging.error(f"Batch request {record['custom_id']} returned invalid JSON (line {line_number})")
+                results[document_id][chunk_index] = chunk_data
+        return results
+
+    def ingest_results(self, results_path: str, manifest_path: str) -> Dict[str, Dict]:
+        """
+        Merge Batch API results back into per-document outputs.
+
+        Chunks are merged in chunk order; each document is written as
+        `<document ID>.json` and `<document ID>.md` in the output directory,
+        so same-named PDFs from different folders do not overwrite each
+        other, and upserted into the loss store when one is set.
+
+        Returns:
+            dict: Merged data keyed by document ID.
+        """
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+
+            results = self._read_results(results_path)
+            transformer = Transformer(self.output_dir)
+            documents = {}
+            for document_id, entry in manifest.items():
+                chunk_results = results.get(document_id, {})
+                missing = [i for i in entry["chunks"] if chunk_results.get(i) is None]
+                if missing:
+                    logging.warning(f"Document {entry['source']} is missing chunk(s) {missing}")
+                processed_chunks = [chunk_results[i] for i in sorted(chunk_results) if chunk_results[i]]
+                if entry["chunks"] and not processed_chunks:
+                    logging.error(f"No chunks were successfully processed for {entry['source']}")
+                    continue
+
+                merged = self.processor.merge_chunks(processed_chunks)
+                transformer.save_json(merged, f"{document_id}.json")
+                transformer.generate_markdown(merged, f"{document_id}.md")
+                if self.loss_store is not None:
+                    self.loss_store.upsert_document(document_id, merged, entry["source"])
+                documents[document_id] = merged
+
+            logging.info(f"Ingested batch results for {len(documents)}/{len(manifest)} document(s)")
+            return documents
+        except Exception as e:
+            logging.error(f"Failed to ingest batch results: {e}")
+            raise e
@@ -0,0 +1,159 @@
+import logging
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from src.pdf_parser import PAGE_BREAK
+from src.relevance import AMOUNT, CLAIM_NUMBER, DATE, POLICY_HEADER
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/compressor.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+SEPARATOR_LINE = re.compile(r'^[\s\-=_*.~|+#]{3,}$')
+SEPARATOR_RUN = re.compile(r'([\-=_*.~#])\1{2,}')
+WHITESPACE_RUN = re.compile(r'[ \t ]+')
+PAGE_NUMBER = re.compile(r'^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+)$', re.I)
+BARE_NUMBER = re.compile(r'^\d{1,4}$')
+
+
+class PromptCompressor:
+    def __init__(self, token_counter, context_lines=4, edge_lines=3):
+        """
+        Shrink chunk text before it is placed in the prompt.
+
+        Args:
+            token_counter: Object with a `count(text)` method used for reporting.
+            context_lines (int): Lines kept on either side of a candidate line, so
+                multi-line descriptions next to a claim row survive.
+            edge_lines (int): Lines at the top and bottom of each page checked for
+                repeated headers and footers.
+        """
+        self.token_counter = token_counter
+        self.context_lines = context_lines
+        self.edge_lines = edge_lines
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._lock = threading.Lock()
+
+    def _edge_lines(self, lines: List[str]) -> Dict[int, str]:
+        """
+        Map the index of each line within `edge_lines` non-blank lines of the top
+        or bottom of a page to its whitespace-normalized text.
+
+        Lines that are just an amount are left out: a cell like "$0.00" can sit
+        at a page edge on many pages and is claim data, not furniture. So are
+        bare numbers other than the very first or last line, which may be
+        numeric claim numbers rather than page numbers.
+        """
+        keys = [(i, WHITESPACE_RUN.sub(" ", line).strip()) for i, line in enumerate(lines)]
+        keys = [(i, key) for i, key in keys if key]
+        outermost = {keys[0][0], keys[-1][0]} if keys else set()
+        return {
+            i: key for i, key in keys[:self.edge_lines] + keys[-self.edge_lines:]
+            if not AMOUNT.fullmatch(key) and (i in outermost or not BARE_NUMBER.match(key))
+        }
+
+    @staticmethod
+    def _is_page_number(key: str) -> bool:
+        return bool(PAGE_NUMBER.match(key) or BARE_NUMBER.match(key))
+
+    def strip_page_furniture(self, text: str) -> str:
+        """
+        Remove page headers and footers repeated across pages, keeping the first occurrence.
+
+        Same rule as `iter_strip_page_furniture`, applied to the pages of `text`.
+        """
+        return PAGE_BREAK.join(self.iter_strip_page_furniture(text.split(PAGE_BREAK)))
+
+    def iter_strip_page_furniture(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Remove page headers and footers from pages that arrive one at a time.
+
+        Only lines within `edge_lines` of the top or bottom of a page are
+        considered. Such a line is dropped when it is a page number or when the
+        same text already sat at the edge of an earlier page, so the first
+        occurrence is kept; copies of the same text in the body of a page are
+        always kept.
+        """
+        seen = set()
+        for page in pages:
+            lines = page.splitlines(keepends=True)
+            edge = self._edge_lines(lines)
+            kept = [
+                line for i, line in enumerate(lines)
+                if i not in edge or not (self._is_page_number(edge[i]) or edge[i] in seen)
+            ]
+            seen.update(edge.values())
+            yield "".join(kept)
+
+    @staticmethod
+    def is_candidate(line: str) -> bool:
+        """
+        True for lines holding claim numbers, dates, amounts or policy/insured headers.
+        """
+        return bool(
+            CLAIM_NUMBER.search(line) or DATE.search(line) or AMOUNT.search(line) or POLICY_HEADER.search(line)
+        )
+
+    def compress(self, chunk: str, record: bool = True) -> Tuple[str, Dict[str, int]]:
+        """
+        Compact a chunk to its candidate lines plus nearby context.
+
+        Whitespace runs are collapsed, separator lines dropped and inline
+        separator runs shortened. Lines further than `context_lines` from any
+        candidate line are removed; wherever lines were removed, the next kept
+        block is prefixed with an `@L<n>` anchor giving its original line number.
+
+        With `record=False` the running totals in `stats` are left untouched.
+
+        Returns:
+            tuple: (compacted text, {"tokens_before": ..., "tokens_after": ...})
+        """
+        lines = []
+        for number, raw in enumerate(chunk.splitlines(), 1):
+            line = WHITESPACE_RUN.sub(" ", raw).strip()
+            if not line or SEPARATOR_LINE.match(line):
+                continue
+            lines.append((number, SEPARATOR_RUN.sub(r'\1', line)))
+
+        candidates = [i for i, (_, line) in enumerate(lines) if self.is_candidate(line)]
+        keep = set()
+        for i in candidates:
+            keep.update(range(max(0, i - self.context_lines), min(len(lines), i + self.context_lines + 1)))
+
+        output: List[str] = []
+        previous = -1
+        for i in sorted(keep):
+            number, line = lines[i]
+            if i != previous + 1:
+                line = f"@L{number} {line}"
+            output.append(line)
+            previous = i
+        compacted = "\n".join(output) + ("\n" if output else "")
+
+        stats = {
+            "tokens_before": self.token_counter.count(chunk),
+            "tokens_after": self.token_counter.count(compacted)
+        }
+        if stats["tokens_after"] >= stats["tokens_before"]:
+            compacted = chunk
+            stats["tokens_after"] = stats["tokens_before"]
+        if not record:
+            return compacted, stats
+        with self._lock:
+            self.tokens_before += stats["tokens_before"]
+            self.tokens_after += stats["tokens_after"]
+        return compacted, stats
+
+    def stats(self) -> Dict[str, float]:
+        saved = self.tokens_before - self.tokens_after
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": saved,
+            "savings_rate": round(saved / self.tokens_before, 4) if self.tokens_before else 0.0
+        }
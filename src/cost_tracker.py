@@ -1,6 +1,8 @@
 import json
 import logging
+import math
 import os
+from typing import Dict, List, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -9,21 +11,75 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# USD per 1k tokens (prompt, completion). Models are matched on the longest
+# prefix, so dated snapshots such as gpt-4-0613 use their family's price.
+MODEL_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4-1106-preview": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0015, 0.002),
+}
+DEFAULT_MODEL = "gpt-4"
+
+
+def price_for(model: Optional[str], pricing: Optional[Dict[str, tuple]] = None) -> tuple:
+    """
+    Return (prompt, completion) USD per 1k tokens for a model, falling back to gpt-4 prices.
+    """
+    pricing = pricing or MODEL_PRICING
+    matches = [name for name in pricing if model and model.startswith(name)]
+    if not matches:
+        if model:
+            logging.warning(f"No pricing for model {model}; using {DEFAULT_MODEL} prices")
+        return pricing.get(DEFAULT_MODEL, MODEL_PRICING[DEFAULT_MODEL])
+    return pricing[max(matches, key=len)]
+
+
+def price_usage(model: Optional[str], prompt_tokens: int, completion_tokens: int,
+                pricing: Optional[Dict[str, tuple]] = None) -> float:
+    """
+    Cost in USD of one call's prompt and completion tokens.
+    """
+    prompt_price, completion_price = price_for(model, pricing)
+    return (prompt_tokens / 1000) * prompt_price + (completion_tokens / 1000) * completion_price
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of values (0.0 for an empty list).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
 class CostTracker:
-    def __init__(self, output_dir="data/output"):
+    def __init__(self, output_dir="data/output", pricing=None):
         """
         Initialize CostTracker with output directory.
+
+        Args:
+            output_dir (str): Directory the cost reports are written to.
+            pricing (dict): Model name -> (prompt, completion) USD per 1k tokens;
+                defaults to MODEL_PRICING.
         """
         self.output_dir = output_dir
+        self.pricing = pricing or MODEL_PRICING
         os.makedirs(self.output_dir, exist_ok=True)
         logging.info(f"CostTracker initialized with output directory: {self.output_dir}")
 
-    def calculate_cost(self, usage):
+    def calculate_cost(self, usage, model=None):
         """
         Calculate API cost based on token usage.
         
         Args:
             usage (dict): Token usage data from OpenAI API response.
+            model (str): Model whose prices apply (defaults to gpt-4 prices).
         
         Returns:
             dict: Cost details including token breakdown and total cost.
@@ -33,9 +89,7 @@ class CostTracker:
             completion_tokens = usage.get('completion_tokens', 0)
             total_tokens = usage.get('total_tokens', 0)
             
-            # Example pricing per 1k tokens
-            prompt_cost_per_1k = 0.03  # Adjust based on actual pricing
-            completion_cost_per_1k = 0.06
+            prompt_cost_per_1k, completion_cost_per_1k = price_for(model, self.pricing)
             
             prompt_cost = (prompt_tokens / 1000) * prompt_cost_per_1k
             completion_cost = (completion_tokens / 1000) * completion_cost_per_1k
@@ -83,6 +137,148 @@ class CostTracker:
             logging.error(f"Failed to save API cost report: {e}")
             raise e
 
+    def summarize_document(self, document, usage, pages=0, claims=0):
+        """
+        Aggregate per-chunk usage records for one document.
+
+        Args:
+            document (str): Document name used in the report.
+            usage (list): Usage records returned by `DataProcessor.process_text(..., return_usage=True)`.
+            pages (int): Page count, for tokens per page.
+            claims (int): Extracted claim count, for cost per claim.
+
+        Returns:
+            dict: Token, cost, retry and cache totals plus per-call latencies.
+        """
+        tiers = [tier for record in usage for tier in record.get("tiers", [])]
+        billed = [tier for tier in tiers if not tier.get("cached")]
+        # A packed request's share on the documents other than the first carries
+        # tokens and cost but is not another call (see `RequestPacker`)
+        calls = [tier for tier in tiers if not tier.get("shared")]
+        api_calls = [tier for tier in calls if not tier.get("cached")]
+        prompt_tokens = sum(tier.get("prompt_tokens", 0) for tier in billed)
+        completion_tokens = sum(tier.get("completion_tokens", 0) for tier in billed)
+        cost = sum(
+            price_usage(tier.get("model"), tier.get("prompt_tokens", 0), tier.get("completion_tokens", 0), self.pricing)
+            for tier in billed
+        )
+        total_tokens = prompt_tokens + completion_tokens
+        return {
+            "document": document,
+            "pages": pages,
+            "claims": claims,
+            "chunks": len(usage),
+            "api_calls": len(api_calls),
+            "cached_calls": len(calls) - len(api_calls),
+            "retries": sum(tier.get("retries", 0) for tier in calls),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "total_cost": round(cost, 4),
+            "tokens_per_page": round(total_tokens / pages, 1) if pages else 0.0,
+            "cost_per_claim": round(cost / claims, 4) if claims else 0.0,
+            "latencies": [tier.get("latency", 0.0) for tier in api_calls]
+        }
+
+    @staticmethod
+    def _latency_summary(latencies):
+        return {
+            "latency_p50": round(percentile(latencies, 50), 3),
+            "latency_p95": round(percentile(latencies, 95), 3),
+            "latency_p99": round(percentile(latencies, 99), 3)
+        }
+
+    def build_run_report(self, documents):
+        """
+        Combine per-document summaries (from `summarize_document`) into a run report.
+
+        Latency percentiles are over individual API calls; cache hits are excluded.
+        """
+        rows = []
+        latencies = []
+        for summary in documents:
+            latencies.extend(summary["latencies"])
+            row = {key: value for key, value in summary.items() if key != "latencies"}
+            row.update(self._latency_summary(summary["latencies"]))
+            rows.append(row)
+
+        totals = {key: sum(row[key] for row in rows) for key in (
+            "pages", "claims", "chunks", "api_calls", "cached_calls", "retries",
+            "prompt_tokens", "completion_tokens", "total_tokens"
+        )}
+        totals["total_cost"] = round(sum(row["total_cost"] for row in rows), 4)
+        totals["tokens_per_page"] = round(totals["total_tokens"] / totals["pages"], 1) if totals["pages"] else 0.0
+        totals["cost_per_claim"] = round(totals["total_cost"] / totals["claims"], 4) if totals["claims"] else 0.0
+        totals.update(self._latency_summary(latencies))
+        return {
+            # Top-level token and cost fields keep the single-usage report layout
+            "prompt_tokens": totals["prompt_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+            "total_tokens": totals["total_tokens"],
+            "total_cost": totals["total_cost"],
+            "run": totals,
+            "documents": rows
+        }
+
+    def save_run_report(self, report):
+        """
+        Save a run report in JSON and Markdown formats, most expensive documents first.
+        """
+        try:
+            json_path = os.path.join(self.output_dir, "api_cost_report.json")
+            with open(json_path, 'w') as file:
+                json.dump(report, file, indent=4)
+            logging.info(f"API cost data saved in JSON at {json_path}")
+
+            run = report["run"]
+            md_path = os.path.join(self.output_dir, "api_cost_report.md")
+            with open(md_path, 'w') as file:
+                file.write("# API Cost Report\n\n")
+                file.write(f"**Documents:** {len(report['documents'])}\n")
+                file.write(f"**API Calls:** {run['api_calls']} ({run['cached_calls']} cached, {run['retries']} retries)\n")
+                file.write(f"**Prompt Tokens:** {run['prompt_tokens']}\n")
+                file.write(f"**Completion Tokens:** {run['completion_tokens']}\n")
+                file.write(f"**Total Tokens:** {run['total_tokens']}\n")
+                file.write(f"**Total Cost:** ${run['total_cost']:.4f}\n")
+                file.write(f"**Tokens per Page:** {run['tokens_per_page']}\n")
+                file.write(f"**Cost per Claim:** ${run['cost_per_claim']:.4f}\n")
+                file.write(
+                    f"**Call Latency p50/p95/p99:** {run['latency_p50']:.2f}s / "
+                    f"{run['latency_p95']:.2f}s / {run['latency_p99']:.2f}s\n\n"
+                )
+                file.write("## Documents\n\n")
+                file.write("| Document | Pages | Claims | Tokens | Cost | Tokens/Page | Cost/Claim | p50 | p95 | p99 |\n")
+                file.write("|---|---|---|---|---|---|---|---|---|---|\n")
+                for row in sorted(report["documents"], key=lambda r: r["total_cost"], reverse=True):
+                    file.write(
+                        f"| {row['document']} | {row['pages']} | {row['claims']} | {row['total_tokens']} "
+                        f"| ${row['total_cost']:.4f} | {row['tokens_per_page']} | ${row['cost_per_claim']:.4f} "
+                        f"| {row['latency_p50']:.2f}s | {row['latency_p95']:.2f}s | {row['latency_p99']:.2f}s |\n"
+                    )
+            logging.info(f"API cost data saved in Markdown at {md_path}")
+        except Exception as e:
+            logging.error(f"Failed to save API cost report: {e}")
+            raise e
+
+    def run_documents(self, documents):
+        """
+        Execute the cost tracking pipeline for a run of one or more documents.
+
+        Args:
+            documents (list): Per-document summaries from `summarize_document`.
+
+        Returns:
+            dict: The run report.
+        """
+        try:
+            report = self.build_run_report(documents)
+            self.save_run_report(report)
+            logging.info(f"Cost tracking completed for {len(documents)} document(s).")
+            return report
+        except Exception as e:
+            logging.error(f"Cost tracking pipeline failed: {e}")
+            raise e
+
     def run(self, usage):
         """
         Execute the cost tracking pipeline.
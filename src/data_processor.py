@@ -2,7 +2,25 @@ import openai
 import logging
 import json
 import os
-from typing import List, Dict, Any, Optional
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from src.compressor import PromptCompressor
+from src.cost_tracker import price_usage
+from src.json_repair import recover_json
+from src.job_journal import JobJournal, chunk_key
+from src.json_stream import IncrementalLossParser
+from src.llm_backend import LLMBackend, create_backend
+from src.llm_cache import ResponseCache, make_cache_key
+from src.pdf_parser import PAGE_BREAK
+from src.rate_limiter import RateLimiter
+from src.relevance import RECORD_START, RelevanceFilter
+from src.tokenizer import count_message_tokens, get_context_window, get_token_counter
+from src.validation import validate_extraction
 
 # Configure logging
 logging.basicConfig(
@@ -11,51 +29,252 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class DataProcessor:
+SYSTEM_MESSAGE = "You are an insurance loss report processor that must always return valid JSON."
+JSON_ONLY_INSTRUCTION = (
+    "\nIMPORTANT: Return ONLY valid JSON data. If there's not enough information, return an empty JSON structure."
+)
+# What `amount` means; the layout templates (src/layout_extractor.py) fill it the same way
+AMOUNT_INSTRUCTION = (
+    "For each loss, \"amount\" is the indemnity (loss) paid to date as printed, not reserves or expenses; "
+    "if the report shows a single amount per claim, use that amount.\n"
+)
+
+
+class ChunkMerger:
+    """
+    Incremental form of `DataProcessor.merge_chunks`.
+
+    Headers and losses can be added one at a time, from several threads, as
+    they arrive; duplicate claim numbers are dropped on the way in.
+
+    Chunks added with `add_chunk` are taken to be in document order. A loss
+    belongs to its chunk's policy, or the last policy stated before it; when
+    that differs from the document's (first) policy the loss is tagged with
+    its own `policy_number`, and claims are only duplicates within a policy.
+    """
+
     def __init__(self):
+        self.merged = {
+            "policy_number": "",
+            "insured_name": "",
+            "losses": []
+        }
+        self.seen_claims = set()
+        self.current_policy = ""
+        self._lock = threading.Lock()
+
+    def add_header(self, chunk: Dict):
+        with self._lock:
+            if chunk.get("policy_number") and not self.merged["policy_number"]:
+                self.merged["policy_number"] = chunk["policy_number"]
+            if chunk.get("insured_name") and not self.merged["insured_name"]:
+                self.merged["insured_name"] = chunk["insured_name"]
+
+    def add_loss(self, loss: Dict, policy_number: str = "") -> bool:
+        """
+        Add a loss of `policy_number` (if known); returns False if it has no claim number or is a duplicate.
+        """
+        claim_number = loss.get("claim_number", "")
+        policy_number = loss.get("policy_number") or policy_number
+        with self._lock:
+            # Claims of the document's own policy (or of no stated policy) share one key space
+            other_policy = policy_number if policy_number != self.merged["policy_number"] else ""
+            if not claim_number or (other_policy, claim_number) in self.seen_claims:
+                return False
+            self.seen_claims.add((other_policy, claim_number))
+            if other_policy and not loss.get("policy_number"):
+                loss = dict(loss, policy_number=other_policy)
+            self.merged["losses"].append(loss)
+            return True
+
+    def add_chunk(self, chunk: Dict):
+        self.add_header(chunk)
+        self.current_policy = chunk.get("policy_number") or self.current_policy
+        for loss in chunk.get("losses", []):
+            self.add_loss(loss, self.current_policy)
+
+    def result(self) -> Dict:
+        return self.merged
+
+
+class DataProcessor:
+    def __init__(self, config_path: str = 'config/config.json', backend: Optional[LLMBackend] = None):
         """
         Initialize the DataProcessor with configuration from JSON file.
+
+        Args:
+            config_path (str): Path of the JSON configuration file.
+            backend (LLMBackend): Completion backend to use instead of the one
+                built from the configuration (OpenAI, or `llm_base_url` if set).
         """
         try:
-            config_path = 'config/config.json'
             with open(config_path, 'r') as f:
                 config = json.load(f)
-            openai.api_key = config.get('api_key')
+            api_key = config.get('api_key')
             
-            if not openai.api_key:
+            if not api_key:
                 raise ValueError("OpenAI API key is not set.")
             
+            # Completion backend with a pooled, keep-alive HTTP client
+            self.backend = backend or create_backend(config)
+            
             # Load additional configuration
-            self.chunk_size = config.get('chunk_size', 1500)
             self.max_tokens = config.get('max_tokens', 1500)
             self.temperature = config.get('temperature', 0.2)
             self.model = config.get('model', 'gpt-4')
+            self.stream = config.get('stream', False)
+
+            # Model cascade: cheaper models are tried first and a chunk escalates to
+            # the next tier only when its result fails validation. The configured
+            # model is always the last tier.
+            cascade = config.get('cascade_models') or []
+            self.model_tiers = [m for m in cascade if m != self.model] + [self.model]
+            self.chunk_records: List[Dict[str, Any]] = []
+            self._records_lock = threading.Lock()
+
+            # Token-aware chunking configuration; chunks must fit every tier's window
+            self.token_counter = get_token_counter(self.model, config.get('tokenizer', 'auto'))
+            self.context_window = config.get('context_window') or min(
+                get_context_window(model) for model in self.model_tiers
+            )
+            self.context_fill_ratio = config.get('context_fill_ratio', 0.75)
+            self.chunk_token_limit = config.get('chunk_token_limit')
+
+            # Concurrency, rate limiting and retry configuration
+            self.max_concurrency = max(1, int(config.get('max_concurrency', 4)))
+            self.max_retries = config.get('max_retries', 5)
+            self.retry_base_delay = config.get('retry_base_delay', 1.0)
+            self.retry_max_delay = config.get('retry_max_delay', 30.0)
+            self.rate_limiter = RateLimiter(
+                requests_per_minute=config.get('requests_per_minute'),
+                tokens_per_minute=config.get('tokens_per_minute')
+            )
+
+            # Local relevance pre-filter that skips chunks without claim content
+            self.relevance_filter = None
+            if config.get('relevance_filter', True):
+                self.relevance_filter = RelevanceFilter(
+                    threshold=config.get('relevance_threshold', 3),
+                    audit_path=config.get('relevance_audit_path', 'data/output/skipped_chunks.jsonl')
+                )
+
+            # In-chunk prompt compression
+            self.compressor = None
+            if config.get('prompt_compression', True):
+                self.compressor = PromptCompressor(
+                    self.token_counter,
+                    context_lines=config.get('compression_context_lines', 4)
+                )
+
+            # Response cache (in-memory LRU backed by SQLite)
+            self.cache = None
+            if config.get('cache_enabled', True):
+                self.cache = ResponseCache(
+                    db_path=config.get('cache_path', 'data/cache/llm_cache.sqlite'),
+                    memory_entries=config.get('cache_memory_entries', 1024),
+                    max_entries=config.get('cache_max_entries', 100000),
+                    ttl_seconds=config.get('cache_ttl_seconds', 30 * 24 * 3600)
+                )
             
             logging.info("DataProcessor initialized successfully with configurations.")
         except Exception as e:
             logging.error(f"Initialization failed: {str(e)}")
             raise
 
+    def chunk_token_budget(self) -> int:
+        """
+        Number of text tokens that fit in one request.
+
+        This is the configured fraction of the model's context window minus the
+        fixed prompt overhead and the completion (`max_tokens`) reserve.
+        """
+        overhead = count_message_tokens(self.token_counter, self.build_messages(""))
+        budget = int(self.context_window * self.context_fill_ratio) - overhead - self.max_tokens
+        if self.chunk_token_limit:
+            budget = min(budget, self.chunk_token_limit)
+        return max(budget, 64)
+
+    def _split_long_line(self, line: str, budget: int) -> List[str]:
+        """
+        Split a single line that exceeds the budget at word boundaries.
+        """
+        pieces = []
+        current = ""
+        for word in line.split(" "):
+            candidate = f"{current} {word}" if current else word
+            if current and self.token_counter.count(candidate) > budget:
+                pieces.append(current + "\n")
+                current = word
+            else:
+                current = candidate
+        if current:
+            pieces.append(current if current.endswith("\n") else current + "\n")
+        return pieces
+
     def chunk_text(self, text: str) -> List[str]:
         """
-        Split text into manageable chunks while preserving context.
-        """
-        chunks = []
-        start = 0
-        while start < len(text):
-            # Find a good breaking point
-            end = start + self.chunk_size
-            if end < len(text):
-                # Try to break at a newline
-                next_newline = text.find('\n', end - 100, end + 100)
-                if next_newline != -1:
-                    end = next_newline
-            
-            chunks.append(text[start:end])
-            start = end
-            
+        Pack lines into chunks that fill the per-request token budget.
+
+        Chunks only ever break at line or page (form feed) boundaries, so a loss
+        row is never cut in half mid-line.
+        """
+        chunks = list(self.iter_chunks(text.split(PAGE_BREAK)))
+        logging.info(f"Split text into {len(chunks)} chunk(s) with a budget of {self.chunk_token_budget()} tokens each")
         return chunks
 
+    def iter_chunks(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Incremental form of `chunk_text` over page texts.
+
+        Each chunk is yielded as soon as it is full, so only the chunk being
+        built is held in memory and the first chunk is ready before later pages
+        have been read.
+        """
+        budget = self.chunk_token_budget()
+        chunks = deque()
+        current = []  # (text, tokens) pairs
+        current_tokens = 0
+        last_record_start = None
+
+        def flush():
+            nonlocal current, current_tokens, last_record_start
+            # Prefer to cut just before the last loss row if that keeps the row intact
+            carry = []
+            if last_record_start:
+                carry = current[last_record_start:]
+                if sum(tokens for _, tokens in carry) > budget // 2:
+                    carry = []
+            keep = current[:len(current) - len(carry)]
+            chunks.append("".join(text for text, _ in keep))
+            current = carry
+            current_tokens = sum(tokens for _, tokens in carry)
+            last_record_start = 0 if carry else None
+
+        for page in pages:
+            for line in page.splitlines(keepends=True):
+                line_tokens = self.token_counter.count(line)
+                pieces = [line] if line_tokens <= budget else self._split_long_line(line.rstrip("\n"), budget)
+                for piece in pieces:
+                    piece_tokens = line_tokens if len(pieces) == 1 else self.token_counter.count(piece)
+                    if current and current_tokens + piece_tokens > budget:
+                        flush()
+                        while chunks:
+                            chunk = chunks.popleft()
+                            if chunk.strip():
+                                yield chunk
+                    if RECORD_START.match(piece):
+                        last_record_start = len(current)
+                    current.append((piece, piece_tokens))
+                    current_tokens += piece_tokens
+            if current and not current[-1][0].endswith("\n"):
+                current[-1] = (current[-1][0] + "\n", current[-1][1])
+
+        if current:
+            chunks.append("".join(text for text, _ in current))
+        for chunk in chunks:
+            if chunk.strip():
+                yield chunk
+
     def create_prompt(self, chunk: str) -> str:
         """
         Create a structured prompt for the OpenAI API.
@@ -75,48 +294,30 @@ class DataProcessor:
             "    }\n"
             "  ]\n"
             "}\n"
+            f"{AMOUNT_INSTRUCTION}"
             "Text:\n"
             f"{chunk}"
         )
 
     def _attempt_json_repair(self, text: str) -> Optional[Dict]:
         """
-        Enhanced JSON repair functionality for handling various edge cases.
+        Recover the extraction JSON from a completion in a single tolerant pass.
+
+        Handles surrounding prose, trailing commas and output cut off at
+        `max_tokens`; in the truncated case the complete losses are kept and the
+        partial trailing one is dropped.
         """
         try:
-            # Initial cleanup
-            text = text.strip()
-            
-            # Find the main JSON object(s)
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start == -1 or end == 0:
+            recovery = recover_json(text)
+            if not isinstance(recovery.data, dict):
+                logging.error("JSON repair failed: no JSON object found")
                 return None
-            
-            json_candidate = text[start:end]
-            
-            # Handle multiple JSON objects
-            if json_candidate.count('{') > json_candidate.count('}'):
-                # Find proper ending of first complete object
-                depth = 0
-                for i, char in enumerate(json_candidate):
-                    if char == '{':
-                        depth += 1
-                    elif char == '}':
-                        depth -= 1
-                        if depth == 0:
-                            json_candidate = json_candidate[:i+1]
-                            break
-            
-            # Remove trailing commas before closing braces
-            json_candidate = json_candidate.replace(',}', '}').replace(',]', ']')
-            
-            # Try parsing the cleaned text
-            return json.loads(json_candidate)
-            
-        except json.JSONDecodeError as e:
-            logging.error(f"JSON repair failed: {str(e)}")
-            return None
+            if recovery.truncated:
+                logging.warning(
+                    f"Recovered {recovery.recovered_records} loss(es) from truncated JSON "
+                    f"(dropped {recovery.dropped_partial} partial record(s))"
+                )
+            return recovery.data
         except Exception as e:
             logging.error(f"Unexpected error in JSON repair: {str(e)}")
             return None
@@ -125,105 +326,570 @@ class DataProcessor:
         """
         Merge multiple chunks into a single coherent response.
         """
-        merged = {
-            "policy_number": "",
-            "insured_name": "",
-            "losses": []
-        }
-        
-        seen_claims = set()  # Track duplicate claims
-        
+        merger = ChunkMerger()
         for chunk in chunks_data:
-            if chunk.get("policy_number") and not merged["policy_number"]:
-                merged["policy_number"] = chunk["policy_number"]
-            if chunk.get("insured_name") and not merged["insured_name"]:
-                merged["insured_name"] = chunk["insured_name"]
-                
-            # Add non-duplicate losses
-            for loss in chunk.get("losses", []):
-                claim_number = loss.get("claim_number", "")
-                if claim_number and claim_number not in seen_claims:
-                    seen_claims.add(claim_number)
-                    merged["losses"].append(loss)
-        
-        return merged
+            merger.add_chunk(chunk)
+        return merger.result()
 
-    def process_text(self, text: str) -> Dict[str, Any]:
+    def build_messages(self, chunk: str) -> List[Dict[str, str]]:
         """
-        Process raw text using OpenAI API with enhanced error handling and chunking.
+        Build the chat messages sent to the API for a single chunk.
+        """
+        prompt = self.create_prompt(chunk) + JSON_ONLY_INSTRUCTION
+        return [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ]
+
+    def build_request_body(self, chunk: str) -> Dict[str, Any]:
+        """
+        Build the chat completion request body for a single chunk.
+        """
+        return {
+            "model": self.model,
+            "messages": self.build_messages(chunk),
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature
+        }
+
+    def parse_completion(self, raw_result: str, idx: int = 0) -> Optional[Dict]:
+        """
+        Turn the raw completion text for a chunk into structured data.
+        Returns None if the text cannot be recovered as JSON.
+        """
+        # Handle non-JSON responses
+        if '{' not in raw_result:
+            logging.warning(f"Chunk {idx + 1} returned non-JSON response, using empty structure")
+            return {
+                "policy_number": "",
+                "insured_name": "",
+                "losses": []
+            }
+        return self._attempt_json_repair(raw_result)
+
+    def _call_api(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> Dict:
+        """
+        Send a single completion request through the LLM backend.
+        """
+        return self.backend.complete(messages, model or self.model, self.max_tokens, self.temperature)
+
+    def _call_api_stream(self, messages: List[Dict[str, str]], model: Optional[str] = None):
+        """
+        Send a streaming completion request and yield content fragments as they arrive.
+        """
+        return self.backend.stream(messages, model or self.model, self.max_tokens, self.temperature)
+
+    def _stream_completion(self, messages: List[Dict[str, str]], idx: int,
+                           on_loss: Callable[[Dict], None], model: Optional[str] = None) -> Dict:
         """
+        Stream a completion, handing each loss to `on_loss` as soon as it is complete.
+
+        Connection failures before any content arrives are retried like normal
+        requests. If the stream drops midway, the losses received so far are kept
+        and the response is flagged as partial. Only errors from the stream
+        itself are treated that way: if the incremental parser fails, the
+        completion is still read to the end and parsed with `recover_json`, and
+        errors raised by `on_loss` propagate.
+        """
+        started = time.monotonic()
+        parser = IncrementalLossParser()
+        parser_failed = False
+        fragments = []
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(count_message_tokens(self.token_counter, messages) + self.max_tokens)
+            try:
+                stream = iter(self._call_api_stream(messages, model))
+            except Exception as e:
+                stream, error = None, e
+            while stream is not None:
+                try:
+                    fragment = next(stream)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    stream, error = None, e
+                    break
+                fragments.append(fragment)
+                if parser_failed:
+                    continue
+                try:
+                    losses = parser.feed(fragment)
+                except Exception as e:
+                    logging.warning(f"Incremental parsing of chunk {idx + 1} failed ({e!r}); "
+                                    f"parsing the full completion instead")
+                    parser_failed = True
+                    continue
+                for loss in losses:
+                    if len(parser.losses) == 1:
+                        logging.info(f"First loss for chunk {idx + 1} after {time.monotonic() - started:.2f}s")
+                    on_loss(loss)
+            if stream is not None:
+                break
+            if fragments:
+                logging.warning(
+                    f"Stream for chunk {idx + 1} dropped after {len(parser.losses)} loss(es): {error}"
+                )
+                break
+            if attempt >= self.max_retries or not self._is_retryable(error):
+                raise error
+            delay = self._retry_delay(attempt, error)
+            attempt += 1
+            logging.warning(
+                f"Transient API error ({error}); retry {attempt}/{self.max_retries} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+        raw_result = "".join(fragments)
+        prompt_tokens = count_message_tokens(self.token_counter, messages)
+        completion_tokens = self.token_counter.count(raw_result)
+        return {
+            "choices": [{"message": {"content": raw_result}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            "partial": stream is None or (not parser_failed and not parser.complete),
+            "streamed_data": self._attempt_json_repair(raw_result) if parser_failed else parser.result(),
+            "parser_failed": parser_failed,
+            "retries": attempt
+        }
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """
+        Return True for rate-limit (429), server-side (5xx) and connection errors.
+        """
+        status = getattr(error, 'status_code', None) or getattr(error, 'http_status', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status is not None:
+            return status == 429 or 500 <= int(status) < 600
+        connection_error = getattr(openai, 'APIConnectionError', None)
+        if connection_error is not None and isinstance(error, connection_error):
+            return True
+        return isinstance(error, (ConnectionError, TimeoutError))
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Compute a full-jitter exponential backoff delay, honouring Retry-After when present.
+        """
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        retry_after = headers.get('retry-after') if hasattr(headers, 'get') else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.retry_max_delay)
+            except ValueError:
+                pass
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _create_completion(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> Dict:
+        """
+        Call the API through the rate limiter, retrying transient failures with jittered backoff.
+        """
+        estimated_tokens = count_message_tokens(self.token_counter, messages) + self.max_tokens
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                return dict(self._call_api(messages, model), retries=attempt)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                logging.warning(
+                    f"Transient API error ({e}); retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def complete_chunk(self, idx: int, messages: List[Dict[str, str]], model: str,
+                       emit: Optional[Callable[[Dict], None]] = None):
+        """
+        Get one model's answer for a chunk, from the cache when possible.
+
+        The completion is streamed when streaming is enabled and `emit` is given.
+
+        Returns:
+            tuple: (response, chunk_data or None, streamed)
+        """
+        cache_key = None
+        response = None
+        if self.cache:
+            cache_key = make_cache_key(model, self.temperature, self.max_tokens, messages)
+            response = self.cache.get(cache_key)
+            if response is not None:
+                response = dict(response, cached=True)
+                logging.info(f"Cache hit for chunk {idx + 1} ({model})")
+        streamed = False
+        if response is None and self.stream and emit is not None:
+            response = self._stream_completion(messages, idx, emit, model)
+            # After a parser failure only some losses were emitted; the caller emits the rest
+            streamed = not response['parser_failed']
+        elif response is None:
+            response = self._create_completion(messages, model)
+
+        raw_result = response['choices'][0]['message']['content']
+        logging.info(f"Raw response for chunk {idx + 1} ({model}): {raw_result}")
+
+        if response.get('partial'):
+            chunk_data = response['streamed_data']
+        else:
+            chunk_data = self.parse_completion(raw_result, idx)
+
+        if chunk_data and cache_key and not response.get('cached') and not response.get('partial'):
+            self.cache.set(cache_key, {
+                "choices": [{"message": {"content": raw_result}}],
+                "usage": dict(response.get('usage') or {})
+            })
+        return response, chunk_data, streamed
+
+    def _process_chunk(self, idx: int, chunk: str, total: Optional[int],
+                       merger: Optional[ChunkMerger] = None,
+                       on_loss: Optional[Callable[[Dict], None]] = None,
+                       usage: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict]:
+        """
+        Send one chunk through the model cascade and parse the result. Returns None on failure.
+
+        Each tier's answer is checked with `validate_extraction`; a failing
+        answer (or an API error) moves the chunk on to the next tier, and the
+        last tier's answer is accepted as is. Tokens, cost and latency of every
+        tier tried go into the chunk's usage record (see `usage_record`),
+        which is appended to `chunk_records` and to `usage`, if given.
+
+        When a merger is given, each new (non-duplicate) loss is added to it and
+        passed to `on_loss` as soon as it is available. Only the last tier
+        streams losses out before validation, since earlier answers may still be
+        rejected.
+        """
+        def emit(loss: Dict):
+            if merger is not None and merger.add_loss(loss) and on_loss:
+                on_loss(loss)
+
+        logging.info(f"Processing chunk {idx + 1}{f'/{total}' if total else ''} with OpenAI API.")
+
+        tiers = []
         try:
-            chunks = self.chunk_text(text)
-            processed_chunks = []
-            
-            for idx, chunk in enumerate(chunks):
-                logging.info(f"Processing chunk {idx + 1}/{len(chunks)} with OpenAI API.")
-                
+            messages = self.build_messages(chunk)
+            chunk_data = None
+            streamed = False
+            for tier, model in enumerate(self.model_tiers):
+                final = tier == len(self.model_tiers) - 1
+                started = time.monotonic()
                 try:
-                    # Update the prompt to be more explicit about requiring JSON
-                    prompt = self.create_prompt(chunk)
-                    prompt += "\nIMPORTANT: Return ONLY valid JSON data. If there's not enough information, return an empty JSON structure."
-                    
-                    response = openai.ChatCompletion.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": "You are an insurance loss report processor that must always return valid JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        max_tokens=self.max_tokens,
-                        temperature=self.temperature
+                    response, chunk_data, streamed = self.complete_chunk(
+                        idx, messages, model, emit if final else None
                     )
-                    
-                    raw_result = response['choices'][0]['message']['content']
-                    logging.info(f"Raw response for chunk {idx + 1}: {raw_result}")
-                    
-                    # Handle non-JSON responses
-                    if not raw_result.strip().startswith('{'):
-                        logging.warning(f"Chunk {idx + 1} returned non-JSON response, using empty structure")
-                        chunk_data = {
-                            "policy_number": "",
-                            "insured_name": "",
-                            "losses": []
-                        }
-                    else:
-                        chunk_data = self._attempt_json_repair(raw_result)
-                    
-                    if chunk_data:
-                        processed_chunks.append(chunk_data)
-                        self.calculate_api_cost(response)
-                    else:
-                        logging.error(f"Chunk {idx + 1} processing failed: Invalid JSON")
-                        continue
-                        
                 except Exception as e:
-                    logging.error(f"Error processing chunk {idx + 1}: {str(e)}")
+                    if final:
+                        raise
+                    logging.warning(f"Chunk {idx + 1}: {model} failed ({e}); escalating")
+                    tiers.append({"model": model, "prompt_tokens": 0, "completion_tokens": 0,
+                                  "latency": round(time.monotonic() - started, 3), "retries": 0,
+                                  "cost": 0.0, "cached": False, "valid": False, "errors": [str(e)]})
                     continue
-                
-            if not processed_chunks:
-                raise ValueError("No chunks were successfully processed")
-                
-            # Merge all processed chunks
-            return self.merge_chunks(processed_chunks)
+
+                errors = validate_extraction(chunk_data, chunk) if chunk_data else ["invalid JSON"]
+                tokens = response.get('usage') or {}
+                tiers.append({
+                    "model": model,
+                    "prompt_tokens": tokens.get('prompt_tokens', 0),
+                    "completion_tokens": tokens.get('completion_tokens', 0),
+                    "latency": round(time.monotonic() - started, 3),
+                    "retries": response.get('retries', 0),
+                    "cost": self.calculate_api_cost(response, model),
+                    "cached": bool(response.get('cached')),
+                    "valid": not errors,
+                    "errors": errors
+                })
+                if not errors:
+                    break
+                if not final:
+                    logging.info(
+                        f"Chunk {idx + 1}: {model} result failed validation ({'; '.join(errors[:3])}); escalating"
+                    )
+                elif chunk_data:
+                    logging.warning(
+                        f"Chunk {idx + 1}: accepting {model} result despite validation errors: {'; '.join(errors[:3])}"
+                    )
+
+            if chunk_data:
+                if merger is not None:
+                    merger.add_header(chunk_data)
+                    if not streamed:
+                        for loss in chunk_data.get("losses", []):
+                            emit(loss)
+                return chunk_data
+
+            logging.error(f"Chunk {idx + 1} processing failed: Invalid JSON")
+            return None
+
+        except Exception as e:
+            logging.error(f"Error processing chunk {idx + 1}: {str(e)}")
+            return None
+        finally:
+            record = self.usage_record(idx, tiers)
+            with self._records_lock:
+                self.chunk_records.append(record)
+                if usage is not None:
+                    usage.append(record)
+
+    def _process_journaled_chunk(self, journal: JobJournal, idx: int, chunk: str, total: Optional[int],
+                                 merger: Optional[ChunkMerger] = None,
+                                 on_loss: Optional[Callable[[Dict], None]] = None,
+                                 usage: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict]:
+        """
+        `_process_chunk` backed by a job journal: a chunk already finished in an
+        earlier run is served from the journal without an API call, and every
+        chunk sent is recorded there as soon as it completes.
+        """
+        key = chunk_key(chunk, self.model_tiers)
+        chunk_data = journal.result(key)
+        if chunk_data is not None:
+            logging.info(f"Chunk {idx + 1}: reusing result recorded in job journal {journal.path}")
+            if merger is not None:
+                merger.add_header(chunk_data)
+                for loss in chunk_data.get("losses", []):
+                    if merger.add_loss(loss) and on_loss:
+                        on_loss(loss)
+            return chunk_data
+        chunk_data = self._process_chunk(idx, chunk, total, merger, on_loss, usage)
+        journal.record_chunk(key, idx, chunk_data, None if chunk_data else "chunk processing failed")
+        return chunk_data
+
+    @staticmethod
+    def usage_record(idx: int, tiers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Summarise the tiers tried for one chunk into its usage record.
+
+        Token counts, latency, retries and cost are totals over every tier
+        tried; `model` is the tier whose answer was kept (the last one tried)
+        and `cached` is True only if no tier needed an API call.
+        """
+        prompt_tokens = sum(t["prompt_tokens"] for t in tiers)
+        completion_tokens = sum(t["completion_tokens"] for t in tiers)
+        return {
+            "chunk_index": idx,
+            "model": tiers[-1]["model"] if tiers else None,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "latency": round(sum(t["latency"] for t in tiers), 3),
+            "retries": sum(t["retries"] for t in tiers),
+            "cached": bool(tiers) and all(t["cached"] for t in tiers),
+            "cost": round(sum(t["cost"] for t in tiers), 6),
+            "tiers": tiers
+        }
+
+    def cascade_stats(self) -> Dict[str, Any]:
+        """
+        Summarise `chunk_records`: how many chunks escalated, and calls, cost and latency per model.
+        """
+        with self._records_lock:
+            records = list(self.chunk_records)
+        per_model: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            for tier in record["tiers"]:
+                totals = per_model.setdefault(tier["model"], {"calls": 0, "accepted": 0, "cost": 0.0, "latency": 0.0})
+                totals["calls"] += 1
+                totals["accepted"] += int(tier["valid"])
+                totals["cost"] = round(totals["cost"] + tier["cost"], 6)
+                totals["latency"] = round(totals["latency"] + tier["latency"], 3)
+        return {
+            "chunks": len(records),
+            "escalated": sum(1 for record in records if len(record["tiers"]) > 1),
+            "models": per_model
+        }
+
+    def prepare_chunks(self, text: str):
+        """
+        Chunk the text and apply the local pre-processing stages.
+
+        Repeated page headers/footers are stripped, chunks without claim content
+        are skipped by the relevance filter, and the rest are compressed.
+
+        Returns:
+            tuple: (all chunks, list of (chunk index, prompt text) pairs to send)
+        """
+        if self.compressor:
+            text = self.compressor.strip_page_furniture(text)
+        chunks = self.chunk_text(text)
+
+        selected = list(enumerate(chunks))
+        if self.relevance_filter:
+            selected = self.relevance_filter.filter(chunks)
+            logging.info(
+                f"Relevance filter skipped {len(chunks) - len(selected)}/{len(chunks)} chunk(s); "
+                f"totals so far: {self.relevance_filter.stats()}"
+            )
+
+        if self.compressor:
+            compressed = []
+            for idx, chunk in selected:
+                compacted, stats = self.compressor.compress(chunk)
+                logging.info(
+                    f"Compressed chunk {idx + 1}: {stats['tokens_before']} -> {stats['tokens_after']} tokens"
+                )
+                compressed.append((idx, compacted))
+            selected = compressed
+            logging.info(f"Prompt compression totals so far: {self.compressor.stats()}")
+
+        return chunks, selected
+
+    def iter_prepared_chunks(self, pages: Iterable[str], record: bool = True) -> Iterator[Tuple[int, str]]:
+        """
+        Streaming form of `prepare_chunks` over page texts.
+
+        With `record=False` the relevance filter and compressor stats and the
+        skipped-chunk audit are left untouched, for estimates made before the
+        document is processed for real.
+
+        Yields:
+            tuple: (chunk index, prompt text) for each chunk worth sending, as
+            soon as enough pages have been read to fill it.
+        """
+        if self.compressor:
+            pages = self.compressor.iter_strip_page_furniture(pages)
+        for idx, chunk in enumerate(self.iter_chunks(pages)):
+            if self.relevance_filter and not self.relevance_filter.is_relevant(chunk, idx, record):
+                continue
+            if self.compressor:
+                chunk, stats = self.compressor.compress(chunk, record)
+                if record:
+                    logging.info(
+                        f"Compressed chunk {idx + 1}: {stats['tokens_before']} -> {stats['tokens_after']} tokens"
+                    )
+            yield idx, chunk
+
+    def run_chunks(self, selected: Iterable[Tuple[int, str]], total: Optional[int],
+                   on_loss: Optional[Callable[[Dict], None]], return_usage: bool,
+                   executor: Optional[Executor], journal: Optional[JobJournal] = None,
+                   failed_chunks: Optional[List[int]] = None):
+        """
+        Send (index, prompt text) pairs concurrently and merge the results in chunk order.
+
+        Chunks are submitted as `selected` produces them, with at most twice
+        `max_concurrency` waiting or in flight, so a lazy source is only read
+        ahead of the API by a few chunks. With a journal, finished chunks are
+        reused from it and new outcomes are recorded in it. The indexes of
+        chunks that failed are appended to `failed_chunks`, if given.
+        """
+        merger = ChunkMerger() if on_loss else None
+        usage: List[Dict[str, Any]] = []
+        in_flight = threading.BoundedSemaphore(self.max_concurrency * 2)
+
+        def submit_chunks(pool: Executor) -> List[Optional[Dict]]:
+            futures = []
+            for idx, chunk in selected:
+                in_flight.acquire()
+                if journal is not None:
+                    future = pool.submit(self._process_journaled_chunk, journal, idx, chunk, total,
+                                         merger, on_loss, usage)
+                else:
+                    future = pool.submit(self._process_chunk, idx, chunk, total, merger, on_loss, usage)
+                future.add_done_callback(lambda _: in_flight.release())
+                futures.append((idx, future))
+            return [(idx, future.result()) for idx, future in futures]
+
+        if executor is not None:
+            results = submit_chunks(executor)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                results = submit_chunks(pool)
+
+        if not results:
+            logging.info("No relevant chunks found; returning an empty structure")
+            empty = self.merge_chunks([])
+            return (empty, usage) if return_usage else empty
+
+        processed_chunks = [result for _, result in results if result]
+        failed = [idx + 1 for idx, result in results if not result]
+        if failed_chunks is not None:
+            failed_chunks.extend(idx for idx, result in results if not result)
+        if failed:
+            logging.warning(
+                f"{len(failed)} of {len(results)} chunk(s) failed and are missing from the result: "
+                f"{', '.join(map(str, failed))}"
+            )
+            
+        if self.cache:
+            logging.info(f"Response cache stats: {self.cache.stats()}")
+        if len(self.model_tiers) > 1:
+            logging.info(f"Model cascade stats: {self.cascade_stats()}")
+
+        if not processed_chunks:
+            raise ValueError("No chunks were successfully processed")
             
+        # Merge all processed chunks
+        merged = self.merge_chunks(processed_chunks)
+        if return_usage:
+            return merged, sorted(usage, key=lambda record: record["chunk_index"])
+        return merged
+
+    def process_text(self, text: str, on_loss: Optional[Callable[[Dict], None]] = None,
+                     return_usage: bool = False, executor: Optional[Executor] = None,
+                     journal: Optional[JobJournal] = None, failed_chunks: Optional[List[int]] = None):
+        """
+        Process raw text using OpenAI API with enhanced error handling and chunking.
+
+        Chunks are sent concurrently (bounded by `max_concurrency`) and merged in
+        their original order. If `on_loss` is given it is called once per unique
+        loss as soon as it is extracted; with `stream` enabled that happens while
+        the completion is still being generated.
+
+        Pass `executor` to run the chunks on a pool shared with other documents
+        instead of a pool of `max_concurrency` threads created for this call.
+        Pass a `journal` to record each chunk as it completes and to skip chunks
+        a resumed job has already finished, and a list as `failed_chunks` to
+        collect the indexes of chunks missing from the result.
+
+        Returns:
+            dict: The merged data, or (data, usage) when `return_usage` is True,
+            where usage lists one record per chunk sent, in chunk order.
+        """
+        try:
+            chunks, selected = self.prepare_chunks(text)
+            return self.run_chunks(selected, len(chunks), on_loss, return_usage, executor, journal, failed_chunks)
         except Exception as e:
             logging.error(f"Failed to process text with OpenAI API: {str(e)}")
             raise
 
-    def calculate_api_cost(self, response: Dict) -> float:
+    def process_pages(self, pages: Iterable[str], on_loss: Optional[Callable[[Dict], None]] = None,
+                      return_usage: bool = False, executor: Optional[Executor] = None,
+                      journal: Optional[JobJournal] = None, failed_chunks: Optional[List[int]] = None):
+        """
+        Process page texts as they are read, e.g. from `PDFParser.iter_pages`.
+
+        Pages are chunked incrementally and each chunk is sent as soon as it is
+        full, so memory stays flat on very long reports and the API is working
+        on the first chunks while later pages are still being extracted.
+        Arguments and return value are as for `process_text`.
+        """
+        try:
+            return self.run_chunks(self.iter_prepared_chunks(pages), None, on_loss, return_usage, executor, journal,
+                                    failed_chunks)
+        except Exception as e:
+            logging.error(f"Failed to process pages with OpenAI API: {str(e)}")
+            raise
+
+    def calculate_api_cost(self, response: Dict, model: Optional[str] = None) -> float:
         """
-        Calculate API cost based on token usage with updated pricing.
+        Calculate API cost from token usage and the model's prompt/completion prices.
+        Responses served from the cache cost nothing.
         """
         try:
+            if response.get('cached'):
+                logging.info("API cost for chunk: $0.0000 (cache hit)")
+                return 0.0
+
             usage = response.get('usage', {})
-            total_tokens = usage.get('total_tokens', 0)
-            
-            # Updated pricing for GPT-4
-            cost_per_1k_tokens = 0.03 if self.model == 'gpt-3.5-turbo' else 0.06
-            total_cost = (total_tokens / 1000) * cost_per_1k_tokens
+            total_cost = price_usage(model or self.model, usage.get('prompt_tokens', 0),
+                                     usage.get('completion_tokens', 0))
             
-            logging.info(f"API cost for chunk: ${total_cost:.4f} ({total_tokens} tokens)")
+            logging.info(f"API cost for chunk: ${total_cost:.4f} ({usage.get('total_tokens', 0)} tokens)")
             return total_cost
             
         except Exception as e:
             logging.error(f"Failed to calculate API cost: {str(e)}")
-            return 0.0
\ No newline at end of file
+            return 0.0
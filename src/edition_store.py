@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.relevance import POLICY_NUMBER
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/edition_store.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+_SPACES = re.compile(r'\s+')
+
+
+def page_content_hash(text: str) -> str:
+    """
+    Hash of a page's text with whitespace runs collapsed, so re-rendered but unchanged pages still match.
+    """
+    return hashlib.sha256(_SPACES.sub(" ", text).strip().encode('utf-8')).hexdigest()
+
+
+def page_policy_number(text: str) -> str:
+    """
+    Policy number from a page's policy header, or "" when the page has none.
+    """
+    match = POLICY_NUMBER.search(text)
+    return match.group(1) if match else ""
+
+
+class Edition:
+    def __init__(self):
+        """
+        Pages of one document collected during extraction for `EditionStore.save_edition`.
+
+        `policy_number` is taken from the first policy header seen and scopes
+        the lookups of later pages; `complete` is cleared when a chunk fails,
+        so an edition with missing results is never saved.
+        """
+        self.policy_number = ""
+        self.pages: List[Tuple[int, str, Dict]] = []
+        self.complete = True
+
+    def note_policy(self, policy_number: Optional[str]):
+        if not self.policy_number and policy_number:
+            self.policy_number = policy_number
+
+
+def attribute_losses(data: Dict, pages: List[Tuple[int, str, str]]) -> List[Tuple[int, str, Dict]]:
+    """
+    Split an extraction over several pages into one result per page.
+
+    Each loss goes to the first page whose text contains its claim number;
+    losses found on none of them go to the first page. Every page carries the
+    extraction's policy number and insured name.
+
+    Args:
+        data (dict): Merged extraction for the pages.
+        pages (list): (page number, page hash, page text) for each page sent.
+
+    Returns:
+        list: (page number, page hash, result) per page, in the order given.
+    """
+    results = []
+    texts = []
+    for page_number, page_hash, text in pages:
+        results.append((page_number, page_hash, {
+            "policy_number": data.get("policy_number", ""),
+            "insured_name": data.get("insured_name", ""),
+            "losses": []
+        }))
+        texts.append(_SPACES.sub(" ", text))
+    if not results:
+        return results
+    for loss in data.get("losses", []):
+        claim_number = _SPACES.sub(" ", str(loss.get("claim_number") or ""))
+        position = next((i for i, text in enumerate(texts) if claim_number and claim_number in text), 0)
+        results[position][2]["losses"].append(loss)
+    return results
+
+
+class EditionStore:
+    def __init__(self, db_path="data/cache/editions.sqlite"):
+        """
+        Per-page extraction results of the latest edition of each policy's loss run.
+
+        Pages are keyed by content hash and the model that extracted them, so a
+        revised edition only needs its new or changed pages sent to the LLM.
+
+        Args:
+            db_path (str): SQLite file holding the page results.
+        """
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS edition_pages ("
+            "policy_number TEXT NOT NULL, model TEXT NOT NULL, page_hash TEXT NOT NULL, "
+            "page_number INTEGER NOT NULL, result TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (policy_number, model, page_hash))"
+        )
+        self._conn.commit()
+        logging.info(f"EditionStore initialized (disk: {db_path})")
+
+    def lookup(self, page_hash: str, model: str, policy_number: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored result for a page of `policy_number` extracted by `model`, or None if it has not been seen.
+
+        Pages are only reused within the same policy, so identical pages of
+        different policies' loss runs never share a result.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM edition_pages WHERE policy_number = ? AND model = ? AND page_hash = ?",
+                (policy_number, model, page_hash)
+            ).fetchone() if policy_number else None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def save_edition(self, policy_number: str, model: str, pages: Iterable[Tuple[int, str, Dict]]):
+        """
+        Record the pages of a policy's latest edition, replacing the previous edition's pages.
+
+        Without a policy number the pages are added without replacing anything.
+
+        Args:
+            policy_number (str): Policy the edition belongs to.
+            model (str): Model the results were extracted with.
+            pages: (page number, page hash, result) for each page sent to the LLM.
+        """
+        now = time.time()
+        rows = [
+            (policy_number or "", model, page_hash, page_number, json.dumps(result), now)
+            for page_number, page_hash, result in pages
+        ]
+        try:
+            with self._lock, self._conn:
+                if policy_number:
+                    self._conn.execute(
+                        "DELETE FROM edition_pages WHERE policy_number = ? AND model = ?", (policy_number, model)
+                    )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO edition_pages "
+                    "(policy_number, model, page_hash, page_number, result, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            logging.info(f"Saved edition of policy '{policy_number}': {len(rows)} page(s)")
+        except Exception as e:
+            logging.error(f"Failed to save edition of policy '{policy_number}': {e}")
+            raise e
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pages, policies = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT policy_number) FROM edition_pages"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "pages": pages, "policies": policies}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/job_journal.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def chunk_key(chunk: str, models: List[str]) -> str:
+    """
+    Identify a chunk by its prompt text and the model tiers it is sent to.
+
+    Chunk indexes restart in every LLM segment of a document, so results are
+    matched on content instead.
+    """
+    payload = json.dumps({"models": list(models), "chunk": chunk}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class JobJournal:
+    def __init__(self, path: str, job: Optional[Dict[str, Any]] = None, resume: bool = False):
+        """
+        Write-ahead journal of one extraction job: each chunk's status and parsed result.
+
+        Records are JSON lines, flushed and fsynced as each chunk completes, so
+        after a crash every finished chunk is still on disk. With `resume`, an
+        existing journal is replayed and its finished chunks are served from it;
+        otherwise the journal is started afresh. A line torn by a crash mid-write
+        is cut off before appending.
+
+        Args:
+            path (str): Journal file, e.g. data/jobs/<document id>.jsonl.
+            job (dict): Details recorded in the journal's first line (source file, model, ...).
+            resume (bool): Reuse the chunks recorded by an earlier run of the same job.
+        """
+        self.path = path
+        self.reused = 0
+        self.recorded = 0
+        self._results: Dict[str, Dict] = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume and os.path.exists(path):
+            self._replay()
+            self._file = open(path, 'a', encoding='utf-8')
+            logging.info(
+                f"Resuming job journal {path}: {len(self._results)} finished chunk(s), "
+                f"{len(self._failed)} failed chunk(s) to retry"
+            )
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._append({"event": "job", "started_at": time.time(), **(job or {})})
+            logging.info(f"Started job journal {path}")
+
+    def _replay(self):
+        good_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Ignoring torn record at byte {good_bytes} of {self.path}")
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good_bytes += len(line)
+                if record.get("event") != "chunk":
+                    continue
+                if record["status"] == "done":
+                    self._results[record["key"]] = record["result"]
+                    self._failed.discard(record["key"])
+                else:
+                    self._failed.add(record["key"])
+        with open(self.path, 'r+b') as f:
+            f.truncate(good_bytes)
+
+    def _append(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def result(self, key: str) -> Optional[Dict]:
+        """
+        Return the recorded result of a finished chunk, or None if it still has to be sent.
+        """
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self.reused += 1
+        return result
+
+    def record_chunk(self, key: str, idx: int, result: Optional[Dict], error: Optional[str] = None):
+        """
+        Durably record a chunk's outcome: its parsed result, or None and the error when it failed.
+        """
+        record = {
+            "event": "chunk",
+            "key": key,
+            "chunk_index": idx,
+            "status": "done" if result is not None else "failed",
+            "result": result,
+            "error": error,
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            self._append(record)
+            self.recorded += 1
+            if result is not None:
+                self._results[key] = result
+                self._failed.discard(key)
+            else:
+                self._failed.add(key)
+
+    @property
+    def failed(self) -> int:
+        return len(self._failed)
+
+    def stats(self) -> Dict[str, int]:
+        return {"reused": self.reused, "recorded": self.recorded, "finished": len(self._results),
+                "failed": len(self._failed)}
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """
+        Close and delete the journal once the whole job has completed.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        logging.info(f"Job journal {self.path} completed and removed")
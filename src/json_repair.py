@@ -0,0 +1,149 @@
+import json
+import logging
+import re
+from typing import Any, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/json_repair.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.S)
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_LITERALS = {"true": True, "false": False, "null": None}
+_WHITESPACE = " \t\r\n"
+
+
+class RecoveryResult:
+    def __init__(self, data: Any, truncated: bool, recovered_records: int, dropped_partial: int):
+        """
+        Outcome of a tolerant JSON parse.
+
+        Args:
+            data: The recovered value, or None if nothing usable was found.
+            truncated (bool): True if the input ended before the root value closed.
+            recovered_records (int): Number of complete records in the `losses` array.
+            dropped_partial (int): Number of incomplete array elements discarded.
+        """
+        self.data = data
+        self.truncated = truncated
+        self.recovered_records = recovered_records
+        self.dropped_partial = dropped_partial
+
+
+def _decode_string(raw: str) -> str:
+    # strict=False: models put raw newlines and tabs inside strings
+    try:
+        return json.loads('"' + raw + '"', strict=False)
+    except json.JSONDecodeError:
+        # Truncated escape sequence at the end of a cut-off string
+        return json.loads('"' + re.sub(r'\\(u[0-9a-fA-F]{0,3})?$', '', raw) + '"', strict=False)
+
+
+class _Frame:
+    __slots__ = ("container", "key", "expect_key")
+
+    def __init__(self, container):
+        self.container = container
+        self.key = None
+        self.expect_key = isinstance(container, dict)
+
+
+def recover_json(text: str, records_key: str = "losses") -> RecoveryResult:
+    """
+    Parse the first JSON object or array in `text` in a single linear pass.
+
+    The root is the first object; an array is only taken when the text has no
+    object at all, so prose such as "see [1]" before the JSON is skipped. Text
+    before the root and after the root value is ignored, trailing
+    commas (with any whitespace) are skipped, and if the input is cut off the
+    open strings, arrays and objects are closed. Incomplete objects or arrays
+    inside an array, such as the last loss of a truncated answer, are dropped
+    rather than kept half-filled.
+    """
+    start = text.find("{")
+    if start == -1:
+        start = text.find("[")
+    if start == -1:
+        return RecoveryResult(None, False, 0, 0)
+
+    stack: List[_Frame] = []
+    root = None
+    pos = start
+    length = len(text)
+    dropped = 0
+
+    def attach(value):
+        frame = stack[-1]
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+        elif frame.expect_key:
+            if isinstance(value, str):
+                frame.key = value
+        elif frame.key is not None:
+            frame.container[frame.key] = value
+            frame.key = None
+
+    while pos < length:
+        char = text[pos]
+        if char in _WHITESPACE or char == ",":
+            if char == "," and stack and isinstance(stack[-1].container, dict):
+                stack[-1].expect_key = True
+            pos += 1
+        elif char in "{[":
+            container = {} if char == "{" else []
+            stack.append(_Frame(container))
+            if root is None:
+                root = container
+            pos += 1
+        elif char in "}]":
+            if not stack:
+                break
+            frame = stack.pop()
+            if not stack:
+                break
+            attach(frame.container)
+            pos += 1
+        elif char == ":":
+            if stack and isinstance(stack[-1].container, dict):
+                stack[-1].expect_key = False
+            pos += 1
+        elif char == '"':
+            match = _STRING.match(text, pos)
+            if not match:
+                # Unterminated string: keep it as a value, drop it if it was a key
+                if stack and not stack[-1].expect_key:
+                    attach(_decode_string(text[pos + 1:]))
+                pos = length
+                break
+            attach(_decode_string(match.group(1)))
+            pos = match.end()
+        else:
+            number = _NUMBER.match(text, pos)
+            if number and number.end() < length:
+                raw = number.group(0)
+                attach(float(raw) if any(c in raw for c in ".eE") else int(raw))
+                pos = number.end()
+                continue
+            word = next((w for w in _LITERALS if text.startswith(w, pos)), None)
+            if word:
+                attach(_LITERALS[word])
+                pos += len(word)
+            else:
+                # Unexpected character (or a literal cut off at the end): skip it
+                pos += 1
+
+    truncated = bool(stack)
+    # Close whatever is still open, innermost first
+    while len(stack) > 1:
+        frame = stack.pop()
+        if isinstance(stack[-1].container, list):
+            dropped += 1
+        else:
+            attach(frame.container)
+
+    records = root.get(records_key) if isinstance(root, dict) else None
+    recovered = len(records) if isinstance(records, list) else 0
+    return RecoveryResult(root, truncated, recovered, dropped)
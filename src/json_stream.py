@@ -0,0 +1,128 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/json_stream.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+
+class IncrementalLossParser:
+    """
+    Tolerant, incremental parser for streamed extraction JSON.
+
+    Text is fed in arbitrary fragments. Each object in the top-level `losses`
+    array is returned from `feed` as soon as its closing brace arrives, and
+    top-level string fields (policy_number, insured_name) are captured as they
+    complete. Anything before the first `{` (such as a Markdown fence) and after
+    the root object closes is ignored.
+    """
+
+    def __init__(self, array_key: str = "losses"):
+        self.array_key = array_key
+        self.header: Dict[str, Any] = {}
+        self.losses: List[Dict] = []
+        self.skipped = 0
+        self.complete = False
+        self._stack: List[Dict[str, Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars: List[str] = []
+        self._capture: Optional[List[str]] = None
+        self._capture_depth = 0
+
+    def _in_losses_array(self) -> bool:
+        return (
+            len(self._stack) == 2
+            and self._stack[1]["type"] == "["
+            and self._stack[0]["key"] == self.array_key
+        )
+
+    def _finish_string(self):
+        value = json.loads('"' + "".join(self._string_chars) + '"', strict=False)
+        frame = self._stack[-1]
+        if frame["type"] == "{" and frame["expect"] == "key":
+            frame["key"] = value
+        elif len(self._stack) == 1 and frame["expect"] == "value":
+            self.header[frame["key"]] = value
+
+    def _finish_capture(self) -> Optional[Dict]:
+        raw = "".join(self._capture)
+        self._capture = None
+        try:
+            loss = json.loads(_TRAILING_COMMA.sub(r'\1', raw), strict=False)
+        except json.JSONDecodeError as e:
+            self.skipped += 1
+            logging.warning(f"Skipping malformed streamed loss: {e}")
+            return None
+        if not isinstance(loss, dict):
+            return None
+        self.losses.append(loss)
+        return loss
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Consume a fragment of the completion and return any losses it completed.
+        """
+        completed = []
+        for char in text:
+            if self.complete:
+                break
+            if not self._stack and char != "{":
+                continue
+
+            if self._capture is not None:
+                self._capture.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._string_chars.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    self._string_chars.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    self._finish_string()
+                else:
+                    self._string_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif char in "{[":
+                if char == "{" and self._capture is None and self._in_losses_array():
+                    self._capture = ["{"]
+                    self._capture_depth = len(self._stack) + 1
+                self._stack.append({"type": char, "key": None, "expect": "key" if char == "{" else "value"})
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._capture is not None and len(self._stack) < self._capture_depth:
+                    loss = self._finish_capture()
+                    if loss is not None:
+                        completed.append(loss)
+                if not self._stack:
+                    self.complete = True
+            elif char == ":" and self._stack and self._stack[-1]["type"] == "{":
+                self._stack[-1]["expect"] = "value"
+            elif char == "," and self._stack and self._stack[-1]["type"] == "{":
+                self._stack[-1]["expect"] = "key"
+        return completed
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Return everything recovered so far in the standard extraction shape.
+        """
+        return {
+            "policy_number": self.header.get("policy_number", ""),
+            "insured_name": self.header.get("insured_name", ""),
+            "losses": list(self.losses)
+        }
@@ -0,0 +1,311 @@
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/layout_extractor.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Furthest a multi-line cell's centre may sit from its row's claim number (points)
+MAX_CELL_OFFSET = 40
+_MONEY = re.compile(r'^\(?-?\$?-?[\d,]+(?:\.\d{2})?\)?$')
+
+
+class ColumnTemplate:
+    def __init__(self, name, header_labels, columns, claim_pattern, date_format="%m/%d/%Y",
+                 amount_columns=(), anchor_label="Claim", policy_pattern=r'^Policy\s+(\S+)',
+                 insured_pattern=r'^Insured:\s*(.+)$'):
+        """
+        Describe one fixed tabular loss run layout.
+
+        Args:
+            name (str): Template name, used in logs.
+            header_labels (list): Words that must all appear on the table header line(s).
+            columns (list): (field, x0, x1) tuples giving each column's horizontal extent,
+                measured from the left edge of the `anchor_label` header word.
+            claim_pattern (str): Regex a claim number cell must fully match.
+            date_format (str): strptime format of the date_of_loss column.
+            amount_columns (tuple): Money columns summed into the `amount` field.
+            anchor_label (str): Header word used to align the template horizontally.
+            policy_pattern (str): Regex with one group capturing the policy number from a line.
+            insured_pattern (str): Regex with one group capturing the insured name from a line.
+        """
+        self.name = name
+        self.header_labels = header_labels
+        self.columns = columns
+        self.claim_pattern = re.compile(claim_pattern)
+        self.date_format = date_format
+        self.amount_columns = amount_columns
+        self.anchor_label = anchor_label
+        self.policy_pattern = re.compile(policy_pattern)
+        self.insured_pattern = re.compile(insured_pattern)
+
+
+TEMPLATE_REGISTRY: Dict[str, ColumnTemplate] = {}
+
+
+def register_template(template: ColumnTemplate):
+    """
+    Add a layout template to the registry consulted by LayoutExtractor.
+    """
+    TEMPLATE_REGISTRY[template.name] = template
+    return template
+
+
+# Liberty Trust style loss run (data/input/sample.pdf). The amount is the
+# indemnity paid, as the LLM prompt defines it (AMOUNT_INSTRUCTION), so a
+# claim's amount does not depend on which path extracted its page.
+register_template(ColumnTemplate(
+    name="liberty_trust",
+    header_labels=["Claim", "Number", "Description", "Indemnity", "Expense", "Reserve", "Paid", "Driver"],
+    columns=[
+        ("claim_number", -7, 58),
+        ("date_of_loss", 58, 100),
+        ("type", 100, 119),
+        ("status", 119, 161),
+        ("description", 161, 378),
+        ("indemnity_reserve", 378, 418),
+        ("expense_reserve", 418, 451),
+        ("indemnity_paid", 451, 496),
+        ("expense_paid", 496, 533),
+        ("driver", 533, 620),
+    ],
+    claim_pattern=r'^[A-Z]{2,5}-\d{4}-\d{3,6}$',
+    amount_columns=("indemnity_paid",),
+))
+
+
+def parse_money(value: str) -> Optional[float]:
+    """
+    Parse a currency cell such as '$7,078.24' or '($12.00)'. Returns None if it is not money.
+    """
+    if not value or not _MONEY.match(value):
+        return None
+    negative = value.startswith("(") or "-" in value
+    number = float(value.strip("()").replace("$", "").replace(",", "").replace("-", ""))
+    return -number if negative else number
+
+
+def _lines(words) -> List[List[tuple]]:
+    """
+    Group PyMuPDF words into visual lines by their (block, line) numbers.
+    """
+    lines = {}
+    for word in words:
+        lines.setdefault((word[5], word[6]), []).append(word)
+    return sorted((sorted(line, key=lambda w: w[0]) for line in lines.values()), key=lambda l: (l[0][1], l[0][0]))
+
+
+class LayoutExtractor:
+    def __init__(self, templates: Optional[List[ColumnTemplate]] = None):
+        """
+        Initialize the deterministic extractor with a list of templates (defaults to the registry).
+        """
+        self.templates = templates if templates is not None else list(TEMPLATE_REGISTRY.values())
+        logging.info(f"LayoutExtractor initialized with templates: {[t.name for t in self.templates]}")
+
+    def _find_headers(self, words, template: ColumnTemplate) -> List[tuple]:
+        """
+        Return (x_offset, top, bottom) for every table header of `template` on the page.
+        """
+        texts = {w[4] for w in words}
+        if not all(label in texts for label in template.header_labels):
+            return []
+        headers = []
+        for anchor in words:
+            if anchor[4] != template.anchor_label or not any(
+                    o[4] == template.header_labels[1] and abs(o[1] - anchor[1]) < 2 for o in words):
+                continue
+            header_words = [w for w in words if w[4] in template.header_labels and -5 <= w[1] - anchor[1] < 20]
+            headers.append((anchor[0], min(w[1] for w in header_words), max(w[3] for w in header_words)))
+        return headers
+
+    def _column(self, word, template: ColumnTemplate, x_offset: float) -> Optional[str]:
+        center = (word[0] + word[2]) / 2 - x_offset
+        for field, x0, x1 in template.columns:
+            if x0 <= center < x1:
+                return field
+        return None
+
+    def _extract_page(self, words, template: ColumnTemplate, x_offset: float, headers: List[tuple],
+                      state: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Extract policy sections and loss rows from one page.
+
+        Rows are vertically centred on their claim number, so each row owns the
+        band halfway to its neighbours, clipped at policy headers and table headers.
+        """
+        # Policy and insured header lines start new sections and bound row bands
+        markers = []
+        barriers = [(top, bottom) for _, top, bottom in headers]
+        for line in _lines(words):
+            text = " ".join(w[4] for w in line)
+            policy = template.policy_pattern.match(text)
+            insured = template.insured_pattern.match(text)
+            if policy or insured:
+                key, match = ("policy_number", policy) if policy else ("insured_name", insured)
+                markers.append((line[0][1], key, match.group(1).strip()))
+                barriers.append((min(w[1] for w in line), max(w[3] for w in line)))
+
+        table_top = headers[0][2] if headers else 0
+        cells = [
+            (self._column(w, template, x_offset), w) for w in words
+            if w[1] >= table_top and not any(t - 1 <= (w[1] + w[3]) / 2 <= b + 1 for t, b in barriers)
+        ]
+        anchors = sorted(
+            (w for field, w in cells if field == "claim_number" and template.claim_pattern.match(w[4])),
+            key=lambda w: w[1]
+        )
+        if not anchors:
+            return []
+        centers = [(a[1] + a[3]) / 2 for a in anchors]
+
+        # Multi-line cells are kept together by their PyMuPDF block and given to
+        # the row whose claim number is closest to the block's vertical centre.
+        row_cells = [{} for _ in anchors]
+        blocks = {}
+        for field, word in cells:
+            if field:
+                blocks.setdefault((field, word[5]), []).append(word)
+        for (field, _), block_words in blocks.items():
+            middle = (min(w[1] for w in block_words) + max(w[3] for w in block_words)) / 2
+            nearest = min(range(len(anchors)), key=lambda i: abs(centers[i] - middle))
+            if abs(centers[nearest] - middle) <= MAX_CELL_OFFSET:
+                row_cells[nearest].setdefault(field, []).extend(block_words)
+
+        sections = []
+        current = None
+        pending_markers = sorted(markers)
+        for i, anchor in enumerate(anchors):
+            while pending_markers and pending_markers[0][0] < anchor[1]:
+                _, key, value = pending_markers.pop(0)
+                state[key] = value
+                current = None
+            if current is None:
+                current = {"policy_number": state.get("policy_number", ""),
+                           "insured_name": state.get("insured_name", ""), "losses": []}
+                sections.append(current)
+            current["losses"].append(self._build_loss(row_cells[i], centers[i], template))
+
+        for _, key, value in pending_markers:
+            state[key] = value
+        return sections
+
+    def _build_loss(self, row_cells, y: float, template: ColumnTemplate) -> Dict[str, Any]:
+        def value(field):
+            # Single-value cells sit on the claim number's line
+            words = [w for w in row_cells.get(field, []) if abs((w[1] + w[3]) / 2 - y) <= 4]
+            return min(words, key=lambda w: abs((w[1] + w[3]) / 2 - y))[4] if words else ""
+
+        def text(field):
+            words = row_cells.get(field, [])
+            return " ".join(w[4] for w in sorted(words, key=lambda w: (w[5], w[6], w[7])))
+
+        amounts = [parse_money(value(field)) for field in template.amount_columns]
+        amount = "" if None in amounts else f"${sum(amounts):,.2f}"
+        return {
+            "claim_number": value("claim_number"),
+            "date_of_loss": value("date_of_loss"),
+            "amount": amount,
+            "description": text("description")
+        }
+
+    def validate(self, sections: List[Dict], page_text: str, template: ColumnTemplate) -> List[str]:
+        """
+        Return a list of problems with the extracted page; an empty list means it passed.
+        """
+        errors = []
+        losses = [loss for section in sections for loss in section["losses"]]
+        for loss in losses:
+            if not template.claim_pattern.match(loss["claim_number"]):
+                errors.append(f"bad claim number {loss['claim_number']!r}")
+            try:
+                datetime.strptime(loss["date_of_loss"], template.date_format)
+            except ValueError:
+                errors.append(f"bad date {loss['date_of_loss']!r} for {loss['claim_number']}")
+            if not loss["amount"]:
+                errors.append(f"missing amounts for {loss['claim_number']}")
+            if not loss["description"]:
+                errors.append(f"missing description for {loss['claim_number']}")
+        expected = sum(1 for token in page_text.split() if template.claim_pattern.match(token))
+        if expected != len(losses):
+            errors.append(f"found {len(losses)} rows but {expected} claim numbers in page text")
+        return errors
+
+    def iter_extract(self, pages) -> Iterator[tuple]:
+        """
+        Run the template fast path page by page.
+
+        Args:
+            pages: Iterable of (page_number, words, text) tuples, as produced by
+                `PDFParser.iter_page_words`; it is consumed lazily.
+
+        Yields:
+            tuple: ("template", [section, ...]) for a page extracted locally, or
+            ("llm", (page_number, text)) for a page that no template matched or
+            that failed validation.
+        """
+        active = None  # (template, x_offset) carried over to continuation pages
+        state = {}
+
+        for page_number, words, text in pages:
+            matched = None
+            headers = []
+            candidates = ([active[0]] if active else []) + [t for t in self.templates if not active or t is not active[0]]
+            for template in candidates:
+                headers = self._find_headers(words, template)
+                if headers:
+                    matched = (template, headers[0][0])
+                    break
+            if matched is None and active is not None:
+                matched = active
+
+            errors = ["no matching template"]
+            if matched is not None:
+                saved_state = dict(state)
+                sections = self._extract_page(words, matched[0], matched[1], headers, state)
+                errors = self.validate(sections, text, matched[0]) if sections else ["no rows found"]
+                if errors:
+                    state = saved_state
+
+            if errors:
+                logging.info(f"Page {page_number} sent to LLM: {'; '.join(errors[:3])}")
+                active = None
+                yield "llm", (page_number, text)
+            else:
+                active = matched
+                yield "template", sections
+
+    def extract(self, pages) -> Dict[str, Any]:
+        """
+        Run the template fast path over a document.
+
+        Args:
+            pages: Iterable of (page_number, words, text) tuples, as produced by
+                `PDFParser.iter_page_words`.
+
+        Returns:
+            dict: `segments` lists, in page order, ("template", section) entries
+            extracted locally and ("llm", [(page_number, text), ...]) runs of pages
+            that no template matched or that failed validation.
+        """
+        segments = []
+        template_pages = 0
+        fallback_pages = 0
+
+        for kind, value in self.iter_extract(pages):
+            if kind == "llm":
+                if not segments or segments[-1][0] != "llm":
+                    segments.append(("llm", []))
+                segments[-1][1].append(value)
+                fallback_pages += 1
+            else:
+                segments.extend(("template", section) for section in value)
+                template_pages += 1
+
+        logging.info(f"Template fast path handled {template_pages} page(s); {fallback_pages} need the LLM")
+        return {"segments": segments, "template_pages": template_pages, "fallback_pages": fallback_pages}
@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import openai
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/llm_backend.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# One pooled client per (process, settings); rebuilt after a fork so child
+# processes never share sockets with their parent.
+_clients: Dict[tuple, openai.OpenAI] = {}
+_clients_pid = os.getpid()
+_clients_lock = threading.Lock()
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None, timeout: float = 60.0,
+                      connect_timeout: float = 10.0, max_connections: int = 16) -> openai.OpenAI:
+    """
+    Return this process's shared OpenAI client for the given settings, creating it on first use.
+
+    The client keeps connections alive between requests, so chunks after the
+    first reuse an open TLS connection instead of performing a new handshake.
+    Retries are left to the caller (the client's own retries are disabled).
+    """
+    global _clients_pid
+    key = (api_key, base_url, timeout, connect_timeout, max_connections)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                )
+            )
+            client = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                http_client=http_client
+            )
+            _clients[key] = client
+            logging.info(f"Created pooled OpenAI client (base_url: {base_url or 'default'}, pool: {max_connections})")
+        return client
+
+
+class LLMBackend(ABC):
+    """
+    Interface between DataProcessor and a chat completion service.
+
+    `complete` returns the response as a plain dict in the Chat Completions
+    shape ({"choices": [{"message": {"content": ...}}], "usage": {...}});
+    `stream` yields content fragments as they arrive. A backend must
+    implement both; one that does not cannot be instantiated.
+    """
+
+    @abstractmethod
+    def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                 temperature: float) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def stream(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+               temperature: float) -> Iterator[str]:
+        ...
+
+
+class OpenAIBackend(LLMBackend):
+    def __init__(self, api_key, base_url=None, timeout=60.0, connect_timeout=10.0, max_connections=16):
+        """
+        Chat completions through the OpenAI client (or any compatible server).
+
+        Args:
+            api_key (str): API key sent with every request.
+            base_url (str): Alternative endpoint, e.g. the local mock server; None for OpenAI.
+            timeout (float): Read/write timeout per request in seconds.
+            connect_timeout (float): Connection timeout in seconds.
+            max_connections (int): Size of the keep-alive connection pool.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+
+    @property
+    def client(self) -> openai.OpenAI:
+        return get_openai_client(self.api_key, self.base_url, self.timeout,
+                                 self.connect_timeout, self.max_connections)
+
+    def complete(self, messages, model, max_tokens, temperature):
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.model_dump()
+
+    def stream(self, messages, model, max_tokens, temperature):
+        for event in self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        ):
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+
+
+def create_backend(config: Dict[str, Any]) -> LLMBackend:
+    """
+    Build the LLM backend described by the processor configuration.
+    """
+    return OpenAIBackend(
+        api_key=config.get('api_key'),
+        base_url=config.get('llm_base_url'),
+        timeout=config.get('llm_timeout', 60.0),
+        connect_timeout=config.get('llm_connect_timeout', 10.0),
+        max_connections=config.get('llm_max_connections', max(16, int(config.get('max_concurrency', 4))))
+    )
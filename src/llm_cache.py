@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/llm_cache.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def make_cache_key(model: str, temperature: float, max_tokens: int, messages: List[Dict[str, str]]) -> str:
+    """
+    Build a stable cache key from the model, sampling parameters and full message list.
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, db_path="data/cache/llm_cache.sqlite", memory_entries=1024,
+                 max_entries=100000, ttl_seconds=30 * 24 * 3600):
+        """
+        Two-tier cache for completion responses: an in-memory LRU in front of SQLite.
+
+        Args:
+            db_path (str): SQLite file for the persistent tier, or None for memory only.
+            memory_entries (int): Maximum entries held in the in-memory LRU.
+            max_entries (int): Maximum rows kept on disk; oldest-used rows are evicted first.
+            ttl_seconds (float): Entries older than this are treated as misses and purged.
+        """
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            self._conn.commit()
+        logging.info(f"ResponseCache initialized (disk: {db_path}, ttl: {ttl_seconds}s)")
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: Dict, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response for `key`, or None on a miss.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and not self._expired(row[1]):
+                    value = json.loads(row[0])
+                    self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    return value
+                if row:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        Store a response in both tiers and enforce the disk size limit.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """
+        Drop expired rows, then the least recently used rows beyond `max_entries`.
+        """
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and the current hit rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
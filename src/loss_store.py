@@ -0,0 +1,362 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.aggregates import HyperLogLog, LossAggregate, period_totals
+from src.validation import parse_amount, parse_date
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/loss_store.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+LOSS_COLUMNS = ("policy_number", "insured_name", "claim_number", "date_of_loss", "amount", "description")
+# Parsed columns fed to LossAggregate.add, in its argument order
+AGGREGATE_COLUMNS = ("policy_number", "insured_name", "claim_number", "loss_date", "amount_value", "description")
+GROUP_KINDS = (("month", "months"), ("policy", "by_policy"), ("insured", "by_insured"))
+# Claims looked up per query when collecting the previous values of revised claims
+LOOKUP_BATCH = 500
+
+
+class LossStore:
+    def __init__(self, db_path="data/store/losses.sqlite", running_aggregates: bool = True):
+        """
+        Persistent store of extracted losses across documents and editions.
+
+        One row per (policy number, claim number): a claim seen again in a
+        later edition is updated in place. A loss is filed under its own
+        `policy_number` when the extraction gives one (documents covering
+        several policies), else under the document's. Dates and amounts are also stored
+        parsed (`loss_date` as ISO text, `amount_value` as REAL) so range
+        queries and aggregates run in SQL. Lookups by policy use the primary
+        key; claim numbers and dates of loss have their own indexes.
+
+        With `running_aggregates`, each upsert also updates persisted
+        `LossAggregate` totals in the same transaction, from the document's
+        new and revised claims only (see `running_aggregate`).
+
+        Args:
+            db_path (str): SQLite file holding the store.
+            running_aggregates (bool): Maintain the running totals on every upsert.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "document_id TEXT PRIMARY KEY, source TEXT, policy_number TEXT, insured_name TEXT, "
+            "claims INTEGER NOT NULL, stored_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS losses ("
+            "policy_number TEXT NOT NULL, claim_number TEXT NOT NULL, insured_name TEXT, "
+            "date_of_loss TEXT, loss_date TEXT, amount TEXT, amount_value REAL, description TEXT, "
+            "document_id TEXT, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (policy_number, claim_number));"
+            "CREATE INDEX IF NOT EXISTS idx_losses_claim ON losses(claim_number);"
+            "CREATE INDEX IF NOT EXISTS idx_losses_loss_date ON losses(loss_date);"
+            "CREATE TABLE IF NOT EXISTS running_totals ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), claims INTEGER NOT NULL, total REAL NOT NULL, "
+            "min REAL, max REAL, zero INTEGER NOT NULL, undated INTEGER NOT NULL, "
+            "drivers BLOB NOT NULL, claim_sketch BLOB NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS running_groups ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, claims INTEGER NOT NULL, total REAL NOT NULL, "
+            "PRIMARY KEY (kind, key));"
+        )
+        self._conn.commit()
+        self.running_aggregates = running_aggregates
+        if running_aggregates:
+            counted = self.query("SELECT claims FROM running_totals")
+            stored, = self.query("SELECT COUNT(*) FROM losses")[0]
+            if (counted[0][0] if counted else 0) != stored:
+                # Losses were stored while running totals were not kept
+                self.rebuild_aggregates()
+        logging.info(f"LossStore initialized (disk: {db_path})")
+
+    @staticmethod
+    def _row(data: Dict, loss: Dict, document_id: str, now: float) -> Tuple:
+        loss_date = parse_date(loss.get("date_of_loss"))
+        return (
+            loss.get("policy_number") or data.get("policy_number") or "",
+            str(loss.get("claim_number")),
+            data.get("insured_name") or "",
+            loss.get("date_of_loss"),
+            loss_date.date().isoformat() if loss_date else None,
+            None if loss.get("amount") is None else str(loss.get("amount")),
+            parse_amount(loss.get("amount")),
+            loss.get("description"),
+            document_id,
+            now
+        )
+
+    def upsert_document(self, document_id: str, data: Dict, source: Optional[str] = None) -> int:
+        """
+        Store one document's extraction in a single transaction.
+
+        Losses without a claim number are skipped; a claim already stored for
+        the same policy (e.g. from an earlier edition) is overwritten.
+
+        Returns:
+            int: Number of losses written.
+        """
+        now = time.time()
+        # A claim listed twice in one document is stored once, with its last values
+        rows = list({
+            row[:2]: row for row in (
+                self._row(data, loss, document_id, now) for loss in data.get("losses", []) if loss.get("claim_number")
+            )
+        }.values())
+        try:
+            with self._lock, self._conn:
+                if self.running_aggregates:
+                    self._apply_aggregate(self._delta(rows), now)
+                self._conn.executemany(
+                    "INSERT INTO losses (policy_number, claim_number, insured_name, date_of_loss, loss_date, "
+                    "amount, amount_value, description, document_id, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(policy_number, claim_number) DO UPDATE SET "
+                    "insured_name = excluded.insured_name, date_of_loss = excluded.date_of_loss, "
+                    "loss_date = excluded.loss_date, amount = excluded.amount, "
+                    "amount_value = excluded.amount_value, description = excluded.description, "
+                    "document_id = excluded.document_id, updated_at = excluded.updated_at",
+                    rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents "
+                    "(document_id, source, policy_number, insured_name, claims, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (document_id, source, data.get("policy_number") or "", data.get("insured_name") or "",
+                     len(rows), now)
+                )
+            logging.info(f"Stored {len(rows)} loss(es) from {source or document_id}")
+            return len(rows)
+        except Exception as e:
+            logging.error(f"Failed to store losses from {source or document_id}: {e}")
+            raise e
+
+    def _delta(self, rows: List[Tuple]) -> LossAggregate:
+        """
+        Aggregate of a document's rows minus the stored values of the claims they revise.
+
+        Only the document's claims are read back (by primary key), so the cost
+        is proportional to the new claims rather than to the store.
+        """
+        delta = LossAggregate()
+        policies: Dict[str, List[str]] = {}
+        for row in rows:
+            policies.setdefault(row[0], []).append(row[1])
+        for policy_number, claims in policies.items():
+            for start in range(0, len(claims), LOOKUP_BATCH):
+                batch = claims[start:start + LOOKUP_BATCH]
+                previous = self._conn.execute(
+                    f"SELECT {', '.join(AGGREGATE_COLUMNS)} FROM losses "
+                    f"WHERE policy_number = ? AND claim_number IN ({', '.join('?' * len(batch))})",
+                    [policy_number, *batch]
+                )
+                for old in previous:
+                    delta.add(*old, sign=-1)
+        for row in rows:
+            delta.add(row[0], row[2], row[1], row[4], row[6], row[7])
+        return delta
+
+    def _apply_aggregate(self, delta: LossAggregate, now: float, replace: bool = False):
+        """
+        Add `delta` to the persisted running totals (or overwrite them with it when `replace`).
+
+        Runs inside the caller's transaction.
+        """
+        current = None if replace else self._conn.execute(
+            "SELECT claims, total, min, max, zero, undated, drivers, claim_sketch FROM running_totals"
+        ).fetchone()
+        if current is not None:
+            stored = LossAggregate()
+            stored.count, stored.total, stored.min, stored.max, stored.zero, stored.undated = current[:6]
+            stored.drivers = HyperLogLog(registers=current[6])
+            stored.claims = HyperLogLog(registers=current[7])
+            totals = stored.merge(delta)
+        else:
+            totals = delta
+        self._conn.execute(
+            "INSERT OR REPLACE INTO running_totals "
+            "(id, claims, total, min, max, zero, undated, drivers, claim_sketch, updated_at) "
+            "VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (totals.count, totals.total, totals.min, totals.max, totals.zero, totals.undated,
+             bytes(totals.drivers.registers), bytes(totals.claims.registers), now)
+        )
+        if replace:
+            self._conn.execute("DELETE FROM running_groups")
+        self._conn.executemany(
+            "INSERT INTO running_groups (kind, key, claims, total) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(kind, key) DO UPDATE SET "
+            "claims = claims + excluded.claims, total = total + excluded.total",
+            [
+                (kind, key, count, total)
+                for kind, attribute in GROUP_KINDS
+                for key, (count, total) in getattr(delta, attribute).items()
+                if count or total
+            ]
+        )
+
+    def running_aggregate(self) -> LossAggregate:
+        """
+        Load the running totals over every stored loss, without reading the losses.
+
+        Min/max may still reflect a claim revised since the last rebuild.
+        """
+        aggregate = LossAggregate()
+        with self._lock:
+            totals = self._conn.execute(
+                "SELECT claims, total, min, max, zero, undated, drivers, claim_sketch FROM running_totals"
+            ).fetchone()
+            groups = self._conn.execute("SELECT kind, key, claims, total FROM running_groups").fetchall()
+        if totals is not None:
+            aggregate.count, aggregate.total, aggregate.min, aggregate.max, aggregate.zero, aggregate.undated = \
+                totals[:6]
+            aggregate.drivers = HyperLogLog(registers=totals[6])
+            aggregate.claims = HyperLogLog(registers=totals[7])
+        attributes = dict(GROUP_KINDS)
+        for kind, key, count, total in groups:
+            getattr(aggregate, attributes[kind])[key] = [count, total]
+        return aggregate
+
+    def rebuild_aggregates(self, batch_size: int = 50000) -> Dict[str, int]:
+        """
+        Recompute the running totals from every stored loss.
+
+        Streams the losses in batches, then replaces the persisted totals,
+        which also drops empty groups and resets min/max after revisions.
+        Upserts wait until the rebuild has finished.
+        """
+        started = time.monotonic()
+        aggregate = LossAggregate()
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(f"SELECT {', '.join(AGGREGATE_COLUMNS)} FROM losses")
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        aggregate.add(*row)
+                self._apply_aggregate(aggregate, time.time(), replace=True)
+        except Exception as e:
+            logging.error(f"Failed to rebuild running aggregates: {e}")
+            raise e
+        result = {
+            "claims": aggregate.count,
+            "groups": sum(len(getattr(aggregate, attribute)) for _, attribute in GROUP_KINDS),
+            "seconds": round(time.monotonic() - started, 2)
+        }
+        logging.info(f"Rebuilt running aggregates: {result}")
+        return result
+
+    @staticmethod
+    def _where(policy_number=None, claim_number=None, date_from=None, date_to=None) -> Tuple[str, List[Any]]:
+        clauses = []
+        params: List[Any] = []
+        if policy_number is not None:
+            clauses.append("policy_number = ?")
+            params.append(policy_number)
+        if claim_number is not None:
+            clauses.append("claim_number = ?")
+            params.append(claim_number)
+        if date_from is not None:
+            clauses.append("loss_date >= ?")
+            params.append(date_from.isoformat() if isinstance(date_from, date) else date_from)
+        if date_to is not None:
+            clauses.append("loss_date <= ?")
+            params.append(date_to.isoformat() if isinstance(date_to, date) else date_to)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        """
+        Run a read-only SQL query against the store.
+        """
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def losses(self, policy_number=None, claim_number=None, date_from=None, date_to=None) -> List[Dict[str, Any]]:
+        """
+        Return stored losses matching the filters (dates as date objects or 'YYYY-MM-DD').
+        """
+        where, params = self._where(policy_number, claim_number, date_from, date_to)
+        rows = self.query(f"SELECT {', '.join(LOSS_COLUMNS)} FROM losses{where} ORDER BY loss_date, claim_number",
+                          params)
+        return [dict(zip(LOSS_COLUMNS, row)) for row in rows]
+
+    def get_claim(self, claim_number: str) -> List[Dict[str, Any]]:
+        """
+        Look up a claim number across all policies.
+        """
+        return self.losses(claim_number=claim_number)
+
+    def frame(self, policy_number=None, date_from=None, date_to=None) -> pd.DataFrame:
+        """
+        Load matching losses into a DataFrame shaped like `Analytics.load_data`.
+        """
+        where, params = self._where(policy_number, None, date_from, date_to)
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(LOSS_COLUMNS)} FROM losses{where}", self._conn,
+                                     params=params)
+
+    def summary(self, policy_number=None, date_from=None, date_to=None) -> Dict[str, Any]:
+        """
+        Compute the `Analytics.generate_summary` figures in SQL, without loading the losses.
+        """
+        where, params = self._where(policy_number, None, date_from, date_to)
+        dated = f"{where} {'AND' if where else 'WHERE'} loss_date IS NOT NULL"
+        totals = self.query(
+            "SELECT COUNT(*), COALESCE(SUM(COALESCE(amount_value, 0)), 0), AVG(COALESCE(amount_value, 0)), "
+            "MAX(COALESCE(amount_value, 0)), MIN(COALESCE(amount_value, 0)), "
+            "SUM(COALESCE(amount_value, 0) = 0), COUNT(DISTINCT description), SUM(loss_date IS NULL) "
+            f"FROM losses{where}", params
+        )[0]
+        months = self.query(
+            "SELECT substr(loss_date, 1, 7) AS month, COUNT(*), SUM(COALESCE(amount_value, 0)) "
+            f"FROM losses{dated} GROUP BY month", params
+        )
+        periods = period_totals({month: (count, total) for month, count, total in months})
+
+        def grouped(column):
+            rows = self.query(
+                f"SELECT {column}, COUNT(*), SUM(COALESCE(amount_value, 0)), AVG(COALESCE(amount_value, 0)) "
+                f"FROM losses{where} GROUP BY {column} ORDER BY {column}", params
+            )
+            return {
+                str(key): {"claims": count, "total_amount": round(total, 2), "average_amount": round(mean, 2)}
+                for key, count, total, mean in rows
+            }
+
+        summary = {
+            "total_claims": totals[0],
+            "total_amount": float(totals[1]),
+            "average_amount": float(totals[2]) if totals[2] is not None else float("nan"),
+            "max_amount": float(totals[3]) if totals[3] is not None else float("nan"),
+            "min_amount": float(totals[4]) if totals[4] is not None else float("nan"),
+            "zero_amount_claims": totals[5] or 0,
+            "unique_drivers": totals[6] + (1 if self.query(
+                f"SELECT 1 FROM losses{where} {'AND' if where else 'WHERE'} description IS NULL LIMIT 1", params
+            ) else 0),
+            "undated_claims": totals[7] or 0
+        }
+        summary.update(periods)
+        summary["by_policy"] = grouped("policy_number")
+        summary["by_insured"] = grouped("insured_name")
+        return summary
+
+    def stats(self) -> Dict[str, int]:
+        documents, = self.query("SELECT COUNT(*) FROM documents")[0]
+        losses, policies = self.query("SELECT COUNT(*), COUNT(DISTINCT policy_number) FROM losses")[0]
+        return {"documents": documents, "losses": losses, "policies": policies}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,231 @@
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from src.llm_cache import ResponseCache, make_cache_key
+from src.relevance import AMOUNT, RECORD_START
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/mock_llm_server.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+COMPLETIONS_PATH = "/v1/chat/completions"
+_ANCHOR = re.compile(r'^@L\d+ ')
+_POLICY = re.compile(r'\bPolicy\b(?:\s*(?:No\.?|Number|#))?\s*[:#]?\s*([A-Z0-9][A-Z0-9-]*\d)', re.I)
+_INSURED = re.compile(r'\bInsured(?:\s+Name)?\s*:\s*(.+)$', re.I | re.M)
+
+
+def synthesize_completion(messages: List[Dict[str, str]]) -> str:
+    """
+    Build a plausible JSON answer from the prompt text alone.
+
+    Every line that opens a loss row becomes a loss: the first token is the
+    claim number, the second the date, the last money value the amount and the
+    rest of the line the description.
+    """
+    prompt = messages[-1]["content"] if messages else ""
+    text = prompt.split("Text:\n", 1)[-1]
+    policy = _POLICY.search(text)
+    insured = _INSURED.search(text)
+    losses = []
+    for raw in text.splitlines():
+        line = _ANCHOR.sub("", raw.strip())
+        if not RECORD_START.match(line):
+            continue
+        claim_number, date, *rest = line.split()
+        amounts = AMOUNT.findall(line)
+        description = " ".join(token for token in rest if not AMOUNT.fullmatch(token))
+        losses.append({
+            "claim_number": claim_number,
+            "date_of_loss": date,
+            "amount": amounts[-1] if amounts else "$0.00",
+            "description": description
+        })
+    return json.dumps({
+        "policy_number": policy.group(1) if policy else "",
+        "insured_name": insured.group(1).strip() if insured else "",
+        "losses": losses
+    })
+
+
+class MockLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 recorded_path=None, seed=None):
+        """
+        Local stand-in for the Chat Completions endpoint, for offline load tests.
+
+        Responses are replayed from a response cache database recorded by real
+        runs when the request matches, and synthesized from the prompt otherwise.
+
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind; 0 picks a free port.
+            latency (float): Base delay per request in seconds.
+            jitter (float): Extra uniformly random delay of up to this many seconds.
+            error_rate (float): Fraction of requests answered with a 429 or 500 error.
+            recorded_path (str): Response cache SQLite file to replay from, or None.
+            seed (int): Seed for latency jitter and error injection.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.recorded = ResponseCache(recorded_path, memory_entries=0, ttl_seconds=10 ** 10) if recorded_path else None
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                logging.debug(fmt % args)
+
+            def _send(self, status: int, body: bytes, content_type="application/json", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.rstrip("/") != COMPLETIONS_PATH:
+                    self._send(404, b'{"error": {"message": "not found"}}')
+                    return
+                status, payload, stream = server.handle_request(json.loads(body or b"{}"), self.client_address)
+                if status != 200:
+                    headers = {"Retry-After": "0"} if status == 429 else None
+                    self._send(status, json.dumps(payload).encode(), headers=headers)
+                elif stream:
+                    self._send(200, payload, content_type="text/event-stream")
+                else:
+                    self._send(200, json.dumps(payload).encode())
+
+        return Handler
+
+    def _content_for(self, request: Dict) -> Tuple[str, Optional[Dict]]:
+        messages = request.get("messages", [])
+        if self.recorded:
+            key = make_cache_key(request.get("model"), request.get("temperature"), request.get("max_tokens"), messages)
+            recorded = self.recorded.get(key)
+            if recorded:
+                return recorded["choices"][0]["message"]["content"], recorded.get("usage")
+        return synthesize_completion(messages), None
+
+    def handle_request(self, request: Dict, client_address):
+        """
+        Produce (status, payload, stream) for one completion request.
+        """
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rate
+            status = self.random.choice((429, 500)) if fail else 200
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        if fail:
+            return status, {"error": {"message": "injected failure", "type": "mock_error"}}, False
+
+        model = request.get("model", "mock")
+        content, usage = self._content_for(request)
+        if usage is None:
+            prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+            usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if request.get("stream"):
+            events = []
+            for start in range(0, len(content), 40):
+                events.append({
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + 40]}, "finish_reason": None}]
+                })
+            events.append({
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            })
+            lines = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+            return 200, lines.encode(), True
+
+        return 200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }, False
+
+    def start(self) -> "MockLLMServer":
+        """
+        Serve requests on a background thread.
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"Mock LLM server listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.recorded:
+            self.recorded.close()
+        logging.info(f"Mock LLM server stopped after {self.requests} request(s), {self.errors} injected error(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI Chat Completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5, help="Base delay per request in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay of up to this many seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/500.")
+    parser.add_argument("--recorded", help="Response cache SQLite file to replay recorded responses from.")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.recorded, args.seed)
+    print(f"Mock LLM server listening on {server.url} (set llm_base_url to this in config.json)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
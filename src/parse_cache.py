@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/parse_cache.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Compressed bytes decompressed per step when reading an entry back
+READ_BLOCK = 64 * 1024
+
+
+class ParseCacheWriter:
+    """
+    Collects one document's pages as they are extracted, compressing them on the way in.
+
+    Nothing is stored until `commit` is called, so an extraction that stops
+    early never leaves a partial entry behind.
+    """
+
+    def __init__(self, cache, document_id: str, with_words: bool, level: int):
+        self.cache = cache
+        self.document_id = document_id
+        self.with_words = with_words
+        self.page_count = 0
+        self._compressor = zlib.compressobj(level)
+        self._parts = []
+
+    def add(self, text: str, words=None):
+        record = {"text": text}
+        if self.with_words:
+            record["words"] = words
+        self._parts.append(self._compressor.compress((json.dumps(record) + "\n").encode('utf-8')))
+        self.page_count += 1
+
+    def commit(self, metadata: Optional[Dict[str, Any]]):
+        self._parts.append(self._compressor.flush())
+        self.cache.store(self.document_id, b"".join(self._parts), metadata, self.page_count, self.with_words)
+
+
+class ParseCache:
+    def __init__(self, db_path="data/cache/parse_cache.sqlite", max_bytes=512 * 1024 * 1024, level=6):
+        """
+        On-disk cache of extracted page text (and optionally word geometry) keyed by document ID.
+
+        Entries are zlib-compressed JSON lines, one per page, in SQLite. When the
+        compressed total exceeds `max_bytes` the least recently used documents
+        are evicted.
+
+        Args:
+            db_path (str): SQLite file holding the cache.
+            max_bytes (int): Maximum total compressed size kept on disk.
+            level (int): zlib compression level.
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # Several parser processes may share the file; wait for each other's writes
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parses ("
+            "document_id TEXT PRIMARY KEY, data BLOB NOT NULL, metadata TEXT, "
+            "page_count INTEGER NOT NULL, has_words INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parses_last_used ON parses(last_used)")
+        self._conn.commit()
+        logging.info(f"ParseCache initialized (disk: {db_path}, max: {max_bytes} bytes)")
+
+    def writer(self, document_id: str, with_words: bool = False) -> ParseCacheWriter:
+        return ParseCacheWriter(self, document_id, with_words, self.level)
+
+    def store(self, document_id: str, data: bytes, metadata: Optional[Dict[str, Any]],
+              page_count: int, with_words: bool):
+        """
+        Store a compressed document entry and enforce the size limit.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parses "
+                "(document_id, data, metadata, page_count, has_words, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (document_id, data, json.dumps(metadata), page_count, int(with_words), len(data), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+        logging.info(f"Cached parse of {document_id}: {page_count} page(s), {len(data)} bytes compressed")
+
+    def _evict(self):
+        """
+        Drop the least recently used entries beyond `max_bytes` of compressed data.
+        """
+        if not self.max_bytes:
+            return
+        self._conn.execute(
+            "DELETE FROM parses WHERE document_id IN ("
+            "SELECT document_id FROM ("
+            "SELECT document_id, SUM(size) OVER (ORDER BY last_used DESC, document_id) AS running FROM parses"
+            ") WHERE running > ?)",
+            (self.max_bytes,)
+        )
+
+    def read(self, document_id: str, need_words: bool = False) -> Optional[Tuple[Dict, int, Iterator[Dict]]]:
+        """
+        Look up a document.
+
+        Returns:
+            tuple: (metadata, page count, iterator of {"text", "words"} page records),
+            or None on a miss (including entries stored without word geometry
+            when `need_words` is True).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, metadata, page_count, has_words FROM parses WHERE document_id = ?", (document_id,)
+            ).fetchone()
+            if row is None or (need_words and not row[3]):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE parses SET last_used = ? WHERE document_id = ?", (time.time(), document_id))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[1]), row[2], self._iter_records(row[0])
+
+    @staticmethod
+    def _iter_records(data: bytes) -> Iterator[Dict]:
+        decompressor = zlib.decompressobj()
+        pending = b""
+        for start in range(0, len(data), READ_BLOCK):
+            pending += decompressor.decompress(data[start:start + READ_BLOCK])
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield json.loads(line)
+        pending += decompressor.flush()
+        for line in pending.split(b"\n"):
+            if line:
+                yield json.loads(line)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters, entry count and compressed size on disk.
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parses").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "bytes": size
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,6 +1,18 @@
 import fitz  # PyMuPDF
+import hashlib
 import logging
+import math
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Separator placed between pages in extracted text
+PAGE_BREAK = "\f"
+# Parallel extraction only pays for its process start-up when every worker gets at least this many pages
+MIN_PAGES_PER_WORKER = 50
+# Page ranges handed out per worker, so a slow range does not leave other workers idle
+RANGES_PER_WORKER = 4
+# Hex digits of the content hash used as a document ID
+DOCUMENT_ID_LENGTH = 16
 
 # Configure logging
 logging.basicConfig(
@@ -9,34 +21,189 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+def file_document_id(path, length=DOCUMENT_ID_LENGTH):
+    """
+    Return a stable document ID derived from the file contents, hashing it in 1 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+def page_content(page, with_words=False):
+    """
+    Return a page's text, or (words, text) when `with_words` is set.
+    """
+    if with_words:
+        return page.get_text("words"), page.get_text()
+    return page.get_text()
+
+
+def extract_page_range(pdf_path, start, stop, with_words=False):
+    """
+    Process-pool worker: open the PDF and return the `page_content` of pages [start, stop).
+    """
+    with fitz.open(pdf_path) as pdf_document:
+        return [page_content(pdf_document[page_num], with_words) for page_num in range(start, stop)]
+
+
 class PDFParser:
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, cache=None, document_id=None):
         """
         Initialize PDFParser with the path to the PDF file.
+
+        Args:
+            pdf_path (str): PDF to parse.
+            cache (ParseCache): Optional cache of extracted pages keyed by content
+                hash; on a hit the PDF is not opened at all.
+            document_id (str): Content hash already computed by the caller, if any.
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"File not found: {pdf_path}")
         self.pdf_path = pdf_path
+        self.cache = cache
+        self._document_id = document_id
+        # Filled in while the document is open in iter_pages / iter_page_words
+        self.metadata = None
+        self.page_total = None
         logging.info(f"PDFParser initialized for file: {pdf_path}")
 
-    def extract_text(self):
+    @property
+    def document_id(self):
+        """
+        Content hash of the file, identical for byte-identical PDFs under any name.
+        """
+        if self._document_id is None:
+            self._document_id = file_document_id(self.pdf_path)
+        return self._document_id
+
+    def _read_cache(self, need_words):
+        if self.cache is None:
+            return None
+        cached = self.cache.read(self.document_id, need_words)
+        if cached is not None:
+            self.metadata, self.page_total, records = cached
+            logging.info(f"Parse cache hit for {self.pdf_path} ({self.document_id})")
+            return records
+        return None
+
+    def _open(self):
+        pdf_document = fitz.open(self.pdf_path)
+        self.metadata = pdf_document.metadata
+        self.page_total = len(pdf_document)
+        return pdf_document
+
+    def iter_pages(self, workers=None):
+        """
+        Yield the text of each page lazily, opening the file once.
+        Metadata and page count are recorded on the parser when the file is opened.
+        With a cache, pages come from the cache on a hit and are stored on a miss
+        once the last page has been extracted.
+        Args:
+            workers (int): Processes to extract with; None (the default) uses every
+                CPU. Documents too short to give each worker MIN_PAGES_PER_WORKER
+                pages stay serial.
+        Yields:
+            tuple: (page_number, text), page numbers starting at 1.
+        """
+        records = self._read_cache(need_words=False)
+        if records is not None:
+            for page_num, record in enumerate(records):
+                yield page_num + 1, record["text"]
+            return
+        writer = self.cache.writer(self.document_id) if self.cache else None
+        for page_number, text in self._extract_pages(workers):
+            if writer:
+                writer.add(text)
+            yield page_number, text
+        if writer:
+            writer.commit(self.metadata)
+
+    def _extract_pages(self, workers, with_words=False):
+        """
+        Yield (page_number, text), or (page_number, words, text) with `with_words`,
+        serially or in a process pool depending on `workers` and the page count.
+        """
+        # The file is opened once: the page count decides between serial and
+        # parallel, and a serial extraction reads from the same open document
+        workers = workers or os.cpu_count() or 1
+        try:
+            with self._open() as pdf_document:
+                page_total = len(pdf_document)
+                workers = min(workers, page_total // MIN_PAGES_PER_WORKER)
+                if workers <= 1:
+                    for page_num in range(page_total):
+                        content = page_content(pdf_document[page_num], with_words)
+                        yield (page_num + 1, *content) if with_words else (page_num + 1, content)
+                    return
+        except Exception as e:
+            logging.error(f"Failed to extract page text: {e}")
+            raise e
+        yield from self._iter_pages_parallel(page_total, workers, with_words)
+
+    def _iter_pages_parallel(self, page_total, workers, with_words=False):
+        """
+        Extract page ranges in a process pool, each worker opening the file itself,
+        and yield the pages back in order.
+        """
+        range_size = math.ceil(page_total / (workers * RANGES_PER_WORKER))
+        starts = list(range(0, page_total, range_size))
+        stops = [min(start + range_size, page_total) for start in starts]
+        logging.info(f"Extracting {page_total} pages of {self.pdf_path} with {workers} workers ({len(starts)} ranges)")
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                ranges = pool.map(extract_page_range, [self.pdf_path] * len(starts), starts, stops,
+                                  [with_words] * len(starts))
+                for start, contents in zip(starts, ranges):
+                    for offset, content in enumerate(contents):
+                        yield (start + offset + 1, *content) if with_words else (start + offset + 1, content)
+        except Exception as e:
+            logging.error(f"Failed to extract page text in parallel: {e}")
+            raise e
+
+    def extract_text(self, workers=None):
         """
         Extract text content from the PDF file.
+        Pages are separated by a form feed so later stages can respect page boundaries.
+        Args:
+            workers (int): Processes to extract with (see `iter_pages`); None (the default) is automatic.
         Returns:
             str: The extracted text from the PDF.
         """
-        text_content = ""
         try:
-            with fitz.open(self.pdf_path) as pdf_document:
-                for page_num in range(len(pdf_document)):
-                    page = pdf_document[page_num]
-                    text_content += page.get_text()
+            text_content = PAGE_BREAK.join(text for _, text in self.iter_pages(workers))
             logging.info(f"Extracted text from {self.pdf_path}")
         except Exception as e:
             logging.error(f"Failed to extract text: {e}")
             raise e
         return text_content
 
+    def iter_page_words(self, workers=None):
+        """
+        Yield word geometry and text for each page, opening the file once.
+        With a cache, pages come from the cache on a hit and are stored on a miss.
+        Args:
+            workers (int): Processes to extract with, as for `iter_pages`.
+        Yields:
+            tuple: (page_number, words, text) where words are PyMuPDF
+            (x0, y0, x1, y1, word, block_no, line_no, word_no) tuples
+            (lists when served from the cache).
+        """
+        records = self._read_cache(need_words=True)
+        if records is not None:
+            for page_num, record in enumerate(records):
+                yield page_num + 1, record["words"], record["text"]
+            return
+        writer = self.cache.writer(self.document_id, with_words=True) if self.cache else None
+        for page_number, words, text in self._extract_pages(workers, with_words=True):
+            if writer:
+                writer.add(text, words)
+            yield page_number, words, text
+        if writer:
+            writer.commit(self.metadata)
+
     def extract_metadata(self):
         """
         Extract metadata from the PDF file.
@@ -54,15 +221,14 @@ class PDFParser:
 
     def parse_pdf(self):
         """
-        Parse the PDF to extract text and metadata.
+        Parse the PDF to extract text and metadata, opening the file once.
         Returns:
             dict: Dictionary containing text and metadata.
         """
         try:
             text = self.extract_text()
-            metadata = self.extract_metadata()
             result = {
-                "metadata": metadata,
+                "metadata": self.metadata,
                 "text": text
             }
             logging.info(f"Successfully parsed {self.pdf_path}")
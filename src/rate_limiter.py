@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/rate_limiter.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize a thread-safe token bucket.
+
+        Args:
+            capacity (float): Maximum number of tokens the bucket can hold.
+            refill_per_second (float): Tokens added back to the bucket every second.
+        """
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("Token bucket capacity and refill rate must be positive.")
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._last_refill = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Block until `amount` tokens are available, then consume them.
+
+        Requests larger than the bucket capacity are clamped to the capacity so
+        that a single oversized call can never deadlock the caller.
+
+        Returns:
+            float: Total seconds spent waiting.
+        """
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait_time = (amount - self._tokens) / self.refill_per_second
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        Combine a requests-per-minute and a tokens-per-minute bucket.
+
+        Either limit may be omitted (None or 0) to leave that dimension unlimited.
+        """
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+        )
+        logging.info(
+            f"RateLimiter initialized (requests/min: {requests_per_minute}, tokens/min: {tokens_per_minute})"
+        )
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait for capacity to send one request estimated at `tokens` tokens.
+
+        Returns:
+            float: Total seconds spent waiting.
+        """
+        waited = 0.0
+        if self.request_bucket:
+            waited += self.request_bucket.acquire(1)
+        if self.token_bucket and tokens:
+            waited += self.token_bucket.acquire(tokens)
+        if waited:
+            logging.info(f"Rate limiter delayed request by {waited:.2f}s")
+        return waited
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/relevance.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Identifier with letters and digits joined by dashes or slashes, e.g. CLM-2021-0834 or 21/WC/00417
+CLAIM_NUMBER = re.compile(r'\b(?=[A-Z0-9/-]*\d)(?=[A-Z0-9/-]*[A-Z])[A-Z0-9]{1,8}(?:[-/][A-Z0-9]{1,10}){1,4}\b')
+DATE = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-](?:\d{4}|\d{2})\b|\b\d{4}-\d{2}-\d{2}\b')
+AMOUNT = re.compile(r'\$\s?\d[\d,]*(?:\.\d{2})?|\b\d{1,3}(?:,\d{3})+\.\d{2}\b')
+# A line that opens a loss row: a claim identifier followed by a date
+RECORD_START = re.compile(r"^\s*[A-Z0-9][A-Z0-9\-/]*\d[A-Z0-9\-/]*\s+\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b")
+POLICY_HEADER = re.compile(
+    r'\bpolicy\b(?:\s*(?:no\.?|number|#))?\s*[:#]?\s*[A-Z0-9][A-Z0-9-]*\d|\binsured(?:\s+name)?\s*:\s*\S',
+    re.I
+)
+# Policy header with the policy number captured, e.g. "Policy No: PX-1001"
+POLICY_NUMBER = re.compile(r'\bpolicy\b(?:\s*(?:no\.?|number|#))?\s*[:#]?\s*([A-Z0-9][A-Z0-9-]*\d)\b', re.I)
+
+# Points per feature present; a chunk is sent to the LLM when its score reaches the threshold
+FEATURE_WEIGHTS = {
+    "claim_numbers": 3,
+    "policy_headers": 3,
+    "dates": 2,
+    "amounts": 1,
+}
+
+
+class RelevanceFilter:
+    def __init__(self, threshold=3, audit_path="data/output/skipped_chunks.jsonl"):
+        """
+        Cheap local classifier that decides whether a chunk can contain claim data.
+
+        The default threshold is deliberately conservative: a single claim number
+        or policy/insured header is enough to keep a chunk, as is a date together
+        with an amount. Only chunks without any of these (blank pages, cover
+        letters, boilerplate, amount-only totals) are skipped.
+
+        Args:
+            threshold (int): Minimum score for a chunk to be sent to the LLM.
+            audit_path (str): JSONL file that receives every skipped chunk, or None.
+        """
+        self.threshold = threshold
+        self.audit_path = audit_path
+        self.kept = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        logging.info(f"RelevanceFilter initialized (threshold: {threshold}, audit: {audit_path})")
+
+    def features(self, chunk: str) -> Dict[str, int]:
+        """
+        Count the claim-related features in a chunk.
+        """
+        claim_numbers = [m for m in CLAIM_NUMBER.findall(chunk) if not DATE.fullmatch(m)]
+        return {
+            "claim_numbers": len(claim_numbers),
+            "policy_headers": len(POLICY_HEADER.findall(chunk)),
+            "dates": len(DATE.findall(chunk)),
+            "amounts": len(AMOUNT.findall(chunk)),
+        }
+
+    def score(self, chunk: str) -> Tuple[int, Dict[str, int]]:
+        """
+        Score a chunk by which claim-related features it contains.
+        """
+        features = self.features(chunk)
+        score = sum(weight for name, weight in FEATURE_WEIGHTS.items() if features[name])
+        return score, features
+
+    def is_relevant(self, chunk: str, idx: int = 0, record: bool = True) -> bool:
+        """
+        Return True if the chunk should be sent to the LLM; audit it otherwise.
+
+        With `record=False` (e.g. for cost estimates) the counts and audit file are left untouched.
+        """
+        score, features = self.score(chunk)
+        relevant = score >= self.threshold
+        if not record:
+            return relevant
+        with self._lock:
+            if relevant:
+                self.kept += 1
+            else:
+                self.skipped += 1
+                self._audit(idx, chunk, score, features)
+        if not relevant:
+            logging.info(f"Skipping chunk {idx + 1} (score {score} < {self.threshold}): {features}")
+        return relevant
+
+    def _audit(self, idx: int, chunk: str, score: int, features: Dict[str, int]):
+        if not self.audit_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.audit_path) or ".", exist_ok=True)
+            record = {
+                "timestamp": datetime.now().isoformat(timespec='seconds'),
+                "chunk_index": idx,
+                "score": score,
+                "features": features,
+                "text": chunk
+            }
+            with open(self.audit_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except Exception as e:
+            logging.error(f"Failed to write relevance audit record: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.kept + self.skipped
+        return {
+            "kept": self.kept,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / total, 4) if total else 0.0
+        }
+
+    def filter(self, chunks: List[str]) -> List[Tuple[int, str]]:
+        """
+        Return (original index, chunk) pairs for the chunks worth sending.
+        """
+        return [(idx, chunk) for idx, chunk in enumerate(chunks) if self.is_relevant(chunk, idx)]
@@ -0,0 +1,277 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.data_processor import AMOUNT_INSTRUCTION, JSON_ONLY_INSTRUCTION, SYSTEM_MESSAGE
+from src.validation import validate_extraction
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/request_packer.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DOCUMENT_MARKER = "### DOCUMENT {tag}"
+
+
+def split_tokens(total: int, weights: List[int]) -> List[int]:
+    """
+    Split `total` tokens in proportion to `weights`, in whole tokens that add up to `total`.
+    """
+    weight_total = sum(weights)
+    if not weight_total:
+        weights, weight_total = [1] * len(weights), len(weights)
+    exact = [total * weight / weight_total for weight in weights]
+    shares = [int(value) for value in exact]
+    # Hand the tokens lost to rounding down to the largest remainders
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - shares[i], reverse=True)
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+class RequestPacker:
+    def __init__(self, processor, token_limit: Optional[int] = None, max_documents: int = 8,
+                 completion_ratio: float = 0.6):
+        """
+        Send several small documents in one request so they share the fixed prompt overhead.
+
+        Each document's text is tagged (D1, D2, ...) in the prompt and the model
+        answers with one extraction per tag. A document whose answer is
+        missing, malformed or fails `validate_extraction` against its own text
+        is sent again on its own with `process_text`, as are documents too large
+        to pack.
+
+        Args:
+            processor (DataProcessor): Used for chunking, token counting and API calls.
+            token_limit (int): Maximum document text tokens per packed request;
+                defaults to the processor's per-request chunk budget.
+            max_documents (int): Maximum documents per packed request.
+            completion_ratio (float): Expected answer tokens per document text
+                token. A pack is closed before its expected combined answer
+                exceeds the processor's `max_tokens`, so the answer is not cut
+                off and the documents at its end sent again.
+        """
+        self.processor = processor
+        self.token_limit = token_limit or processor.chunk_token_budget()
+        self.max_documents = max_documents
+        self.completion_ratio = completion_ratio
+        self.requests = 0
+        self.packed_documents = 0
+        self.rejected_documents = 0
+        self.single_documents = 0
+        self._lock = threading.Lock()
+
+    def build_messages(self, sections: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a packed request from (tag, text) pairs.
+        """
+        tags = ", ".join(tag for tag, _ in sections)
+        prompt = (
+            "You are an AI assistant specialized in analyzing insurance loss run reports. "
+            "The text below holds several unrelated loss run documents, each starting with a line "
+            f"\"{DOCUMENT_MARKER.format(tag='<tag>')}\". Extract each document on its own, using only its own text, "
+            f"and return one JSON object with one key per document tag ({tags}), each in this format:\n"
+            "{\n"
+            "  \"<tag>\": {\n"
+            "    \"policy_number\": \"\",\n"
+            "    \"insured_name\": \"\",\n"
+            "    \"losses\": [\n"
+            "      {\n"
+            "        \"claim_number\": \"\",\n"
+            "        \"date_of_loss\": \"\",\n"
+            "        \"amount\": \"\",\n"
+            "        \"description\": \"\"\n"
+            "      }\n"
+            "    ]\n"
+            "  }\n"
+            "}\n"
+            f"{AMOUNT_INSTRUCTION}"
+            "Text:\n"
+        )
+        prompt += "\n".join(f"{DOCUMENT_MARKER.format(tag=tag)}\n{text.rstrip()}\n" for tag, text in sections)
+        return [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt + JSON_ONLY_INSTRUCTION}
+        ]
+
+    def expected_answer_tokens(self, tokens: int) -> int:
+        """
+        Expected completion tokens for one document's answer, given its text tokens.
+        """
+        return int(tokens * self.completion_ratio)
+
+    def _pack(self, items: List[Tuple[str, str, int]]) -> List[List[Tuple[str, str, int]]]:
+        """
+        Group (document ID, text, tokens) items into requests within the token,
+        expected answer and document limits, in order.
+        """
+        packs = []
+        current = []
+        current_tokens = 0
+        current_answer = 0
+        for item in items:
+            answer_tokens = self.expected_answer_tokens(item[2])
+            if current and (current_tokens + item[2] > self.token_limit
+                            or current_answer + answer_tokens > self.processor.max_tokens
+                            or len(current) >= self.max_documents):
+                packs.append(current)
+                current = []
+                current_tokens = 0
+                current_answer = 0
+            current.append(item)
+            current_tokens += item[2]
+            current_answer += answer_tokens
+        if current:
+            packs.append(current)
+        return packs
+
+    def _send_pack(self, pack: List[Tuple[str, str, int]]) -> Tuple[Dict[str, Dict], Dict[str, List[Dict]]]:
+        """
+        Send one packed request and split the answer back per document.
+
+        Returns:
+            tuple: ({document ID: data} for the documents answered correctly,
+            {document ID: [usage record]}). The request's tokens and cost are
+            split across the documents by their share of the pack's text tokens
+            (see `split_tokens`); the call itself is counted on the first
+            document, and the others' tiers are marked `shared` and name it in
+            `packed_with`.
+        """
+        tags = {f"D{position}": item for position, item in enumerate(pack, 1)}
+        messages = self.build_messages([(tag, text) for tag, (_, text, _) in tags.items()])
+        model = self.processor.model
+        started = time.monotonic()
+        response = None
+        answer = None
+        try:
+            response, answer, _ = self.processor.complete_chunk(0, messages, model)
+        except Exception as e:
+            logging.error(f"Packed request for {len(pack)} document(s) failed: {e}")
+
+        with self._lock:
+            self.requests += 1
+        results = {}
+        for tag, (document_id, text, _) in tags.items():
+            data = answer.get(tag) if isinstance(answer, dict) else None
+            errors = validate_extraction(data, text) if isinstance(data, dict) else ["missing from packed answer"]
+            if errors:
+                logging.warning(f"Packed answer for {document_id} ({tag}) rejected: {'; '.join(errors[:3])}")
+                continue
+            results[document_id] = data
+        with self._lock:
+            self.packed_documents += len(results)
+            self.rejected_documents += len(pack) - len(results)
+
+        if response is None:
+            return results, {document_id: [] for document_id, _, _ in pack}
+        latency = round(time.monotonic() - started, 3)
+        tokens = response.get('usage') or {}
+        weights = [item_tokens for _, _, item_tokens in pack]
+        prompt_shares = split_tokens(tokens.get('prompt_tokens', 0), weights)
+        completion_shares = split_tokens(tokens.get('completion_tokens', 0), weights)
+        charged = pack[0][0]
+        usage = {}
+        for position, (document_id, _, _) in enumerate(pack):
+            share = {"prompt_tokens": prompt_shares[position], "completion_tokens": completion_shares[position]}
+            tier = dict(
+                share,
+                model=model,
+                latency=latency if position == 0 else 0.0,
+                retries=response.get('retries', 0) if position == 0 else 0,
+                cost=self.processor.calculate_api_cost(
+                    {"usage": share, "cached": response.get('cached')}, model
+                ),
+                cached=bool(response.get('cached')),
+                valid=document_id in results,
+                errors=[] if document_id in results else ["rejected from packed answer"]
+            )
+            if position:
+                tier["shared"] = True
+            record = dict(self.processor.usage_record(0, [tier]), packed_documents=len(pack))
+            if position:
+                record["packed_with"] = charged
+            usage[document_id] = [record]
+        return results, usage
+
+    def process_documents(self, documents: Dict[str, str], return_usage: bool = False,
+                          executor: Optional[Executor] = None):
+        """
+        Extract several documents, packing the small ones into shared requests.
+
+        Args:
+            documents (dict): Document ID -> full text (pages joined with PAGE_BREAK).
+            return_usage (bool): Also return each document's usage records.
+            executor (Executor): Pool to send packed requests and single documents on.
+
+        Returns:
+            dict: Document ID -> merged data, or (data, usage) when `return_usage`
+            is True, where usage maps each document ID to its usage records.
+            A document whose extraction failed is logged and left out of the data.
+        """
+        results: Dict[str, Dict] = {}
+        usage: Dict[str, List[Dict[str, Any]]] = {document_id: [] for document_id in documents}
+        prepared = {}
+        items = []
+        alone = []
+        for document_id, text in documents.items():
+            # Chunked once: documents sent alone reuse these chunks
+            prepared[document_id] = self.processor.prepare_chunks(text)
+            selected = prepared[document_id][1]
+            if not selected:
+                results[document_id] = self.processor.merge_chunks([])
+            elif len(selected) == 1:
+                chunk = selected[0][1]
+                items.append((document_id, chunk, self.processor.token_counter.count(chunk)))
+            else:
+                alone.append(document_id)
+
+        fallback = list(alone)
+        packs = []
+        for pack in self._pack(items):
+            if len(pack) == 1:
+                fallback.append(pack[0][0])
+            else:
+                packs.append(pack)
+        answers = executor.map(self._send_pack, packs) if executor is not None else map(self._send_pack, packs)
+        for pack, (packed, pack_usage) in zip(packs, answers):
+            for document_id, _, _ in pack:
+                usage[document_id].extend(pack_usage[document_id])
+                if document_id in packed:
+                    results[document_id] = self.processor.merge_chunks([packed[document_id]])
+                else:
+                    fallback.append(document_id)
+
+        for document_id in fallback:
+            chunks, selected = prepared[document_id]
+            try:
+                data, document_usage = self.processor.run_chunks(
+                    selected, len(chunks), on_loss=None, return_usage=True, executor=executor
+                )
+            except Exception as e:
+                logging.error(f"Failed to extract {document_id} on its own: {e}")
+                continue
+            results[document_id] = data
+            usage[document_id].extend(document_usage)
+        with self._lock:
+            self.single_documents += len(fallback)
+        logging.info(f"Packed {len(documents)} document(s): {json.dumps(self.stats())}")
+        return (results, usage) if return_usage else results
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return request and document counts so far.
+
+        `rejected_documents` were packed but answered badly and re-sent alone;
+        `single_documents` counts every document sent on its own, including those.
+        """
+        return {
+            "packed_requests": self.requests,
+            "packed_documents": self.packed_documents,
+            "rejected_documents": self.rejected_documents,
+            "single_documents": self.single_documents
+        }
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from src.cost_tracker import price_usage
+from src.layout_extractor import LayoutExtractor
+from src.pdf_parser import PDFParser
+from src.rate_limiter import RateLimiter
+from src.tokenizer import count_message_tokens
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/scheduler.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Weight given to each new actual/estimated cost ratio when updating the correction factor
+CORRECTION_SMOOTHING = 0.3
+# Bounds on each actual/estimated cost ratio, so one outlier cannot swing later estimates far
+CORRECTION_BOUNDS = (0.5, 2.0)
+
+
+class BudgetScheduler:
+    def __init__(self, processor, daily_budget, tokens_per_minute=None,
+                 state_path="data/scheduler/state.json", completion_ratio=0.6, parse_cache=None):
+        """
+        Admit documents to the pipeline in priority order without exceeding a daily spend budget.
+
+        Each document's cost is estimated before any API call from the pages
+        the layout fast path cannot handle: they are chunked exactly as
+        `process_text` would (without touching the filter and compressor
+        stats), prompt tokens are counted and completion tokens are estimated
+        as a share of them, priced across the model cascade. Documents that do
+        not fit in what is left of today's budget are deferred to a persisted
+        queue and retried on the next run; a document that could never fit in
+        a whole day's budget is rejected and reported instead. Actual spend reported back through `reconcile` replaces
+        the reservation and tunes a correction factor applied to later estimates.
+
+        Args:
+            processor (DataProcessor): Used for chunking, prompt building, token counting and model.
+            daily_budget (float): Maximum USD to spend per calendar day.
+            tokens_per_minute (float): Estimated tokens admitted per minute, or None for no pacing.
+            state_path (str): JSON file holding the day's spend, the correction factor and the deferred queue.
+            completion_ratio (float): Initial estimate of completion tokens per prompt token.
+            parse_cache (ParseCache): Optional parse cache, so the document is not
+                parsed again when it is processed after estimation.
+        """
+        self.processor = processor
+        self.daily_budget = float(daily_budget)
+        self.state_path = state_path
+        self.completion_ratio = completion_ratio
+        self.parse_cache = parse_cache
+        self.pacer = RateLimiter(tokens_per_minute=tokens_per_minute)
+        self.reserved = 0.0
+        self.rejected: List[Dict[str, Any]] = []
+        self.state = self._load()
+        logging.info(
+            f"BudgetScheduler initialized (budget: ${self.daily_budget:.2f}/day, spent today: "
+            f"${self.state['spent']:.4f}, queued: {len(self.state['queue'])}, TPM: {tokens_per_minute})"
+        )
+
+    def _load(self) -> Dict[str, Any]:
+        state = {"day": date.today().isoformat(), "spent": 0.0, "correction": 1.0, "queue": [], "history": []}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    state.update(json.load(f))
+            except Exception as e:
+                logging.error(f"Failed to load scheduler state from {self.state_path}: {e}")
+        if state["day"] != date.today().isoformat():
+            logging.info(f"New budget day; resetting spend of ${state['spent']:.4f} from {state['day']}")
+            state.update(day=date.today().isoformat(), spent=0.0, history=[])
+        return state
+
+    def save(self):
+        """
+        Persist the spend, correction factor and deferred queue (written atomically).
+        """
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            temp_path = self.state_path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(self.state, f, indent=4)
+            os.replace(temp_path, self.state_path)
+        except Exception as e:
+            logging.error(f"Failed to save scheduler state: {e}")
+            raise e
+
+    @property
+    def remaining(self) -> float:
+        return self.daily_budget - self.state["spent"] - self.reserved
+
+    def tier_rates(self) -> Dict[str, float]:
+        """
+        Share of chunks expected to reach each cascade tier.
+
+        The first tier sees every chunk; later tiers use the escalation rate
+        observed so far by the processor, or 1.0 (every chunk) before any is known.
+        """
+        stats = self.processor.cascade_stats()
+        rates = {}
+        for tier, model in enumerate(self.processor.model_tiers):
+            calls = stats["models"].get(model, {}).get("calls", 0)
+            rates[model] = 1.0 if tier == 0 or not stats["chunks"] else min(1.0, calls / stats["chunks"])
+        return rates
+
+    def estimate(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        Estimate pages, chunks, tokens and cost of a document without calling the API.
+
+        Token counts are for one pass through the first tier; `raw_cost`
+        prices them on every cascade tier weighted by `tier_rates`.
+        """
+        parser = PDFParser(pdf_path, cache=self.parse_cache)
+        layout = LayoutExtractor().extract(parser.iter_page_words())
+        pages = layout["template_pages"] + layout["fallback_pages"]
+        prompt_tokens = 0
+        completion_tokens = 0
+        chunk_count = 0
+        for kind, segment in layout["segments"]:
+            if kind != "llm":
+                continue
+            for _, chunk in self.processor.iter_prepared_chunks((text for _, text in segment), record=False):
+                tokens = count_message_tokens(self.processor.token_counter, self.processor.build_messages(chunk))
+                prompt_tokens += tokens
+                completion_tokens += min(self.processor.max_tokens, int(tokens * self.completion_ratio))
+                chunk_count += 1
+        raw_cost = sum(
+            rate * price_usage(model, prompt_tokens, completion_tokens) for model, rate in self.tier_rates().items()
+        )
+        return {
+            "pages": pages,
+            "chunks": chunk_count,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens": prompt_tokens + completion_tokens,
+            "raw_cost": round(raw_cost, 6)
+        }
+
+    def submit(self, pdf_path: str, priority: int = 0) -> Dict[str, Any]:
+        """
+        Estimate a document and add it to the queue (higher priority runs first).
+        """
+        existing = next((entry for entry in self.state["queue"] if entry["path"] == pdf_path), None)
+        if existing:
+            existing["priority"] = max(existing["priority"], priority)
+            return existing
+        entry = {"path": pdf_path, "priority": priority, "enqueued_at": time.time(), "estimate": self.estimate(pdf_path)}
+        if self.expected_cost(entry) > self.daily_budget:
+            self.reject(entry)
+            return entry
+        self.state["queue"].append(entry)
+        logging.info(f"Queued {pdf_path} (priority {priority}, estimate {entry['estimate']})")
+        return entry
+
+    def reject(self, entry: Dict[str, Any]):
+        """
+        Drop a document whose expected cost exceeds the whole daily budget; it would otherwise be deferred forever.
+        """
+        entry["rejected"] = True
+        self.rejected.append(entry)
+        logging.warning(
+            f"Rejected {entry['path']}: expected ${self.expected_cost(entry):.4f} exceeds the daily budget "
+            f"of ${self.daily_budget:.2f}"
+        )
+
+    def expected_cost(self, entry: Dict[str, Any]) -> float:
+        return entry["estimate"]["raw_cost"] * self.state["correction"]
+
+    def next_admissible(self) -> Optional[Dict[str, Any]]:
+        """
+        Remove and return the highest-priority queued document whose expected cost fits the remaining budget.
+
+        Lower-priority documents may be admitted ahead of a larger one that does
+        not fit, so the budget is used up as fully as possible. The expected
+        cost is reserved until `reconcile` is called.
+        """
+        ordered = sorted(self.state["queue"], key=lambda entry: (-entry["priority"], entry["enqueued_at"]))
+        for entry in ordered:
+            cost = self.expected_cost(entry)
+            if cost <= self.remaining:
+                self.state["queue"].remove(entry)
+                self.reserved += cost
+                entry["reserved"] = cost
+                self.pacer.acquire(entry["estimate"]["tokens"])
+                logging.info(f"Admitted {entry['path']} (expected ${cost:.4f}, remaining ${self.remaining:.4f})")
+                return entry
+        return None
+
+    @staticmethod
+    def _priced_in_full(entry: Dict[str, Any], summary: Optional[Dict[str, Any]]) -> bool:
+        """
+        True unless the document's CostTracker summary shows that some of the
+        estimated work cost nothing: no API calls, response-cache hits, or
+        fewer chunks sent than estimated (pages reused from the edition store
+        or the job journal).
+        """
+        if summary is None:
+            return True
+        return (summary.get("api_calls", 0) > 0 and not summary.get("cached_calls", 0)
+                and summary.get("chunks", 0) >= entry["estimate"].get("chunks", 0))
+
+    def reconcile(self, entry: Dict[str, Any], actual: Optional[Union[float, Dict[str, Any]]]):
+        """
+        Replace an admitted document's reservation with its actual cost.
+
+        `actual` is the cost or the document's CostTracker summary; pass None
+        when the document failed, and it is put back on the queue. The
+        correction factor follows the ratio of actual to estimated cost,
+        clamped to CORRECTION_BOUNDS, and only learns from documents whose
+        work was all priced (see `_priced_in_full`): cache and edition hits
+        cost about nothing and would pull later estimates down.
+        """
+        expected_cost = entry.pop("reserved", 0.0)
+        self.reserved = max(0.0, self.reserved - expected_cost)
+        if actual is None:
+            self.state["queue"].append(entry)
+            self.save()
+            return
+        summary = actual if isinstance(actual, dict) else None
+        actual_cost = summary["total_cost"] if summary is not None else actual
+        self.state["spent"] = round(self.state["spent"] + actual_cost, 6)
+        raw_cost = entry["estimate"]["raw_cost"]
+        if raw_cost > 0 and self._priced_in_full(entry, summary):
+            ratio = min(max(actual_cost / raw_cost, CORRECTION_BOUNDS[0]), CORRECTION_BOUNDS[1])
+            self.state["correction"] = round(
+                (1 - CORRECTION_SMOOTHING) * self.state["correction"] + CORRECTION_SMOOTHING * ratio, 4
+            )
+        elif raw_cost > 0:
+            logging.info(f"Not learning from {entry['path']}: part of its work was served without API calls")
+        self.state["history"].append({
+            "path": entry["path"],
+            "estimated_cost": round(expected_cost, 6),
+            "actual_cost": round(actual_cost, 6)
+        })
+        logging.info(
+            f"Reconciled {entry['path']}: actual ${actual_cost:.4f} vs estimate ${raw_cost:.4f}; "
+            f"spent ${self.state['spent']:.4f}, correction {self.state['correction']}"
+        )
+        self.save()
+
+    def run(self, process_document: Callable[[str], Union[float, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Process admissible documents one by one until nothing else fits the budget.
+
+        Args:
+            process_document: Called with a document path; returns its actual cost
+                or, better, its CostTracker summary (see `reconcile`), or raises on failure.
+
+        Returns:
+            dict: Processed, failed, deferred and rejected paths, and the day's spend.
+        """
+        processed: List[str] = []
+        failed: List[Dict[str, Any]] = []
+        # Queued on earlier runs, before a lower budget or a higher correction factor
+        for entry in [entry for entry in self.state["queue"] if self.expected_cost(entry) > self.daily_budget]:
+            self.state["queue"].remove(entry)
+            self.reject(entry)
+        while True:
+            entry = self.next_admissible()
+            if entry is None:
+                break
+            try:
+                actual = process_document(entry["path"])
+            except Exception as e:
+                logging.error(f"Scheduled document {entry['path']} failed: {e}")
+                # Held back until the run ends so it is not retried straight away
+                self.reserved = max(0.0, self.reserved - entry.pop("reserved", 0.0))
+                failed.append(entry)
+                continue
+            self.reconcile(entry, actual)
+            processed.append(entry["path"])
+
+        self.state["queue"].extend(failed)
+        self.save()
+        summary = {
+            "processed": processed,
+            "failed": [entry["path"] for entry in failed],
+            "deferred": [entry["path"] for entry in self.state["queue"]],
+            "rejected": [entry["path"] for entry in self.rejected],
+            "spent": self.state["spent"],
+            "budget": self.daily_budget,
+            "correction": self.state["correction"]
+        }
+        logging.info(f"Scheduled run finished: {summary}")
+        return summary
@@ -0,0 +1,111 @@
+import logging
+import math
+import re
+from typing import Dict, List
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to the heuristic counter
+    tiktoken = None
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/tokenizer.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Context window sizes (prompt + completion) by model name prefix
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4-1106': 128000,
+    'gpt-4-0125': 128000,
+    'gpt-4-32k': 32768,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo-16k': 16385,
+    'gpt-3.5-turbo': 16385,
+}
+
+# Tokens added by the chat format for every message, plus the reply primer
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|\s+|[^\sA-Za-z\d]")
+
+
+def get_context_window(model: str, default: int = 8192) -> int:
+    """
+    Return the context window for `model`, matching the longest known prefix.
+    """
+    for prefix in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_CONTEXT_WINDOWS[prefix]
+    return default
+
+
+class HeuristicTokenCounter:
+    """
+    Fast, dependency-free token estimate tuned to over-count slightly.
+
+    Letter runs cost one token per four characters, digit runs one per three,
+    punctuation one each, and whitespace is folded into the following word.
+    """
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        tokens = 0
+        for piece in _PIECE_PATTERN.findall(text):
+            first = piece[0]
+            if first.isspace():
+                tokens += 1 if '\n' in piece else 0
+            elif first.isdigit():
+                tokens += math.ceil(len(piece) / 3)
+            elif first.isalpha():
+                tokens += math.ceil(len(piece) / 4)
+            else:
+                tokens += 1
+        return tokens
+
+
+class TiktokenCounter:
+    """
+    Exact token counts using the local tiktoken BPE for the model.
+    """
+    name = "tiktoken"
+
+    def __init__(self, model: str):
+        if tiktoken is None:
+            raise ImportError("tiktoken is not installed")
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def get_token_counter(model: str, preference: str = "auto"):
+    """
+    Return a token counter for `model`.
+
+    Args:
+        model (str): Model name used to select the tokenizer.
+        preference (str): 'tiktoken', 'heuristic' or 'auto' (tiktoken when available).
+    """
+    if preference in ("auto", "tiktoken"):
+        try:
+            return TiktokenCounter(model)
+        except Exception as e:
+            if preference == "tiktoken":
+                raise
+            logging.info(f"tiktoken unavailable ({e}); using heuristic token counter")
+    return HeuristicTokenCounter()
+
+
+def count_message_tokens(counter, messages: List[Dict[str, str]]) -> int:
+    """
+    Count the prompt tokens of a chat message list, including format overhead.
+    """
+    return sum(counter.count(m["content"]) + TOKENS_PER_MESSAGE for m in messages) + TOKENS_PER_REPLY
@@ -53,6 +53,8 @@ class Transformer:
                 md_file.write("## Losses:\n")
                 for loss in data.get('losses', []):
                     md_file.write(f"- **Claim Number:** {loss.get('claim_number', 'N/A')}\n")
+                    if loss.get('policy_number'):
+                        md_file.write(f"  - **Policy Number:** {loss['policy_number']}\n")
                     md_file.write(f"  - **Date of Loss:** {loss.get('date_of_loss', 'N/A')}\n")
                     md_file.write(f"  - **Amount:** {loss.get('amount', 'N/A')}\n")
                     md_file.write(f"  - **Description:** {loss.get('description', 'N/A')}\n\n")
@@ -0,0 +1,98 @@
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.relevance import RECORD_START
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/validation.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+REQUIRED_LOSS_FIELDS = ("claim_number", "date_of_loss", "amount")
+DATE_FORMATS = (
+    "%m/%d/%Y", "%m/%d/%y", "%m-%d-%Y", "%m-%d-%y", "%Y-%m-%d",
+    "%d-%b-%Y", "%d %b %Y", "%b %d, %Y", "%B %d, %Y"
+)
+_CURRENCY = re.compile(r'^(?:USD|US\$|\$)|USD$', re.I)
+_NUMBER = re.compile(r'^-?\d+(?:\.\d+)?$')
+_ANCHOR = re.compile(r'^@L\d+ ')
+_SPACES = re.compile(r'\s+')
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """
+    Parse a date of loss in any of the accepted formats. Returns None if it does not parse.
+    """
+    text = str(value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """
+    Parse an amount such as 1500, '$1,500.00', '(250.00)' or '1,500 USD'. Returns None if it is not a number.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value or "").strip()
+    negative = text.startswith("(") and text.endswith(")")
+    text = _CURRENCY.sub("", text.strip("()").strip()).strip().replace(",", "").replace(" ", "")
+    if not _NUMBER.match(text):
+        return None
+    return -float(text) if negative else float(text)
+
+
+def count_record_rows(chunk: str) -> int:
+    """
+    Count lines in the chunk that open a loss row (a claim identifier followed by a date).
+    """
+    return sum(1 for line in chunk.splitlines() if RECORD_START.match(_ANCHOR.sub("", line.strip())))
+
+
+def validate_extraction(data: Optional[Dict], chunk: str) -> List[str]:
+    """
+    Check a chunk's extracted data against the loss schema.
+
+    Every loss needs a claim number, a parseable date of loss and a parseable
+    amount; each claim number must appear in the chunk text; and there must be
+    at least as many losses as lines in the chunk that open a loss row.
+
+    Returns:
+        list: Problems found; an empty list means the extraction passed.
+    """
+    if not isinstance(data, dict):
+        return ["result is not a JSON object"]
+    losses = data.get("losses")
+    if not isinstance(losses, list):
+        return ["missing losses list"]
+
+    errors = []
+    source = _SPACES.sub(" ", chunk)
+    for position, loss in enumerate(losses, 1):
+        if not isinstance(loss, dict):
+            errors.append(f"loss {position} is not an object")
+            continue
+        label = loss.get("claim_number") or f"loss {position}"
+        missing = [field for field in REQUIRED_LOSS_FIELDS if loss.get(field) in (None, "")]
+        if missing:
+            errors.append(f"{label}: missing {', '.join(missing)}")
+        if loss.get("date_of_loss") and parse_date(loss["date_of_loss"]) is None:
+            errors.append(f"{label}: unparseable date {loss['date_of_loss']!r}")
+        if loss.get("amount") not in (None, "") and parse_amount(loss["amount"]) is None:
+            errors.append(f"{label}: unparseable amount {loss['amount']!r}")
+        claim_number = str(loss.get("claim_number") or "")
+        if claim_number and _SPACES.sub(" ", claim_number) not in source:
+            errors.append(f"{label}: claim number not found in chunk text")
+
+    expected = count_record_rows(chunk)
+    if len(losses) < expected:
+        errors.append(f"extracted {len(losses)} loss(es) but chunk has {expected} claim row(s)")
+    return errors
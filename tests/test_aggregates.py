@@ -0,0 +1,87 @@
+import math
+import os
+import tempfile
+import unittest
+
+from src.aggregates import HyperLogLog, LossAggregate
+from src.analytics import Analytics
+from src.loss_store import LossStore
+from tests.test_loss_store import EDITION_1, EDITION_2, OTHER_POLICY
+
+EXACT_KEYS = ("total_claims", "zero_amount_claims", "undated_claims", "claims_by_month", "amount_by_month",
+              "claims_by_year", "by_policy", "by_insured")
+
+
+class TestAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "losses.sqlite")
+        self.store = LossStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def assertSummaryEqual(self, summary, expected):
+        for key in EXACT_KEYS:
+            self.assertEqual(summary[key], expected[key], key)
+        for key in ("total_amount", "average_amount"):
+            self.assertTrue(math.isclose(summary[key], expected[key]), key)
+
+    def test_hyperloglog_estimates_and_merges(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for n in range(30000):
+            (first if n % 2 else second).add(f"driver-{n}")
+            first.add(f"driver-{n % 100}")
+        first.merge(second)
+        self.assertLess(abs(first.count() - 30000) / 30000, 0.05)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_running_totals_follow_revised_editions(self):
+        self.store.upsert_document("doc-1", EDITION_1)
+        self.store.upsert_document("doc-2", EDITION_2)
+        self.store.upsert_document("doc-3", OTHER_POLICY)
+
+        running = Analytics(store=self.store, running=True).run()
+        self.assertSummaryEqual(running, self.store.summary())
+        self.assertEqual(running["unique_claims"], 5)
+        self.assertEqual(running["unique_drivers"], 4)
+        self.assertEqual(running["max_amount"], 1800.0)
+
+        # Revised down: the old maximum survives in the running totals until a rebuild
+        self.store.upsert_document("doc-4", dict(EDITION_2, losses=[dict(EDITION_2["losses"][0], amount="$900.00")]))
+        running = Analytics(store=self.store, running=True).run()
+        self.assertSummaryEqual(running, self.store.summary())
+        self.assertEqual(running["max_amount"], 1800.0)
+
+        self.store.rebuild_aggregates()
+        running = Analytics(store=self.store, running=True).run()
+        self.assertSummaryEqual(running, self.store.summary())
+        self.assertEqual(running["max_amount"], 900.0)
+
+    def test_partial_aggregates_merge(self):
+        combined = LossAggregate()
+        for data in (EDITION_1, OTHER_POLICY):
+            part = LossAggregate()
+            part.add_document(data)
+            combined.merge(part)
+        self.store.upsert_document("doc-1", EDITION_1)
+        self.store.upsert_document("doc-3", OTHER_POLICY)
+        self.assertSummaryEqual(combined.summary(), self.store.summary())
+        self.assertEqual((combined.min, combined.max), (-250.0, 1200.0))
+
+    def test_totals_are_rebuilt_when_out_of_step(self):
+        self.store.close()
+        self.store = LossStore(self.path, running_aggregates=False)
+        self.store.upsert_document("doc-1", EDITION_1)
+        self.store.close()
+
+        self.store = LossStore(self.path)
+        self.assertEqual(self.store.running_aggregate().count, 3)
+        with self.assertRaises(ValueError):
+            Analytics(store=self.store, running=True, policy_number="PX-1001")
+
+
+if __name__ == '__main__':
+    unittest.main()
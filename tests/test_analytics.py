@@ -0,0 +1,43 @@
+import unittest
+
+import pandas as pd
+
+from src.analytics import Analytics, parse_amounts, parse_dates
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def test_amounts_and_dates_are_parsed_column_wise(self):
+        amounts = pd.Series(["$1,200.00", "(250.00)", "1,500 USD", 300, "", None, "n/a", "$1,200.00"])
+        self.assertEqual(parse_amounts(amounts).fillna(-1).tolist(),
+                         [1200.0, -250.0, 1500.0, 300.0, -1, -1, -1, 1200.0])
+
+        dates = parse_dates(pd.Series(["01/05/2023", "2023-02-10", "5-Mar-2022", "bad", None, " 12/31/21"]))
+        self.assertEqual([d.strftime("%Y-%m-%d") if pd.notna(d) else None for d in dates],
+                         ["2023-01-05", "2023-02-10", "2022-03-05", None, None, "2021-12-31"])
+
+    def test_summary_resamples_by_period_and_groups_by_policy(self):
+        losses = [
+            {"claim_number": "A-1", "date_of_loss": "01/05/2023", "amount": "$1,000.00", "description": "x"},
+            {"claim_number": "A-2", "date_of_loss": "01/20/2023", "amount": "$500.00", "description": "y"},
+            {"claim_number": "A-3", "date_of_loss": "2023-03-02", "amount": "(100.00)", "description": "x"},
+            {"claim_number": "A-4", "date_of_loss": "unknown", "amount": "n/a", "description": "z"}
+        ]
+        analytics = Analytics(data={"policy_number": "PX-1", "insured_name": "Acme", "losses": losses})
+        df = analytics.load_data()
+        other = df.iloc[[0]].assign(policy_number="PX-2", insured_name="Beta")
+        summary = analytics.generate_summary(pd.concat([df, other], ignore_index=True))
+
+        self.assertEqual(summary["total_claims"], 5)
+        self.assertEqual(summary["total_amount"], 2400.0)
+        self.assertEqual(summary["zero_amount_claims"], 1)
+        self.assertEqual(summary["undated_claims"], 1)
+        self.assertEqual(summary["claims_by_month"], {"2023-01": 3, "2023-02": 0, "2023-03": 1})
+        self.assertEqual(summary["amount_by_month"]["2023-03"], -100.0)
+        self.assertEqual(summary["claims_by_year"], {"2023": {"claims": 4, "total_amount": 2400.0}})
+        self.assertEqual(summary["by_policy"]["PX-1"], {"claims": 4, "total_amount": 1400.0, "average_amount": 350.0})
+        self.assertEqual(summary["by_insured"]["Beta"]["claims"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
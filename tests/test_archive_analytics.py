@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.aggregates import LossAggregate
+from src.analytics import Analytics
+
+
+def make_document(n):
+    return {
+        "policy_number": f"PX-{n % 3}",
+        "insured_name": f"Fleet {n % 3}",
+        "losses": [
+            {"claim_number": f"CLM-{n}-{i}", "date_of_loss": f"{1 + i:02d}/15/2023", "amount": f"${n * 100 + i}.00",
+             "description": f"Driver {i}"}
+            for i in range(4)
+        ]
+    }
+
+
+class TestArchiveAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.expected = LossAggregate()
+        for n in range(10):
+            folder = os.path.join(self.tmp.name, f"carrier_{n % 2}")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"report_{n}.json"), "w") as f:
+                json.dump(make_document(n), f)
+            self.expected.add_document(make_document(n))
+        with open(os.path.join(self.tmp.name, "api_cost_report.json"), "w") as f:
+            json.dump({"documents": []}, f)
+        with open(os.path.join(self.tmp.name, "truncated.json"), "w") as f:
+            f.write('{"losses": [')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_directory_is_summarized_from_partial_aggregates(self):
+        updates = []
+        analytics = Analytics(data_file=self.tmp.name, workers=2, batch_size=3, progress=updates.append)
+        summary = analytics.run()
+
+        self.assertEqual(summary, self.expected.summary())
+        self.assertEqual(summary["total_claims"], 40)
+        stats = analytics.archive_stats
+        self.assertEqual((stats["files"], stats["skipped"], stats["failed"], stats["batches"]), (10, 1, 1, 4))
+        self.assertEqual([update["batches"] for update in updates], [1, 2, 3, 4])
+
+    def test_glob_selects_files(self):
+        pattern = os.path.join(self.tmp.name, "carrier_0", "*.json")
+        analytics = Analytics(data_file=pattern, workers=1)
+        self.assertEqual(analytics.run()["total_claims"], 20)
+        self.assertEqual(analytics.archive_stats["files"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
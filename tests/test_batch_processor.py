@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.batch_processor import BatchProcessor, split_custom_id
+from src.loss_store import LossStore
+from tests.test_data_processor import make_processor
+from tests.test_run_pipeline import write_pdf
+
+
+def result_line(custom_id, content):
+    return json.dumps({
+        "custom_id": custom_id,
+        "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+        "error": None
+    }) + "\n"
+
+
+class TestBatchProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.sample_pdf = "data/input/sample.pdf"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_and_ingest_round_trip(self):
+        """
+        Requests are written per chunk and locally generated results merge back per document.
+        """
+        processor = make_processor(tokenizer="heuristic", chunk_token_limit=600)
+        batch = BatchProcessor(processor, output_dir=self.temp_dir.name)
+        requests_path = os.path.join(self.temp_dir.name, "batch_requests.jsonl")
+
+        manifest_path = batch.write_requests([self.sample_pdf], requests_path)
+
+        with open(requests_path) as f:
+            requests = [json.loads(line) for line in f]
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        self.assertGreater(len(requests), 1)
+        self.assertEqual(len({r["custom_id"] for r in requests}), len(requests))
+        self.assertEqual(len(list(manifest.values())[0]["chunks"]), len(requests))
+
+        # Second run produces identical custom IDs
+        batch.write_requests([self.sample_pdf], requests_path + ".again")
+        with open(requests_path + ".again") as f:
+            self.assertEqual([json.loads(line)["custom_id"] for line in f], [r["custom_id"] for r in requests])
+
+        # Simulate the Batch API output, in shuffled order and with a trailing comma
+        results_path = os.path.join(self.temp_dir.name, "batch_results.jsonl")
+        with open(results_path, 'w') as f:
+            for request in reversed(requests):
+                _, idx = split_custom_id(request["custom_id"])
+                content = '{"policy_number": "LTCM-789234-01", "losses": [{"claim_number": "C-%d"},]}' % idx
+                f.write(result_line(request["custom_id"], content))
+
+        documents = batch.ingest_results(results_path, manifest_path)
+
+        document_id, merged = list(documents.items())[0]
+        self.assertEqual([loss["claim_number"] for loss in merged["losses"]],
+                         [f"C-{i}" for i in range(len(requests))])
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, f"{document_id}.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, f"{document_id}.md")))
+
+    def test_same_named_pdfs_and_malformed_results(self):
+        """
+        Same-named PDFs keep separate outputs, a malformed result line fails only its chunk,
+        and ingested documents are upserted into the loss store.
+        """
+        paths = []
+        for folder, policy in (("carrier_a", "PA-100"), ("carrier_b", "PB-200")):
+            os.makedirs(os.path.join(self.temp_dir.name, folder))
+            path = os.path.join(self.temp_dir.name, folder, "loss_run.pdf")
+            write_pdf(path, [f"Policy Number: {policy}", "CLM-1 01/05/2023 $1,200.00 Collision"])
+            paths.append(path)
+        store = LossStore(os.path.join(self.temp_dir.name, "losses.sqlite"))
+        self.addCleanup(store.close)
+        output_dir = os.path.join(self.temp_dir.name, "output")
+        batch = BatchProcessor(make_processor(), output_dir=output_dir, loss_store=store)
+        requests_path = os.path.join(self.temp_dir.name, "batch_requests.jsonl")
+        manifest_path = batch.write_requests(paths, requests_path)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        with open(requests_path) as f:
+            custom_ids = [json.loads(line)["custom_id"] for line in f]
+        self.assertEqual(len(custom_ids), 2)
+
+        results_path = os.path.join(self.temp_dir.name, "batch_results.jsonl")
+        with open(results_path, 'w') as f:
+            f.write("not json\n")
+            f.write(json.dumps({"custom_id": custom_ids[1], "response": {"status_code": 200, "body": {}}}) + "\n")
+            f.write(result_line(custom_ids[0], '{"policy_number": "PA-100", "losses": [{"claim_number": "CLM-1"}]}'))
+            f.write(result_line(custom_ids[1], '{"policy_number": "PB-200", "losses": [{"claim_number": "CLM-1"}]}'))
+
+        documents = batch.ingest_results(results_path, manifest_path)
+
+        self.assertEqual(sorted(documents), sorted(manifest))
+        for document_id, entry in manifest.items():
+            with open(os.path.join(output_dir, f"{document_id}.json")) as f:
+                self.assertEqual(json.load(f)["policy_number"], "PA-100" if "carrier_a" in entry["source"] else "PB-200")
+        self.assertEqual(store.stats(), {"documents": 2, "losses": 2, "policies": 2})
+
+        # A malformed line is recorded as a failed chunk rather than aborting the ingest
+        with open(results_path, 'w') as f:
+            f.write(json.dumps({"custom_id": custom_ids[1], "response": {"status_code": 200, "body": {}}}) + "\n")
+            f.write(result_line(custom_ids[0], '{"policy_number": "PA-100", "losses": [{"claim_number": "CLM-1"}]}'))
+        self.assertEqual(list(batch.ingest_results(results_path, manifest_path)),
+                         [split_custom_id(custom_ids[0])[0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from src.compressor import PromptCompressor
+from src.tokenizer import HeuristicTokenCounter
+
+PAGE = (
+    "Liberty Trust Insurance - Loss Run Report\n"
+    "Policy LTCM-789234-01\n"
+    "{rows}"
+    "--------------------------------------------\n"
+    "Page {page} of 3\n"
+    "Confidential - prepared for the insured\n"
+)
+ROW = "CLM-2021-{n:04d}   04/04/2021   PD\nCLOSED\nINSD VEH STRUCK\nCLMT VEH.\n$590.59\nJohn    Smith\n"
+BOILERPLATE = "".join(f"This paragraph of terms and conditions is number {word}.\n" for word in "abcdefghijkl")
+
+
+class TestPromptCompressor(unittest.TestCase):
+
+    def setUp(self):
+        self.compressor = PromptCompressor(HeuristicTokenCounter(), context_lines=4)
+
+    def test_strips_repeated_page_furniture(self):
+        text = "\f".join(PAGE.format(rows=ROW.format(n=page), page=page) for page in range(1, 4))
+        cleaned = self.compressor.strip_page_furniture(text)
+        self.assertEqual(cleaned.count("Liberty Trust Insurance - Loss Run Report"), 1)
+        self.assertEqual(cleaned.count("Confidential - prepared for the insured"), 1)
+        self.assertNotIn("Page 2 of 3", cleaned)
+        for page in range(1, 4):
+            self.assertIn(f"CLM-2021-{page:04d}", cleaned)
+
+    def test_repeated_cells_in_the_page_body_survive(self):
+        """
+        One-cell-per-line rows repeat amounts, names and numeric claim numbers; only page edges are furniture.
+        """
+        cell_rows = "".join(f"{{claim}}{n}\n04/04/2021\nFleet One LLC\n$0.00\n" for n in range(8))
+        text = "\f".join(
+            PAGE.format(rows=cell_rows.format(claim=2021000 + page * 10), page=page) + f"{page}\n"
+            for page in range(1, 4)
+        )
+        cleaned = self.compressor.strip_page_furniture(text)
+        self.assertFalse([line for line in cleaned.splitlines() if line in ("1", "2", "3")])
+        self.assertEqual(cleaned.count("$0.00"), 24)
+        self.assertEqual(cleaned.count("Fleet One LLC"), 24)
+        self.assertEqual(len([line for line in cleaned.splitlines() if line.startswith("20210")]), 24)
+        self.assertEqual(cleaned.count("Liberty Trust Insurance - Loss Run Report"), 1)
+        self.assertNotIn("Page 3 of 3", cleaned)
+        self.assertEqual("\f".join(self.compressor.iter_strip_page_furniture(text.split("\f"))), cleaned)
+
+    def test_compress_keeps_claim_rows_and_reports_savings(self):
+        """
+        Claim rows and their descriptions survive; boilerplate, separators and whitespace runs do not.
+        """
+        chunk = BOILERPLATE + "=" * 40 + "\n" + ROW.format(n=1) + ROW.format(n=2) + BOILERPLATE
+        compacted, stats = self.compressor.compress(chunk)
+
+        self.assertLess(stats["tokens_after"], stats["tokens_before"] * 0.6)
+        self.assertIn("CLM-2021-0001 04/04/2021 PD", compacted)
+        self.assertIn("CLM-2021-0002 04/04/2021 PD", compacted)
+        self.assertIn("INSD VEH STRUCK", compacted)
+        self.assertIn("John Smith", compacted)
+        self.assertNotIn("=====", compacted)
+        self.assertNotIn("number f.", compacted)
+        self.assertTrue(compacted.startswith("@L"))
+        self.assertEqual(self.compressor.stats()["tokens_saved"], stats["tokens_before"] - stats["tokens_after"])
+
+
+if __name__ == '__main__':
+    unittest.main()
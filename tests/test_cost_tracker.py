@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.cost_tracker import CostTracker, percentile, price_usage
+from tests.test_data_processor import make_processor, make_response
+
+
+class TestCostTracker(unittest.TestCase):
+
+    def test_pricing_and_percentiles(self):
+        self.assertAlmostEqual(price_usage("gpt-4-0613", 1000, 1000), 0.09)
+        self.assertAlmostEqual(price_usage("gpt-3.5-turbo-1106", 1000, 1000), 0.0035)
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 50), 3)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_usage_from_process_text_rolls_up_per_document_and_run(self):
+        processor = make_processor(model="gpt-4", chunk_token_limit=40, prompt_compression=False)
+        text = "CLM-2021-0834 04/04/2021 PD Open Rear-end collision $7,078.24\n" * 6
+        response = make_response('{"losses": [{"claim_number": "CLM-2021-0834"}]}', 1000, 500)
+        with mock.patch.object(processor, '_call_api', return_value=response):
+            data, usage = processor.process_text(text, return_usage=True)
+
+        self.assertGreater(len(usage), 1)
+        self.assertEqual([u["chunk_index"] for u in usage], sorted(u["chunk_index"] for u in usage))
+        self.assertTrue(all(u["prompt_tokens"] == 1000 and not u["cached"] and u["retries"] == 0 for u in usage))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            tracker = CostTracker(output_dir)
+            summaries = [
+                tracker.summarize_document("a.pdf", usage, pages=2, claims=len(data["losses"])),
+                tracker.summarize_document("b.pdf", [], pages=1, claims=0)
+            ]
+            report = tracker.run_documents(summaries)
+            with open(os.path.join(output_dir, "api_cost_report.json")) as f:
+                saved = json.load(f)
+
+        calls = len(usage)
+        self.assertEqual(report["run"]["api_calls"], calls)
+        self.assertAlmostEqual(report["total_cost"], round(calls * 0.06, 4))
+        self.assertEqual(report["documents"][0]["tokens_per_page"], calls * 1500 / 2)
+        self.assertAlmostEqual(report["documents"][0]["cost_per_claim"], round(calls * 0.06, 4))
+        self.assertEqual(report["documents"][1]["total_cost"], 0)
+        self.assertIn("latency_p99", saved["run"])
+
+
+if __name__ == '__main__':
+    unittest.main()
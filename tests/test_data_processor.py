@@ -0,0 +1,295 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.data_processor import DataProcessor
+from src.llm_cache import ResponseCache
+
+
+def make_processor(**overrides):
+    """
+    Build a DataProcessor from a temporary config file with a dummy API key.
+    """
+    config = {"api_key": "test-key", "cache_enabled": False, "relevance_audit_path": None}
+    config.update(overrides)
+    handle, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(handle, 'w') as f:
+        json.dump(config, f)
+    try:
+        return DataProcessor(config_path=path)
+    finally:
+        os.remove(path)
+
+
+def make_response(content, prompt_tokens=100, completion_tokens=50):
+    return {
+        "choices": [{"message": {"content": content}}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestConcurrentProcessing(unittest.TestCase):
+
+    def test_chunks_run_concurrently_and_merge_in_order(self):
+        """
+        Chunks are sent in parallel but merged in their original order.
+        """
+        processor = make_processor(max_concurrency=4)
+        chunks = [f"CLM-{i}" for i in range(4)]
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_call(messages, model=None):
+            claim = messages[1]["content"].split("Text:\n")[1].split("\n")[0]
+            with lock:
+                in_flight.append(claim)
+                peak.append(len(in_flight))
+            # Later chunks finish first to prove ordering does not depend on timing
+            time.sleep(0.05 * (4 - int(claim.split("-")[1])))
+            with lock:
+                in_flight.remove(claim)
+            return make_response(json.dumps({"losses": [{"claim_number": claim}]}))
+
+        with mock.patch.object(processor, 'chunk_text', return_value=chunks), \
+                mock.patch.object(processor, '_call_api', side_effect=fake_call):
+            result = processor.process_text("ignored")
+
+        self.assertEqual([loss["claim_number"] for loss in result["losses"]], chunks)
+        self.assertGreater(max(peak), 1)
+
+    def test_merge_keeps_same_claim_numbers_of_different_policies(self):
+        merged = make_processor().merge_chunks([
+            {"policy_number": "PX-1", "losses": [{"claim_number": "CLM-1"}, {"claim_number": "CLM-2"}]},
+            # A continuation chunk without a header repeats a claim across the boundary
+            {"policy_number": "", "losses": [{"claim_number": "CLM-2"}]},
+            {"policy_number": "PX-2", "losses": [{"claim_number": "CLM-1"}]}
+        ])
+        self.assertEqual(merged["policy_number"], "PX-1")
+        self.assertEqual([(loss["claim_number"], loss.get("policy_number")) for loss in merged["losses"]],
+                         [("CLM-1", None), ("CLM-2", None), ("CLM-1", "PX-2")])
+
+    def test_retries_rate_limit_errors(self):
+        """
+        429 responses are retried with backoff; other client errors are not.
+        """
+        processor = make_processor(max_retries=3, retry_base_delay=0.001)
+        calls = [HTTPError(429), HTTPError(503), make_response('{"losses": []}')]
+
+        def fake_call(messages, model=None):
+            outcome = calls.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with mock.patch.object(processor, '_call_api', side_effect=fake_call):
+            response = processor._create_completion(processor.build_messages("text"))
+        self.assertEqual(response["choices"][0]["message"]["content"], '{"losses": []}')
+
+        with mock.patch.object(processor, '_call_api', side_effect=HTTPError(400)) as call:
+            with self.assertRaises(HTTPError):
+                processor._create_completion(processor.build_messages("text"))
+        self.assertEqual(call.call_count, 1)
+
+
+class TestTokenAwareChunking(unittest.TestCase):
+
+    def test_chunks_fill_budget_and_keep_rows_intact(self):
+        """
+        Chunks stay within the token budget, break only at lines and never split a loss row.
+        """
+        processor = make_processor(tokenizer="heuristic", chunk_token_limit=120)
+        rows = [
+            f"CLM-2021-{i:04d} 04/{i % 28 + 1:02d}/2021 PD\nCLOSED\nINSD VEH STRUCK CLMT VEH\n$1,000.00\nJohn Smith\n"
+            for i in range(30)
+        ]
+        text = "Policy LTCM-1\nInsured: Mountain Valley\n" + "".join(rows[:15]) + "\f" + "".join(rows[15:])
+
+        chunks = processor.chunk_text(text)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text.replace("\f", ""))
+        for chunk in chunks:
+            self.assertLessEqual(processor.token_counter.count(chunk), 120)
+            self.assertTrue(chunk.endswith("John Smith\n"))
+
+    def test_budget_accounts_for_prompt_and_completion_reserve(self):
+        processor = make_processor(tokenizer="heuristic", model="gpt-4", max_tokens=1000, context_fill_ratio=0.5)
+        budget = processor.chunk_token_budget()
+        self.assertLess(budget, 8192 * 0.5 - 1000)
+        self.assertGreater(budget, 2000)
+
+
+class TestRelevanceFilter(unittest.TestCase):
+
+    def test_irrelevant_chunks_are_skipped_and_audited(self):
+        """
+        Blank, boilerplate and totals-only chunks never reach the API and are written to the audit log.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            audit_path = os.path.join(temp_dir, "skipped.jsonl")
+            processor = make_processor(relevance_audit_path=audit_path)
+            chunks = [
+                "Loss Run Report - Liberty Trust Insurance\nThis report is confidential.\n",
+                "   \n\n",
+                "Totals\n$75,000.00 $0.00\n$224,005.42 $1,368.80\n",
+                "CLM-2021-0834 04/04/2021 PD CLOSED $590.59 John Smith\n",
+                "Policy LTCM-789234-02\nInsured: Mountain Valley Transport LLC\n",
+            ]
+
+            with mock.patch.object(processor, 'chunk_text', return_value=chunks), \
+                    mock.patch.object(processor, '_call_api',
+                                      return_value=make_response('{"losses": []}')) as call:
+                processor.process_text("ignored")
+
+            self.assertEqual(call.call_count, 2)
+            self.assertEqual(processor.relevance_filter.stats()["skipped"], 3)
+            with open(audit_path) as f:
+                audited = [json.loads(line) for line in f]
+            self.assertEqual([record["chunk_index"] for record in audited], [0, 1, 2])
+            self.assertEqual(audited[2]["text"], chunks[2])
+
+    def test_all_chunks_skipped_returns_empty_structure(self):
+        processor = make_processor()
+        with mock.patch.object(processor, '_call_api') as call:
+            result = processor.process_text("Page intentionally left blank.")
+        call.assert_not_called()
+        self.assertEqual(result, {"policy_number": "", "insured_name": "", "losses": []})
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_second_run_is_served_from_cache_at_zero_cost(self):
+        """
+        Re-processing the same text hits the cache, skips the API and is reported as free.
+        """
+        processor = make_processor(cache_enabled=True, cache_path=self.db_path)
+        response = make_response('{"policy_number": "P-1", "losses": [{"claim_number": "C-1"}]}')
+
+        with mock.patch.object(processor, '_call_api', return_value=response) as call:
+            first = processor.process_text("Policy P-1 claim C-1")
+            second = processor.process_text("Policy P-1 claim C-1")
+
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(processor.cache.stats()["hits"], 1)
+
+        # A fresh processor reads the entry back from the SQLite tier
+        processor.cache.close()
+        reloaded = make_processor(cache_enabled=True, cache_path=self.db_path)
+        with mock.patch.object(reloaded, '_call_api') as call:
+            self.assertEqual(reloaded.process_text("Policy P-1 claim C-1"), first)
+        call.assert_not_called()
+        reloaded.cache.close()
+
+        self.assertEqual(processor.calculate_api_cost(dict(response, cached=True)), 0.0)
+
+    def test_ttl_and_size_eviction(self):
+        """
+        Expired entries miss and the disk tier never grows beyond max_entries.
+        """
+        cache = ResponseCache(self.db_path, memory_entries=1, max_entries=2, ttl_seconds=60)
+        for key in ("a", "b", "c"):
+            cache.set(key, {"value": key})
+        rows = cache._conn.execute("SELECT key FROM responses ORDER BY key").fetchall()
+        self.assertEqual([row[0] for row in rows], ["b", "c"])
+
+        with mock.patch('src.llm_cache.time.time', return_value=time.time() + 120):
+            self.assertIsNone(cache.get("c"))
+        self.assertEqual(cache.stats()["misses"], 1)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestModelCascade(unittest.TestCase):
+
+    CHUNK = "Policy P-1\nCLM-2021-0001 01/02/2021 Water damage $1,200.00\nCLM-2021-0002 03/04/2021 Fire $800.00\n"
+
+    def test_escalates_only_when_cheap_result_fails_validation(self):
+        """
+        A cheap answer that misses a row is re-sent to the configured model; a valid one is kept.
+        """
+        processor = make_processor(model="gpt-4", cascade_models=["gpt-3.5-turbo"], prompt_compression=False)
+        one_loss = json.dumps({"policy_number": "P-1", "losses": [
+            {"claim_number": "CLM-2021-0001", "date_of_loss": "01/02/2021", "amount": "$1,200.00"}
+        ]})
+        two_losses = json.dumps({"policy_number": "P-1", "losses": [
+            {"claim_number": "CLM-2021-0001", "date_of_loss": "01/02/2021", "amount": "$1,200.00"},
+            {"claim_number": "CLM-2021-0002", "date_of_loss": "03/04/2021", "amount": "$800.00"}
+        ]})
+        answers = {"gpt-3.5-turbo": one_loss, "gpt-4": two_losses}
+        with mock.patch.object(processor, '_call_api',
+                               side_effect=lambda messages, model=None: make_response(answers[model])) as call:
+            result = processor.process_text(self.CHUNK)
+
+        self.assertEqual([c.args[1] for c in call.call_args_list], ["gpt-3.5-turbo", "gpt-4"])
+        self.assertEqual(len(result["losses"]), 2)
+        tiers = processor.chunk_records[0]["tiers"]
+        self.assertEqual([t["model"] for t in tiers], ["gpt-3.5-turbo", "gpt-4"])
+        self.assertFalse(tiers[0]["valid"])
+        self.assertTrue(tiers[1]["valid"])
+        self.assertEqual(processor.cascade_stats()["escalated"], 1)
+
+        answers["gpt-3.5-turbo"] = two_losses
+        processor.chunk_records.clear()
+        with mock.patch.object(processor, '_call_api',
+                               side_effect=lambda messages, model=None: make_response(answers[model])) as call:
+            processor.process_text(self.CHUNK)
+        self.assertEqual([c.args[1] for c in call.call_args_list], ["gpt-3.5-turbo"])
+        self.assertEqual(processor.cascade_stats()["models"]["gpt-3.5-turbo"]["accepted"], 1)
+
+
+class TestPageStreaming(unittest.TestCase):
+
+    def test_first_chunk_is_sent_before_the_last_page_is_read(self):
+        processor = make_processor(max_concurrency=1, chunk_token_limit=60, prompt_compression=False)
+        pages_read = []
+        first_call_at = []
+
+        def pages():
+            for number in range(1, 51):
+                pages_read.append(number)
+                yield f"CLM-2021-{number:04d} 01/02/2021 PD Open Page {number} loss $100.00\n"
+
+        def fake_call(messages, model=None):
+            if not first_call_at:
+                first_call_at.append(len(pages_read))
+            claim = messages[1]["content"].split("Text:\n")[1].split()[0]
+            return make_response(json.dumps({"losses": [{"claim_number": claim}]}))
+
+        with mock.patch.object(processor, '_call_api', side_effect=fake_call):
+            result, usage = processor.process_pages(pages(), return_usage=True)
+
+        self.assertLess(first_call_at[0], 50)
+        self.assertEqual(len(pages_read), 50)
+        self.assertEqual(len(result["losses"]), len(usage))
+        self.assertEqual(result["losses"][0]["claim_number"], "CLM-2021-0001")
+
+    def test_iter_chunks_matches_chunk_text(self):
+        processor = make_processor(chunk_token_limit=60)
+        text = "\f".join(f"CLM-2021-{n:04d} 01/02/2021 PD Open loss {n}\nmore detail\n" for n in range(20))
+        self.assertEqual(list(processor.iter_chunks(text.split("\f"))), processor.chunk_text(text))
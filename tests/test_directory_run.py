@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from run import run_directory
+from tests.test_data_processor import make_processor, make_response
+
+
+class TestDirectoryRun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmp.name, "input")
+        self.output_dir = os.path.join(self.tmp.name, "output")
+        os.makedirs(os.path.join(self.input_dir, "carrier_b"))
+        shutil.copy("data/input/sample.pdf", os.path.join(self.input_dir, "a.pdf"))
+        shutil.copy("data/input/sample.pdf", os.path.join(self.input_dir, "carrier_b", "a.pdf"))
+        # Same document with different bytes, so it is not treated as a duplicate
+        with open("data/input/sample.pdf", 'rb') as f:
+            data = f.read()
+        with open(os.path.join(self.input_dir, "carrier_b", "b.pdf"), 'wb') as f:
+            f.write(data + b"\n")
+        with open(os.path.join(self.input_dir, "broken.pdf"), 'w') as f:
+            f.write("not a pdf")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_one_output_per_document_and_reports_throughput(self):
+        processor = make_processor()
+        with mock.patch.object(processor, '_call_api', return_value=make_response('{"losses": []}')) as call:
+            result = run_directory(self.input_dir, self.output_dir, workers=2, processor=processor)
+
+        call.assert_not_called()  # sample.pdf is handled by its layout template
+        self.assertEqual(result["documents"], 2)
+        self.assertEqual(result["pages"], 4)
+        self.assertEqual(result["failed"], [os.path.join(self.input_dir, "broken.pdf")])
+        self.assertEqual(
+            result["duplicates"],
+            {os.path.join(self.input_dir, "carrier_b", "a.pdf"): os.path.join(self.input_dir, "a.pdf")}
+        )
+        self.assertGreater(result["pages_per_sec"], 0)
+        for name in ("a", "carrier_b__b"):
+            with open(os.path.join(self.output_dir, f"{name}.json")) as f:
+                self.assertEqual(len(json.load(f)["losses"]), 20)
+            self.assertTrue(os.path.exists(os.path.join(self.output_dir, f"{name}.md")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "carrier_b__a.json")))
+        with open(os.path.join(self.output_dir, "api_cost_report.json")) as f:
+            self.assertEqual(len(json.load(f)["documents"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
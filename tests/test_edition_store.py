@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from run import extract_segments
+from src.edition_store import EditionStore, page_content_hash
+from src.mock_llm_server import synthesize_completion
+from tests.test_data_processor import make_processor, make_response
+
+HEADER = "Policy No: PX-1001\nInsured: Acme Hauling LLC\n"
+
+
+def layout(pages):
+    return {"segments": [("llm", list(enumerate(pages, 1)))]}
+
+
+class TestIncrementalEditions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = EditionStore(os.path.join(self.tmp.name, "editions.sqlite"))
+        self.processor = make_processor()
+        self.prompts = []
+
+        def fake_call(messages, model=None):
+            self.prompts.append(messages[-1]["content"])
+            return make_response(synthesize_completion(messages))
+
+        self.patch = mock.patch.object(self.processor, '_call_api', side_effect=fake_call)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_only_new_or_changed_pages_are_sent(self):
+        january = [
+            HEADER + "CLM-100 01/05/2023 Rear-end collision $1,200.00\n",
+            "CLM-200 02/11/2023 Cargo theft $8,450.00\n",
+            "CLM-300 03/20/2023 Windshield damage $300.00\n"
+        ]
+        first, _ = extract_segments(layout(january), self.processor, edition_store=self.store)
+        self.assertEqual(len(first["losses"]), 3)
+
+        february = january[:2] + [
+            "CLM-300 03/20/2023 Windshield damage $950.00\n",
+            "CLM-400 04/02/2023 Backing into dock $2,100.00\n"
+        ]
+        self.prompts.clear()
+        second, _ = extract_segments(layout(february), self.processor, edition_store=self.store)
+
+        self.assertEqual(len(self.prompts), 1)
+        self.assertNotIn("CLM-100", self.prompts[0])
+        self.assertIn("CLM-400", self.prompts[0])
+        self.assertEqual(second["policy_number"], "PX-1001")
+        self.assertEqual([loss["claim_number"] for loss in second["losses"]],
+                         ["CLM-100", "CLM-200", "CLM-300", "CLM-400"])
+        self.assertEqual(second["losses"][2]["amount"], "$950.00")
+
+        # An unchanged edition costs nothing
+        self.prompts.clear()
+        third, usage = extract_segments(layout(february), self.processor, edition_store=self.store)
+        self.assertEqual(self.prompts, [])
+        self.assertEqual(usage, [])
+        self.assertEqual(third, second)
+
+    def test_new_edition_replaces_the_policy_pages(self):
+        pages = [HEADER + "CLM-100 01/05/2023 Rear-end collision $1,200.00\n"]
+        extract_segments(layout(pages), self.processor, edition_store=self.store)
+        revised = [HEADER + "CLM-100 01/05/2023 Rear-end collision $1,500.00\n"]
+        extract_segments(layout(revised), self.processor, edition_store=self.store)
+
+        self.assertEqual(self.store.stats()["pages"], 1)
+        self.assertIsNone(self.store.lookup(page_content_hash(pages[0]), self.processor.model, "PX-1001"))
+        self.assertIsNotNone(self.store.lookup(page_content_hash(revised[0]), self.processor.model, "PX-1001"))
+
+    def test_failed_chunk_is_not_saved_and_is_sent_again(self):
+        # Small chunks: the one holding CLM-200 also carries the end of page 1
+        pages = [
+            HEADER + "".join(f"CLM-10{n} 01/05/2023 Rear-end collision $1,200.00\n" for n in range(4)),
+            "CLM-200 02/11/2023 Cargo theft $8,450.00\n"
+        ]
+        processor = make_processor(chunk_token_limit=64, max_retries=0)
+
+        def flaky_call(messages, model=None):
+            if "CLM-200" in messages[-1]["content"]:
+                raise ValueError("bad gateway")
+            return make_response(synthesize_completion(messages))
+
+        with mock.patch.object(processor, '_call_api', side_effect=flaky_call):
+            first, _ = extract_segments(layout(pages), processor, edition_store=self.store)
+        self.assertEqual([loss["claim_number"] for loss in first["losses"]], ["CLM-100", "CLM-101"])
+        self.assertEqual(self.store.stats()["pages"], 0)
+
+        with mock.patch.object(processor, '_call_api', side_effect=self.processor._call_api) as call:
+            second, _ = extract_segments(layout(pages), processor, edition_store=self.store)
+        self.assertEqual(call.call_count, 3)
+        self.assertEqual([loss["claim_number"] for loss in second["losses"]],
+                         ["CLM-100", "CLM-101", "CLM-102", "CLM-103", "CLM-200"])
+        self.assertEqual(self.store.stats()["pages"], 2)
+
+    def test_pages_are_not_reused_across_policies(self):
+        shared = "CLM-100 01/05/2023 Rear-end collision $1,200.00\n"
+        extract_segments(layout([HEADER, shared]), self.processor, edition_store=self.store)
+        self.prompts.clear()
+        other, _ = extract_segments(
+            layout(["Policy No: PX-2002\nInsured: Other Co\n", shared]), self.processor, edition_store=self.store
+        )
+        self.assertTrue(any("CLM-100" in prompt for prompt in self.prompts))
+        self.assertEqual(other["policy_number"], "PX-2002")
+        self.assertEqual(self.store.stats()["policies"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
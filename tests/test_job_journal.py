@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.job_journal import JobJournal
+from src.mock_llm_server import synthesize_completion
+from tests.test_data_processor import make_processor, make_response
+
+PAGES = [f"CLM-2021-{number:04d} 01/02/2021 PD Open Page {number} loss $100.00\n" for number in range(1, 7)]
+
+
+class TestJobJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "jobs", "doc.jsonl")
+        self.processor = make_processor(max_concurrency=1, chunk_token_limit=60, prompt_compression=False,
+                                        max_retries=0)
+        self.prompts = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_job(self, journal, failing_claim=None):
+        def fake_call(messages, model=None):
+            self.prompts.append(messages[-1]["content"])
+            if failing_claim and failing_claim in messages[-1]["content"]:
+                raise RuntimeError("connection reset")
+            return make_response(synthesize_completion(messages))
+
+        with mock.patch.object(self.processor, '_call_api', side_effect=fake_call):
+            return self.processor.process_pages(iter(PAGES), journal=journal)
+
+    def test_resume_sends_only_missing_chunks(self):
+        journal = JobJournal(self.path, job={"source": "doc.pdf"})
+        first = self.run_job(journal, failing_claim="CLM-2021-0003")
+        journal.close()
+        self.assertEqual(journal.failed, 1)
+        self.assertNotIn("CLM-2021-0003", [loss["claim_number"] for loss in first["losses"]])
+        sent_first = len(self.prompts)
+
+        self.prompts.clear()
+        journal = JobJournal(self.path, resume=True)
+        second = self.run_job(journal)
+        journal.close()
+
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn("CLM-2021-0003", self.prompts[0])
+        self.assertEqual(journal.stats()["reused"], sent_first - 1)
+        self.assertEqual([loss["claim_number"] for loss in second["losses"]],
+                         [f"CLM-2021-{number:04d}" for number in range(1, 7)])
+
+    def test_torn_record_from_a_crash_is_discarded(self):
+        journal = JobJournal(self.path)
+        self.run_job(journal)
+        journal.close()
+        with open(self.path, 'a') as f:
+            f.write('{"event": "chunk", "key": "abc", "sta')
+
+        self.prompts.clear()
+        journal = JobJournal(self.path, resume=True)
+        result = self.run_job(journal)
+        journal.close()
+        self.assertEqual(self.prompts, [])
+        self.assertEqual(len(result["losses"]), len(PAGES))
+
+        journal = JobJournal(self.path, resume=True)
+        self.assertGreater(journal.stats()["finished"], 0)
+        self.assertEqual(journal.failed, 0)
+        journal.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_without_resume_the_journal_starts_afresh(self):
+        journal = JobJournal(self.path)
+        self.run_job(journal)
+        journal.close()
+
+        self.prompts.clear()
+        journal = JobJournal(self.path)
+        self.run_job(journal)
+        journal.close()
+        self.assertEqual(len(self.prompts), journal.stats()["recorded"])
+        self.assertGreater(len(self.prompts), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import unittest
+
+from src.json_repair import recover_json
+from tests.test_data_processor import make_processor
+
+FULL = json.dumps({
+    "policy_number": "LTCM-789234-01",
+    "insured_name": "Mountain Valley Transport LLC",
+    "losses": [
+        {"claim_number": f"CLM-2021-{i:04d}", "date_of_loss": "04/04/2021", "amount": "$590.59",
+         "description": "INSD DRVR MADE AN UNSAFE LANE SWITCH"}
+        for i in range(5)
+    ]
+}, indent=2)
+
+
+class TestRecoverJSON(unittest.TestCase):
+
+    def test_complete_json_round_trips(self):
+        result = recover_json("Here is the data:\n```json\n" + FULL + "\n```\n{\"extra\": 1}")
+        self.assertEqual(result.data, json.loads(FULL))
+        self.assertFalse(result.truncated)
+        self.assertEqual(result.recovered_records, 5)
+
+    def test_brackets_in_leading_prose_are_skipped(self):
+        result = recover_json("Extracted per the schema (see [1]) below:\n" + FULL)
+        self.assertEqual(result.data, json.loads(FULL))
+        processor = make_processor()
+        self.assertEqual(processor._attempt_json_repair("Claims [2 pages]: " + FULL[:-1])["policy_number"],
+                         "LTCM-789234-01")
+        # An array is only the root when there is no object
+        self.assertEqual(recover_json('Values: [1, 2]').data, [1, 2])
+
+    def test_truncated_output_keeps_complete_losses(self):
+        """
+        Every possible cut point yields a dict holding only complete losses.
+        """
+        expected = json.loads(FULL)["losses"]
+        for cut in range(FULL.index('"losses"'), len(FULL)):
+            result = recover_json(FULL[:cut])
+            self.assertIsInstance(result.data, dict)
+            losses = result.data.get("losses", [])
+            self.assertEqual(losses, expected[:len(losses)])
+            self.assertEqual(result.recovered_records, len(losses))
+
+        cut = FULL.index('"CLM-2021-0003"') + 4
+        result = recover_json(FULL[:cut])
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.recovered_records, 3)
+        self.assertEqual(result.dropped_partial, 1)
+
+    def test_whitespace_separated_trailing_commas(self):
+        text = '{"policy_number": "P-1" ,\n "losses": [ {"claim_number": "C-1", } ,\n ] , }'
+        result = recover_json(text)
+        self.assertEqual(result.data, {"policy_number": "P-1", "losses": [{"claim_number": "C-1"}]})
+
+    def test_raw_control_characters_in_strings_are_kept(self):
+        text = '{"policy_number": "P-1", "losses": [{"claim_number": "C-1", "description": "Rear-ended\nat\tlight'
+        self.assertEqual(recover_json(text + '"}]}').data["losses"][0]["description"], "Rear-ended\nat\tlight")
+        # The retry for a cut-off escape sequence is lenient too
+        self.assertEqual(recover_json(text + '\\').data["losses"], [])
+        processor = make_processor()
+        self.assertEqual(len(processor.parse_completion(text + '"}, {"claim_number": "C-2"}]}')["losses"]), 2)
+
+    def test_processor_salvages_truncated_completion(self):
+        processor = make_processor()
+        data = processor.parse_completion(FULL[:FULL.index('"CLM-2021-0004"')])
+        self.assertEqual(len(data["losses"]), 4)
+        self.assertEqual(data["insured_name"], "Mountain Valley Transport LLC")
+
+
+if __name__ == '__main__':
+    unittest.main()
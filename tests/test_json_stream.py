@@ -0,0 +1,109 @@
+import unittest
+from unittest import mock
+
+from src.json_stream import IncrementalLossParser
+from tests.test_data_processor import make_processor
+
+COMPLETION = (
+    '```json\n{"policy_number": "LTCM-789234-01", "insured_name": "Mountain \\"Valley\\" LLC",\n'
+    ' "losses": [\n'
+    '  {"claim_number": "CLM-1", "date_of_loss": "04/04/2021", "amount": "$590.59", "description": "Hit {wall}"},\n'
+    '  {"claim_number": "CLM-2", "date_of_loss": "04/28/2021", "amount": "$7,078.24", "description": "Backed up",},\n'
+    '  {"claim_number": "CLM-3", "date_of_loss": "11/04/2021", "amount": "$0.00", "description": "Lane change"}\n'
+    ' ]}\n```'
+)
+
+
+class TestIncrementalLossParser(unittest.TestCase):
+
+    def test_emits_each_loss_when_its_brace_closes(self):
+        """
+        Losses come out one at a time regardless of how the text is fragmented.
+        """
+        parser = IncrementalLossParser()
+        emitted_at = []
+        for position in range(len(COMPLETION)):
+            for loss in parser.feed(COMPLETION[position]):
+                emitted_at.append((position, loss["claim_number"]))
+
+        self.assertEqual([claim for _, claim in emitted_at], ["CLM-1", "CLM-2", "CLM-3"])
+        self.assertEqual(emitted_at[0][0], COMPLETION.index('"Hit {wall}"}') + len('"Hit {wall}"}') - 1)
+        self.assertTrue(parser.complete)
+        self.assertEqual(parser.result()["insured_name"], 'Mountain "Valley" LLC')
+
+    def test_truncated_stream_keeps_completed_losses(self):
+        parser = IncrementalLossParser()
+        parser.feed(COMPLETION[:COMPLETION.index('"CLM-3"')])
+        result = parser.result()
+        self.assertFalse(parser.complete)
+        self.assertEqual(result["policy_number"], "LTCM-789234-01")
+        self.assertEqual([loss["claim_number"] for loss in result["losses"]], ["CLM-1", "CLM-2"])
+
+    def test_raw_control_characters_in_strings_are_accepted(self):
+        parser = IncrementalLossParser()
+        losses = parser.feed('{"insured_name": "Fleet\tOne", "losses": [{"claim_number": "CLM-1", '
+                             '"description": "Rear-ended\nat light"}]}')
+        self.assertEqual([loss["description"] for loss in losses], ["Rear-ended\nat light"])
+        self.assertEqual(parser.result()["insured_name"], "Fleet\tOne")
+        self.assertTrue(parser.complete)
+
+
+class TestStreamingProcessing(unittest.TestCase):
+
+    def test_dropped_stream_returns_partial_result(self):
+        """
+        Losses reach the callback during the stream and survive a dropped connection.
+        """
+        processor = make_processor(stream=True)
+        received = []
+
+        def fake_stream(messages, model=None):
+            for start in range(0, COMPLETION.index('"CLM-3"'), 7):
+                yield COMPLETION[start:start + 7]
+            raise ConnectionError("connection reset")
+
+        with mock.patch.object(processor, '_call_api_stream', side_effect=fake_stream):
+            result = processor.process_text("Policy LTCM-789234-01", on_loss=received.append)
+
+        self.assertEqual([loss["claim_number"] for loss in received], ["CLM-1", "CLM-2"])
+        self.assertEqual(result["losses"], received)
+
+    def test_parser_failure_falls_back_to_the_full_completion(self):
+        """
+        A bug in the incremental parser is not mistaken for a dropped stream; the whole answer is still used.
+        """
+        processor = make_processor(stream=True)
+        received = []
+        feed = IncrementalLossParser.feed
+
+        def failing_feed(parser, fragment):
+            if len(parser.losses) == 1:
+                raise ValueError("parser bug")
+            return feed(parser, fragment)
+
+        def fake_stream(messages, model=None):
+            for start in range(0, len(COMPLETION), 7):
+                yield COMPLETION[start:start + 7]
+
+        with mock.patch.object(processor, '_call_api_stream', side_effect=fake_stream), \
+                mock.patch.object(IncrementalLossParser, 'feed', failing_feed):
+            result = processor.process_text("Policy LTCM-789234-01", on_loss=received.append)
+
+        self.assertEqual([loss["claim_number"] for loss in received], ["CLM-1", "CLM-2", "CLM-3"])
+        self.assertEqual(result["losses"], received)
+
+    def test_callback_errors_are_not_treated_as_a_dropped_stream(self):
+        processor = make_processor(stream=True)
+
+        def on_loss(loss):
+            raise RuntimeError("callback bug")
+
+        with mock.patch.object(processor, '_call_api_stream', return_value=iter([COMPLETION])), \
+                self.assertLogs(level="ERROR") as logs:
+            with self.assertRaises(ValueError):
+                processor.process_text("Policy LTCM-789234-01", on_loss=on_loss)
+        self.assertTrue(any("callback bug" in line for line in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from run import extract_document
+from src.data_processor import AMOUNT_INSTRUCTION
+from src.layout_extractor import TEMPLATE_REGISTRY, LayoutExtractor
+from src.pdf_parser import PDFParser
+from tests.test_data_processor import make_processor, make_response
+
+
+class TestLayoutExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = PDFParser("data/input/sample.pdf")
+
+    def test_sample_layout_extracts_every_claim_without_llm(self):
+        """
+        The sample loss run matches a template on both pages, including the continuation page.
+        """
+        started = time.perf_counter()
+        result = LayoutExtractor().extract(self.parser.iter_page_words())
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(result["template_pages"], 2)
+        self.assertEqual(result["fallback_pages"], 0)
+        self.assertLess(elapsed, 1.0)
+
+        processor = make_processor()
+        with mock.patch.object(processor, '_call_api') as call:
+            merged, _ = extract_document(self.parser, processor)
+        call.assert_not_called()
+
+        losses = {loss["claim_number"]: loss for loss in merged["losses"]}
+        self.assertEqual(merged["policy_number"], "LTCM-789234-01")
+        self.assertEqual(merged["insured_name"], "Mountain Valley Transport LLC")
+        self.assertEqual(len(losses), 20)
+        self.assertEqual(losses["CLM-2021-1509"]["amount"], "$275,000.00")
+        self.assertEqual(losses["CLM-2021-1509"]["date_of_loss"], "11/04/2021")
+        self.assertEqual(losses["CLM-2022-1039"]["description"], "STRATFORD, TX - INSD VEH HIT PARKED CLMT VEH")
+        self.assertTrue(losses["CLM-2022-1090"]["description"].startswith("PARSONS, KS"))
+
+    def test_unmatched_pages_fall_back_to_llm(self):
+        pages = list(self.parser.iter_page_words())
+        cover = (0, [(10, 10, 50, 20, "Cover", 0, 0, 0)], "Cover\nPolicy LTCM-789234-01\n")
+        processor = make_processor()
+        llm_result = '{"policy_number": "", "losses": [{"claim_number": "EXTRA-1"}]}'
+
+        with mock.patch.object(self.parser, 'iter_page_words', return_value=iter([cover] + pages)), \
+                mock.patch.object(processor, '_call_api', return_value=make_response(llm_result)) as call:
+            merged, usage = extract_document(self.parser, processor)
+
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual([(u["prompt_tokens"], u["completion_tokens"]) for u in usage], [(100, 50)])
+        self.assertIn("Cover", call.call_args[0][0][1]["content"])
+        self.assertEqual(merged["losses"][0]["claim_number"], "EXTRA-1")
+        self.assertEqual(len(merged["losses"]), 21)
+
+    def test_template_and_llm_paths_agree_on_amounts(self):
+        """
+        A claim's amount means the same whichever path extracts its page.
+
+        data/output/output.json is a recorded LLM extraction of the sample; its
+        2021 claims sit on rows the recorded run read unambiguously.
+        """
+        with open("data/output/output.json") as f:
+            recorded = f.read()
+        processor = make_processor()
+        with mock.patch.dict(TEMPLATE_REGISTRY, clear=True), \
+                mock.patch.object(processor, '_call_api', return_value=make_response(recorded)) as call:
+            llm, _ = extract_document(self.parser, processor)
+        self.assertIn(AMOUNT_INSTRUCTION, call.call_args[0][0][-1]["content"])
+
+        with mock.patch.object(processor, '_call_api') as call:
+            template, _ = extract_document(PDFParser("data/input/sample.pdf"), processor)
+        call.assert_not_called()
+
+        llm_amounts = {loss["claim_number"]: loss["amount"] for loss in llm["losses"]}
+        template_amounts = {loss["claim_number"]: loss["amount"] for loss in template["losses"]}
+        claims = [claim for claim in template_amounts if claim.startswith("CLM-2021-")]
+        self.assertEqual(len(claims), 5)
+        self.assertEqual({claim: template_amounts[claim] for claim in claims},
+                         {claim: llm_amounts[claim] for claim in claims})
+        self.assertEqual(json.loads(recorded)["policy_number"], template["policy_number"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from src.llm_backend import LLMBackend, OpenAIBackend, get_openai_client
+from src.mock_llm_server import MockLLMServer
+from tests.test_data_processor import make_processor
+
+TEXT = (
+    "Policy LTCM-789234-01\nInsured: Example Freight LLC\n"
+    "CLM-2021-0834 04/04/2021 PD Open Rear-end collision $7,078.24\n"
+    "CLM-2021-0901 05/01/2021 BI Closed Slip and fall $1,250.00\n"
+)
+
+
+class TestMockBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLLMServer(seed=7).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_process_text_against_mock_server_reuses_one_connection(self):
+        processor = make_processor(llm_base_url=self.server.url, max_concurrency=1,
+                                   prompt_compression=False, chunk_token_limit=40)
+        result = processor.process_text(TEXT)
+
+        self.assertEqual([loss["claim_number"] for loss in result["losses"]], ["CLM-2021-0834", "CLM-2021-0901"])
+        self.assertEqual(result["policy_number"], "LTCM-789234-01")
+        self.assertGreater(self.server.requests, 1)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_streaming_and_injected_errors_are_retried(self):
+        self.server.error_rate = 0.5
+        processor = make_processor(llm_base_url=self.server.url, stream=True, max_retries=20,
+                                   retry_base_delay=0.001, prompt_compression=False, chunk_token_limit=40)
+        result = processor.process_text(TEXT)
+
+        self.assertEqual(len(result["losses"]), 2)
+        self.assertGreater(self.server.errors, 0)
+
+    def test_client_is_shared_per_settings(self):
+        first = OpenAIBackend("key", base_url=self.server.url)
+        second = OpenAIBackend("key", base_url=self.server.url)
+        self.assertIs(first.client, second.client)
+        self.assertIsNot(first.client, get_openai_client("key", self.server.url, timeout=5.0))
+
+    def test_incomplete_backend_fails_on_construction(self):
+        class CompleteOnly(LLMBackend):
+            def complete(self, messages, model, max_tokens, temperature):
+                return {}
+
+        with self.assertRaises(TypeError):
+            CompleteOnly()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import math
+import os
+import tempfile
+import unittest
+
+from src.analytics import Analytics
+from src.loss_store import LossStore
+
+EDITION_1 = {
+    "policy_number": "PX-1001",
+    "insured_name": "Fleet One LLC",
+    "losses": [
+        {"claim_number": "CLM-100", "date_of_loss": "01/05/2023", "amount": "$1,200.00", "description": "Collision"},
+        {"claim_number": "CLM-101", "date_of_loss": "2023-03-20", "amount": "(250.00)", "description": "Refund"},
+        {"claim_number": "CLM-102", "date_of_loss": "unknown", "amount": "$0.00", "description": "Glass"}
+    ]
+}
+EDITION_2 = {
+    "policy_number": "PX-1001",
+    "insured_name": "Fleet One LLC",
+    "losses": [
+        {"claim_number": "CLM-100", "date_of_loss": "01/05/2023", "amount": "$1,800.00", "description": "Collision"},
+        {"claim_number": "CLM-103", "date_of_loss": "06/11/2024", "amount": "$300.00", "description": "Theft"}
+    ]
+}
+OTHER_POLICY = {
+    "policy_number": "PX-2002",
+    "insured_name": "Fleet Two Inc",
+    "losses": [
+        {"claim_number": "CLM-100", "date_of_loss": "02/14/2023", "amount": "$500.00", "description": "Collision"}
+    ]
+}
+
+# One report covering two policies, as merged by ChunkMerger: losses of the second policy carry their own
+TWO_POLICIES = {
+    "policy_number": "PX-1001",
+    "insured_name": "Fleet One LLC",
+    "losses": [
+        {"claim_number": "CLM-100", "date_of_loss": "01/05/2023", "amount": "$1,200.00", "description": "Collision"},
+        {"claim_number": "CLM-100", "date_of_loss": "02/14/2023", "amount": "$500.00", "description": "Theft",
+         "policy_number": "PX-2002"}
+    ]
+}
+
+
+class TestLossStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = LossStore(os.path.join(self.tmp.name, "losses.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_later_edition_updates_claims_in_place(self):
+        self.assertEqual(self.store.upsert_document("doc-1", EDITION_1, "edition_1.pdf"), 3)
+        self.store.upsert_document("doc-2", EDITION_2, "edition_2.pdf")
+        self.store.upsert_document("doc-3", OTHER_POLICY)
+
+        self.assertEqual(self.store.stats(), {"documents": 3, "losses": 5, "policies": 2})
+        claim = [loss for loss in self.store.get_claim("CLM-100") if loss["policy_number"] == "PX-1001"]
+        self.assertEqual([loss["amount"] for loss in claim], ["$1,800.00"])
+        self.assertEqual(len(self.store.get_claim("CLM-100")), 2)
+        self.assertEqual(
+            [loss["claim_number"] for loss in self.store.losses(policy_number="PX-1001", date_from="2023-02-01")],
+            ["CLM-101", "CLM-103"]
+        )
+
+    def test_losses_are_filed_under_their_own_policy(self):
+        self.assertEqual(self.store.upsert_document("doc-1", TWO_POLICIES), 2)
+        self.assertEqual(self.store.stats(), {"documents": 1, "losses": 2, "policies": 2})
+        self.assertEqual([loss["amount"] for loss in self.store.losses(policy_number="PX-2002")], ["$500.00"])
+
+        summary = Analytics(store=self.store).run()
+        expected = Analytics(data=TWO_POLICIES).run()
+        self.assertEqual(summary["by_policy"], expected["by_policy"])
+        self.assertEqual(set(summary["by_policy"]), {"PX-1001", "PX-2002"})
+
+    def test_lookups_use_indexes(self):
+        for sql in ("SELECT * FROM losses WHERE policy_number = ?", "SELECT * FROM losses WHERE claim_number = ?",
+                    "SELECT * FROM losses WHERE loss_date >= ?"):
+            plan = " ".join(row[-1] for row in self.store.query(f"EXPLAIN QUERY PLAN {sql}", ["x"]))
+            self.assertIn("USING INDEX", plan)
+
+    def test_sql_summary_matches_pandas_summary(self):
+        self.store.upsert_document("doc-1", EDITION_1)
+        expected = Analytics(data=EDITION_1).run()
+        summary = Analytics(store=self.store).run()
+
+        self.assertEqual(set(summary), set(expected))
+        for key, value in expected.items():
+            if isinstance(value, float):
+                self.assertTrue(math.isclose(summary[key], value), key)
+            else:
+                self.assertEqual(summary[key], value, key)
+
+    def test_summary_filters_by_policy(self):
+        self.store.upsert_document("doc-1", EDITION_1)
+        self.store.upsert_document("doc-3", OTHER_POLICY)
+        summary = Analytics(store=self.store, policy_number="PX-2002").run()
+        self.assertEqual(summary["total_claims"], 1)
+        self.assertEqual(summary["claims_by_month"], {"2023-02": 1})
+        self.assertEqual(len(Analytics(store=self.store).load_data()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
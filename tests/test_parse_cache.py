@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.parse_cache import ParseCache
+from src.pdf_parser import PDFParser
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(os.path.join(self.tmp.name, "parse_cache.sqlite"))
+        self.copy_path = os.path.join(self.tmp.name, "renamed.pdf")
+        shutil.copy("data/input/sample.pdf", self.copy_path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_renamed_copy_is_served_from_cache_without_opening_the_pdf(self):
+        original = PDFParser("data/input/sample.pdf", cache=self.cache)
+        expected = list(original.iter_pages())
+
+        copy = PDFParser(self.copy_path, cache=self.cache)
+        self.assertEqual(copy.document_id, original.document_id)
+        with mock.patch("src.pdf_parser.fitz.open", side_effect=AssertionError("PDF opened")):
+            self.assertEqual(list(copy.iter_pages()), expected)
+            self.assertEqual(copy.extract_text(), PDFParser(self.copy_path, cache=self.cache).extract_text())
+        self.assertEqual(copy.page_total, len(expected))
+        self.assertEqual(copy.metadata, original.metadata)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_word_geometry_round_trips(self):
+        expected = [(number, [list(word) for word in words], text)
+                    for number, words, text in PDFParser("data/input/sample.pdf", cache=self.cache).iter_page_words()]
+        with mock.patch("src.pdf_parser.fitz.open", side_effect=AssertionError("PDF opened")):
+            cached = list(PDFParser(self.copy_path, cache=self.cache).iter_page_words())
+        self.assertEqual([(number, [list(word) for word in words], text) for number, words, text in cached], expected)
+
+    def test_least_recently_used_entries_are_evicted_past_the_size_limit(self):
+        for name in ("a", "b", "c"):
+            self.cache.store(name, os.urandom(400), {}, 1, False)
+            self.cache.read("a")  # keep "a" recently used
+        self.cache.max_bytes = 1000
+        self.cache.store("d", os.urandom(400), {}, 1, False)
+
+        self.assertIsNotNone(self.cache.read("a"))
+        self.assertIsNotNone(self.cache.read("d"))
+        self.assertIsNone(self.cache.read("b"))
+        self.assertLessEqual(self.cache.stats()["bytes"], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
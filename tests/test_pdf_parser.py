@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import fitz
+
+from src.pdf_parser import PAGE_BREAK, PDFParser
+
+
+class TestPDFParser(unittest.TestCase):
+
+    def test_iter_pages_is_lazy_and_parse_opens_once(self):
+        parser = PDFParser("data/input/sample.pdf")
+        with mock.patch("src.pdf_parser.fitz.open", wraps=fitz.open) as opened:
+            pages = parser.iter_pages()
+            opened.assert_not_called()
+            number, text = next(pages)
+            self.assertEqual(number, 1)
+            self.assertIn("Claim", text)
+            pages.close()
+
+            result = parser.parse_pdf()
+        self.assertEqual(opened.call_count, 2)
+        self.assertEqual(parser.page_total, 2)
+        self.assertEqual(result["text"].count(PAGE_BREAK), 1)
+        self.assertIsInstance(result["metadata"], dict)
+
+    def test_parallel_extraction_matches_serial_and_stays_serial_when_small(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "large.pdf")
+            with fitz.open("data/input/sample.pdf") as src, fitz.open() as out:
+                for _ in range(30):
+                    out.insert_pdf(src)
+                out.save(path)
+
+            parser = PDFParser(path)
+            serial = parser.extract_text(workers=1)
+            with mock.patch("src.pdf_parser.ProcessPoolExecutor") as pool, \
+                    mock.patch("src.pdf_parser.fitz.open", wraps=fitz.open) as opened:
+                self.assertEqual(parser.extract_text(workers=4), serial)
+            pool.assert_not_called()  # 60 pages is below the threshold for two workers
+            self.assertEqual(opened.call_count, 1)
+
+            with mock.patch("src.pdf_parser.MIN_PAGES_PER_WORKER", 10):
+                pages = list(parser.iter_pages(workers=3))
+            self.assertEqual([number for number, _ in pages], list(range(1, 61)))
+            self.assertEqual(PAGE_BREAK.join(text for _, text in pages), serial)
+
+            # The default is automatic, and page words take the same parallel path
+            serial_words = list(parser.iter_page_words(workers=1))
+            with mock.patch("src.pdf_parser.MIN_PAGES_PER_WORKER", 10), \
+                    mock.patch("src.pdf_parser.os.cpu_count", return_value=3), \
+                    mock.patch("src.pdf_parser.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+                self.assertEqual(parser.extract_text(), serial)
+                words = list(parser.iter_page_words())
+            self.assertEqual(pool.call_count, 2)
+            self.assertEqual([number for number, _, _ in words], list(range(1, 61)))
+            self.assertEqual([(list(map(tuple, w)), t) for _, w, t in words],
+                             [(list(map(tuple, w)), t) for _, w, t in serial_words])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import json
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from src.cost_tracker import CostTracker
+from src.mock_llm_server import synthesize_completion
+from src.request_packer import RequestPacker, split_tokens
+from tests.test_data_processor import make_processor, make_response
+
+DOCUMENTS = {
+    f"report_{n}.pdf": f"Policy No: PX-{n}001\nInsured: Fleet {n} LLC\nCLM-{n}00 01/05/2023 Collision ${n},100.00\n"
+    for n in range(1, 6)
+}
+
+
+def answer_packed(messages, model=None):
+    """
+    Fake model: answer each tagged document in a packed prompt on its own.
+    """
+    text = messages[-1]["content"].split("Text:\n", 1)[1]
+    if "### DOCUMENT" not in text:
+        return make_response(synthesize_completion(messages))
+    parts = re.split(r'^### DOCUMENT (D\d+)\n', text, flags=re.M)[1:]
+    answer = {
+        tag: json.loads(synthesize_completion([{"role": "user", "content": "Text:\n" + body}]))
+        for tag, body in zip(parts[::2], parts[1::2])
+    }
+    return make_response(json.dumps(answer))
+
+
+class TestRequestPacker(unittest.TestCase):
+
+    def setUp(self):
+        self.processor = make_processor(max_retries=0)
+
+    def test_small_documents_share_one_request(self):
+        packer = RequestPacker(self.processor)
+        with mock.patch.object(self.processor, '_call_api', side_effect=answer_packed) as call:
+            results, usage = packer.process_documents(DOCUMENTS, return_usage=True)
+
+        self.assertEqual(call.call_count, 1)
+        for n in range(1, 6):
+            result = results[f"report_{n}.pdf"]
+            self.assertEqual(result["policy_number"], f"PX-{n}001")
+            self.assertEqual([loss["claim_number"] for loss in result["losses"]], [f"CLM-{n}00"])
+            self.assertEqual(usage[f"report_{n}.pdf"][0]["packed_documents"], 5)
+        self.assertEqual(packer.stats()["packed_documents"], 5)
+
+    def test_packed_request_is_billed_once(self):
+        packer = RequestPacker(self.processor)
+        with mock.patch.object(self.processor, '_call_api', side_effect=answer_packed):
+            _, usage = packer.process_documents(DOCUMENTS, return_usage=True)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            tracker = CostTracker(output_dir)
+            summaries = [tracker.summarize_document(document_id, records, claims=1)
+                         for document_id, records in usage.items()]
+        one_call = self.processor.calculate_api_cost(make_response("{}"), self.processor.model)
+        self.assertEqual(sum(summary["api_calls"] for summary in summaries), 1)
+        self.assertEqual(sum(summary["prompt_tokens"] for summary in summaries), 100)
+        self.assertEqual(sum(summary["completion_tokens"] for summary in summaries), 50)
+        self.assertAlmostEqual(sum(record[0]["cost"] for record in usage.values()), one_call)
+        self.assertEqual(usage["report_2.pdf"][0]["packed_with"], "report_1.pdf")
+        # Every document pays its share of the tokens, so none looks free
+        for summary in summaries:
+            self.assertGreaterEqual(summary["total_tokens"], 150 // len(DOCUMENTS) - 1)
+            self.assertLessEqual(summary["total_tokens"], 150 // len(DOCUMENTS) + 2)
+
+    def test_split_tokens_follows_weights_and_adds_up(self):
+        self.assertEqual(split_tokens(100, [1, 1, 2]), [25, 25, 50])
+        self.assertEqual(split_tokens(10, [1, 1, 1]), [4, 3, 3])
+        self.assertEqual(split_tokens(7, [0, 0]), [4, 3])
+
+    def test_failed_fallback_document_does_not_stop_the_others(self):
+        packer = RequestPacker(self.processor)
+
+        def fake_call(messages, model=None):
+            if "### DOCUMENT" in messages[-1]["content"]:
+                return make_response('{"D1": {"polic')
+            if "CLM-300" in messages[-1]["content"]:
+                raise ValueError("bad gateway")
+            return answer_packed(messages)
+
+        with mock.patch.object(self.processor, '_call_api', side_effect=fake_call):
+            results = packer.process_documents(DOCUMENTS)
+
+        self.assertEqual(sorted(results), [f"report_{n}.pdf" for n in (1, 2, 4, 5)])
+        # Each document was chunked and filtered once, packed or not
+        self.assertEqual(self.processor.relevance_filter.stats()["kept"], len(DOCUMENTS))
+
+    def test_document_limit_splits_packs(self):
+        packer = RequestPacker(self.processor, max_documents=2)
+        with mock.patch.object(self.processor, '_call_api', side_effect=answer_packed) as call:
+            results = packer.process_documents(DOCUMENTS)
+        # Packs of 2, 2 and a single document sent on its own
+        self.assertEqual(call.call_count, 3)
+        self.assertEqual(packer.stats()["single_documents"], 1)
+        self.assertEqual(len(results), 5)
+
+    def test_expected_answer_size_splits_packs(self):
+        packer = RequestPacker(self.processor)
+        answers = [packer.expected_answer_tokens(self.processor.token_counter.count(text))
+                   for text in DOCUMENTS.values()]
+        # Room for any two answers but not three
+        self.processor.max_tokens = sorted(answers)[-1] + sorted(answers)[-2]
+        self.assertLess(self.processor.max_tokens, sum(sorted(answers)[:3]))
+        with mock.patch.object(self.processor, '_call_api', side_effect=answer_packed) as call:
+            results = packer.process_documents(DOCUMENTS)
+        self.assertEqual(call.call_count, 3)
+        self.assertEqual(packer.stats()["packed_documents"], 4)
+        self.assertEqual(len(results), 5)
+
+    def test_malformed_packed_answer_falls_back_to_one_request_per_document(self):
+        packer = RequestPacker(self.processor)
+
+        def fake_call(messages, model=None):
+            if "### DOCUMENT" in messages[-1]["content"]:
+                # Answer for D1 borrows a claim from another document and D2 onwards are cut off
+                return make_response('{"D1": {"policy_number": "PX-1001", "losses": '
+                                     '[{"claim_number": "CLM-200", "date_of_loss": "01/05/2023", '
+                                     '"amount": "$2,100.00"}]}, "D2": {"polic')
+            return answer_packed(messages)
+
+        with mock.patch.object(self.processor, '_call_api', side_effect=fake_call) as call:
+            results = packer.process_documents(DOCUMENTS)
+
+        self.assertEqual(call.call_count, 1 + len(DOCUMENTS))
+        self.assertEqual(packer.stats()["rejected_documents"], 5)
+        self.assertEqual([loss["claim_number"] for loss in results["report_1.pdf"]["losses"]], ["CLM-100"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import fitz
+
+from run import process_document, run_pipeline
+from src.cost_tracker import CostTracker
+from src.loss_store import LossStore
+from src.mock_llm_server import synthesize_completion
+from src.pdf_parser import PDFParser
+from tests.test_data_processor import make_processor, make_response
+
+
+def write_pdf(path, lines):
+    with fitz.open() as pdf:
+        page = pdf.new_page()
+        page.insert_text((72, 72), "\n".join(lines), fontsize=10)
+        pdf.save(path)
+
+
+class TestRunPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, "output")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_outputs_analytics_and_cost_come_from_memory(self):
+        paths = []
+        for name in ("first.pdf", "second.pdf"):
+            paths.append(os.path.join(self.tmp.name, name))
+            shutil.copy("data/input/sample.pdf", paths[-1])
+        paths.append(os.path.join(self.tmp.name, "missing.pdf"))
+
+        with mock.patch("src.analytics.open", side_effect=AssertionError("analytics read from disk"), create=True):
+            result = run_pipeline(paths, make_processor(), output_dir=self.output_dir)
+
+        self.assertEqual(result["failed"], [paths[2]])
+        self.assertEqual(set(result["documents"]), set(paths[:2]))
+        for path in paths[:2]:
+            self.assertEqual(result["documents"][path]["analytics"]["total_claims"], 20)
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(os.path.join(self.output_dir, f"{name}.json")) as f:
+                self.assertEqual(len(json.load(f)["losses"]), 20)
+            self.assertTrue(os.path.exists(os.path.join(self.output_dir, f"{name}.md")))
+        with open(os.path.join(self.output_dir, "api_cost_report.json")) as f:
+            self.assertEqual(len(json.load(f)["documents"]), 2)
+
+    def test_next_document_is_parsed_while_llm_calls_are_in_flight(self):
+        paths = []
+        for n in (1, 2):
+            paths.append(os.path.join(self.tmp.name, f"run_{n}.pdf"))
+            write_pdf(paths[-1], [f"Policy No: PX-{n}001", f"Insured: Fleet {n}",
+                                  f"CLM-{n}00 01/05/2023 Collision $1,200.00"])
+        events = []
+        lock = threading.Lock()
+        iter_page_words = PDFParser.iter_page_words
+
+        def tracked_pages(parser):
+            with lock:
+                events.append(("parse", os.path.basename(parser.pdf_path)))
+            yield from iter_page_words(parser)
+
+        def slow_call(messages, model=None):
+            time.sleep(0.2)
+            with lock:
+                events.append(("llm", "CLM-100" in messages[-1]["content"]))
+            return make_response(synthesize_completion(messages))
+
+        processor = make_processor()
+        with mock.patch.object(PDFParser, 'iter_page_words', tracked_pages), \
+                mock.patch.object(processor, '_call_api', side_effect=slow_call):
+            result = run_pipeline(paths, processor, output_dir=self.output_dir)
+
+        self.assertLess(events.index(("parse", "run_2.pdf")), events.index(("llm", True)))
+        self.assertEqual(
+            [loss["claim_number"] for loss in result["documents"][paths[1]]["data"]["losses"]], ["CLM-200"]
+        )
+
+    def test_scheduled_document_is_upserted_into_the_loss_store(self):
+        store = LossStore(os.path.join(self.tmp.name, "losses.sqlite"))
+        self.addCleanup(store.close)
+        summary = process_document("data/input/sample.pdf", make_processor(), CostTracker(self.output_dir),
+                                   output_dir=self.output_dir, loss_store=store)
+
+        self.assertEqual(summary["claims"], 20)
+        self.assertEqual(store.stats()["documents"], 1)
+        self.assertEqual(store.stats()["losses"], 20)
+        # sample.pdf covers two policy terms; each claim is filed under its own
+        self.assertEqual(store.stats()["policies"], 2)
+        second_term = [loss["claim_number"] for loss in store.losses(policy_number="LTCM-789234-02")]
+        self.assertEqual(len(second_term), 15)
+        self.assertTrue(all(claim.startswith("CLM-2022-") for claim in second_term))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.cost_tracker import price_usage
+from src.scheduler import BudgetScheduler
+from tests.test_data_processor import make_processor
+from tests.test_run_pipeline import write_pdf
+
+ESTIMATES = {
+    "a.pdf": {"pages": 1, "chunks": 1, "prompt_tokens": 0, "completion_tokens": 0, "tokens": 100, "raw_cost": 0.5},
+    "b.pdf": {"pages": 1, "chunks": 1, "prompt_tokens": 0, "completion_tokens": 0, "tokens": 100, "raw_cost": 0.8},
+    "c.pdf": {"pages": 1, "chunks": 1, "prompt_tokens": 0, "completion_tokens": 0, "tokens": 100, "raw_cost": 0.3},
+    "huge.pdf": {"pages": 9, "chunks": 9, "prompt_tokens": 0, "completion_tokens": 0, "tokens": 900, "raw_cost": 4.0},
+}
+
+
+class TestBudgetScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, "state.json")
+        self.processor = make_processor()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_scheduler(self, budget):
+        scheduler = BudgetScheduler(self.processor, budget, state_path=self.state_path)
+        scheduler.estimate = lambda path: dict(ESTIMATES[path])
+        return scheduler
+
+    def test_admits_by_priority_within_budget_and_defers_the_rest(self):
+        scheduler = self.make_scheduler(1.0)
+        scheduler.submit("b.pdf", priority=1)
+        scheduler.submit("c.pdf", priority=0)
+        scheduler.submit("a.pdf", priority=2)
+
+        actual = {"a.pdf": 0.25, "c.pdf": 0.3}
+        result = scheduler.run(lambda path: actual[path])
+
+        self.assertEqual(result["processed"], ["a.pdf", "c.pdf"])
+        self.assertEqual(result["deferred"], ["b.pdf"])
+        self.assertAlmostEqual(result["spent"], 0.55)
+        self.assertLess(result["correction"], 1.0)
+
+        # The deferred document and the day's spend survive a restart
+        restarted = self.make_scheduler(1.0)
+        self.assertEqual([entry["path"] for entry in restarted.state["queue"]], ["b.pdf"])
+        self.assertAlmostEqual(restarted.remaining, 0.45)
+        self.assertIsNone(restarted.next_admissible())
+
+    def test_failed_documents_stay_queued(self):
+        scheduler = self.make_scheduler(5.0)
+        scheduler.submit("a.pdf")
+
+        def fail(path):
+            raise RuntimeError("boom")
+
+        result = scheduler.run(fail)
+        self.assertEqual(result["failed"], ["a.pdf"])
+        self.assertEqual(result["deferred"], ["a.pdf"])
+        self.assertEqual(scheduler.reserved, 0.0)
+
+    def test_cached_documents_do_not_pull_estimates_down(self):
+        scheduler = self.make_scheduler(5.0)
+        for path in ("a.pdf", "b.pdf", "c.pdf"):
+            scheduler.submit(path)
+        summaries = {
+            # Served from the response cache, from the edition store, and a priced outlier
+            "a.pdf": {"total_cost": 0.0, "api_calls": 0, "cached_calls": 1, "chunks": 1},
+            "b.pdf": {"total_cost": 0.0, "api_calls": 0, "cached_calls": 0, "chunks": 0},
+            "c.pdf": {"total_cost": 0.003, "api_calls": 1, "cached_calls": 0, "chunks": 1},
+        }
+        result = scheduler.run(lambda path: summaries[path])
+
+        self.assertAlmostEqual(result["spent"], 0.003)
+        # Only c.pdf was learned from, and its 1% ratio was clamped to the lower bound
+        self.assertEqual(result["correction"], 0.85)
+
+    def test_template_only_document_is_estimated_free(self):
+        scheduler = BudgetScheduler(self.processor, 1.0, state_path=self.state_path)
+        with mock.patch.object(self.processor, '_call_api') as call:
+            estimate = scheduler.estimate("data/input/sample.pdf")
+        call.assert_not_called()
+        self.assertEqual(estimate["pages"], 2)
+        self.assertEqual(estimate["raw_cost"], 0)
+
+    def test_document_over_the_whole_budget_is_rejected(self):
+        scheduler = self.make_scheduler(1.0)
+        scheduler.submit("huge.pdf")
+        scheduler.submit("a.pdf")
+        result = scheduler.run(lambda path: 0.5)
+
+        self.assertEqual(result["processed"], ["a.pdf"])
+        self.assertEqual(result["rejected"], ["huge.pdf"])
+        self.assertEqual(result["deferred"], [])
+
+    def test_estimate_has_no_side_effects_and_prices_the_cascade(self):
+        audit_path = os.path.join(self.tmp.name, "skipped.jsonl")
+        processor = make_processor(relevance_audit_path=audit_path, prompt_compression=True,
+                                   cascade_models=["gpt-3.5-turbo"])
+        pdf_path = os.path.join(self.tmp.name, "report.pdf")
+        write_pdf(pdf_path, ["Policy No: PX-1001", "CLM-100 01/05/2023 Collision $1,200.00"])
+
+        estimate = BudgetScheduler(processor, 1.0, state_path=self.state_path).estimate(pdf_path)
+
+        self.assertEqual(processor.relevance_filter.stats()["kept"], 0)
+        self.assertEqual(processor.compressor.stats()["tokens_before"], 0)
+        self.assertFalse(os.path.exists(audit_path))
+        expected = sum(price_usage(model, estimate["prompt_tokens"], estimate["completion_tokens"])
+                       for model in ("gpt-3.5-turbo", processor.model))
+        self.assertEqual(estimate["chunks"], 1)
+        self.assertAlmostEqual(estimate["raw_cost"], round(expected, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from src.validation import parse_amount, parse_date, validate_extraction
+
+
+class TestValidation(unittest.TestCase):
+
+    def test_parsers(self):
+        self.assertEqual(parse_amount("$1,500.00"), 1500.0)
+        self.assertEqual(parse_amount("(250.00)"), -250.0)
+        self.assertEqual(parse_amount("1,500 USD"), 1500.0)
+        self.assertEqual(parse_amount(75), 75.0)
+        self.assertIsNone(parse_amount("pending"))
+        self.assertIsNotNone(parse_date("04/04/2021"))
+        self.assertIsNotNone(parse_date("2021-04-04"))
+        self.assertIsNone(parse_date("last spring"))
+
+    def test_validate_extraction(self):
+        chunk = "@L3 CLM-2021-0834 04/04/2021 PD Open\nCLM-2021-0901 05/01/2021 BI Closed\n"
+        good = {"losses": [
+            {"claim_number": "CLM-2021-0834", "date_of_loss": "04/04/2021", "amount": "$10.00"},
+            {"claim_number": "CLM-2021-0901", "date_of_loss": "05/01/2021", "amount": "0"}
+        ]}
+        self.assertEqual(validate_extraction(good, chunk), [])
+
+        bad = {"losses": [
+            {"claim_number": "CLM-2021-0999", "date_of_loss": "soon", "amount": ""}
+        ]}
+        errors = validate_extraction(bad, chunk)
+        self.assertTrue(any("missing amount" in e for e in errors))
+        self.assertTrue(any("unparseable date" in e for e in errors))
+        self.assertTrue(any("not found in chunk text" in e for e in errors))
+        self.assertTrue(any("2 claim row(s)" in e for e in errors))
+        self.assertEqual(validate_extraction(None, chunk), ["result is not a JSON object"])
+
+
+if __name__ == '__main__':
+    unittest.main()